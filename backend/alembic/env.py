@@ -18,6 +18,8 @@ if PROJECT_ROOT not in sys.path:
 
 
 from app.models.agent import Agent, AgentRun, Round  # noqa: F401
+from app.models.stats import AgentStats, GenerationStats  # noqa: F401
+from app.models.news import Headline, RoundHeadline  # noqa: F401
 
 
 config = context.config
@@ -0,0 +1,49 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261018_000001'
+down_revision = '20250814_000001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'agentstats',
+        sa.Column('agent_id', sa.Integer(), sa.ForeignKey(
+            'agent.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('total_pnl', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('runs', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+    )
+
+    op.create_table(
+        'generationstats',
+        sa.Column('generation', sa.Integer(), primary_key=True),
+        sa.Column('total_pnl', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('runs', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+    # Backfill from existing history
+    op.execute(
+        """
+        INSERT INTO agentstats (agent_id, total_pnl, runs, last_run_at)
+        SELECT agent_id, SUM(pnl), COUNT(*), MAX(created_at)
+        FROM agentrun
+        GROUP BY agent_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO generationstats (generation, total_pnl, runs)
+        SELECT a.generation, SUM(r.pnl), COUNT(*)
+        FROM agentrun r JOIN agent a ON a.id = r.agent_id
+        GROUP BY a.generation
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('generationstats')
+    op.drop_table('agentstats')
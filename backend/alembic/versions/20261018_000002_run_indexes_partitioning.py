@@ -0,0 +1,99 @@
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261018_000002'
+down_revision = '20261018_000001'
+branch_labels = None
+depends_on = None
+
+
+AGENTRUN_COLUMNS = 'id, agent_id, round_id, signal, pnl, details, created_at'
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_agentrun_agent_id_id', 'agentrun', ['agent_id', 'id'])
+    op.create_index('ix_agentrun_round_id_id', 'agentrun', ['round_id', 'id'])
+    # ORDER BY id (recent runs) is served by the (id, created_at) primary key
+
+
+def upgrade() -> None:
+    # Partial indexes for the hot lookups on small tables
+    op.create_index('ix_round_unfinished', 'round', ['id'],
+                    postgresql_where=sa.text('finished_at IS NULL'))
+    op.create_index('ix_agent_active_type', 'agent', ['agent_type', 'id'],
+                    postgresql_where=sa.text('is_active'))
+
+    # agentrun becomes range-partitioned by month on created_at. The id sequence is
+    # kept so ids stay unique and monotonic across the conversion.
+    op.execute('ALTER TABLE agentrun RENAME TO agentrun_legacy')
+    op.execute('ALTER TABLE agentrun_legacy RENAME CONSTRAINT agentrun_pkey TO agentrun_legacy_pkey')
+    op.execute('ALTER SEQUENCE agentrun_id_seq OWNED BY NONE')
+    op.execute(
+        """
+        CREATE TABLE agentrun (
+            id INTEGER NOT NULL DEFAULT nextval('agentrun_id_seq'),
+            agent_id INTEGER NOT NULL REFERENCES agent (id) ON DELETE CASCADE,
+            round_id INTEGER NOT NULL REFERENCES round (id) ON DELETE CASCADE,
+            signal VARCHAR(16),
+            pnl DOUBLE PRECISION NOT NULL DEFAULT 0,
+            details TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute('ALTER SEQUENCE agentrun_id_seq OWNED BY agentrun.id')
+
+    oldest = op.get_bind().execute(sa.text('SELECT MIN(created_at) FROM agentrun_legacy')).scalar()
+    today = datetime.utcnow().date()
+    month = _month_start((oldest.date() if oldest else today))
+    # Two months ahead; later months are created by the maintenance task
+    last = _next_month(_next_month(_month_start(today)))
+    while month <= last:
+        upper = _next_month(month)
+        op.execute(
+            f"CREATE TABLE agentrun_p{month:%Y%m} PARTITION OF agentrun "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+    op.execute('CREATE TABLE agentrun_default PARTITION OF agentrun DEFAULT')
+
+    op.execute(f'INSERT INTO agentrun ({AGENTRUN_COLUMNS}) SELECT {AGENTRUN_COLUMNS} FROM agentrun_legacy')
+    op.execute('DROP TABLE agentrun_legacy')
+    _create_indexes()
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE agentrun RENAME TO agentrun_partitioned')
+    op.execute('ALTER TABLE agentrun_partitioned RENAME CONSTRAINT agentrun_pkey TO agentrun_partitioned_pkey')
+    op.execute('ALTER SEQUENCE agentrun_id_seq OWNED BY NONE')
+    op.execute(
+        """
+        CREATE TABLE agentrun (
+            id INTEGER NOT NULL DEFAULT nextval('agentrun_id_seq') PRIMARY KEY,
+            agent_id INTEGER NOT NULL REFERENCES agent (id) ON DELETE CASCADE,
+            round_id INTEGER NOT NULL REFERENCES round (id) ON DELETE CASCADE,
+            signal VARCHAR(16),
+            pnl DOUBLE PRECISION NOT NULL DEFAULT 0,
+            details TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    op.execute('ALTER SEQUENCE agentrun_id_seq OWNED BY agentrun.id')
+    op.execute(f'INSERT INTO agentrun ({AGENTRUN_COLUMNS}) SELECT {AGENTRUN_COLUMNS} FROM agentrun_partitioned')
+    # Drops every attached partition with it
+    op.execute('DROP TABLE agentrun_partitioned')
+    op.drop_index('ix_agent_active_type', table_name='agent')
+    op.drop_index('ix_round_unfinished', table_name='round')
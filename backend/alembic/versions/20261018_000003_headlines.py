@@ -0,0 +1,41 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261018_000003'
+down_revision = '20261018_000002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'headline',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False, unique=True),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('url', sa.Text(), nullable=True),
+        sa.Column('source', sa.String(length=255), nullable=True),
+        sa.Column('published_at', sa.String(length=64), nullable=True),
+        sa.Column('first_seen_at', sa.DateTime(), nullable=True),
+        sa.Column('first_round_id', sa.Integer(), sa.ForeignKey(
+            'round.id', ondelete='SET NULL'), nullable=True),
+    )
+    op.create_index('ix_headline_first_seen_at', 'headline', ['first_seen_at'])
+
+    op.create_table(
+        'roundheadline',
+        sa.Column('round_id', sa.Integer(), sa.ForeignKey(
+            'round.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('headline_id', sa.Integer(), sa.ForeignKey(
+            'headline.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('is_new', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('duplicates', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('roundheadline')
+    op.drop_index('ix_headline_first_seen_at', table_name='headline')
+    op.drop_table('headline')
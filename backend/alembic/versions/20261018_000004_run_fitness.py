@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261018_000004'
+down_revision = '20261018_000003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Propagates to every agentrun partition
+    op.add_column('agentrun', sa.Column('fitness', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('agentrun', 'fitness')
@@ -0,0 +1,18 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '20261018_000005'
+down_revision = '20261018_000004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('round', sa.Column('fence', sa.BigInteger(), nullable=True))
+    op.create_index('ix_round_fence', 'round', ['fence'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_round_fence', table_name='round')
+    op.drop_column('round', 'fence')
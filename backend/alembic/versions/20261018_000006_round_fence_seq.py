@@ -0,0 +1,17 @@
+from alembic import op
+
+
+revision = '20261018_000006'
+down_revision = '20261018_000005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE round_fence_seq")
+    # Continue past every fence already stamped, or the next holder would be rejected
+    op.execute("SELECT setval('round_fence_seq', COALESCE(MAX(fence), 0) + 1, false) FROM round")
+
+
+def downgrade() -> None:
+    op.execute("DROP SEQUENCE round_fence_seq")
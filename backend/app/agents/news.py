@@ -1,46 +1,88 @@
 from __future__ import annotations
 
+import logging
 from typing import Any
 
+from app.core.config import get_settings
+from app.services.json_stream import parse_fields
 from app.services.news import NewsService
 from app.services.llm import LLMService
 from app.services.prompt_loader import load_prompts
 from .base import AgentBase, Signal
 
 
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
 DEFAULT_NEWS_PROMPT = load_prompts().news.base_prompt
 
+RESPONSE_FORMAT = "Return JSON with fields sentiment in {positive,negative,neutral} and action in {buy,sell,hold}."
+ANSWER_FIELDS = ("sentiment", "action")
+SENTIMENTS = {"positive", "negative", "neutral"}
+ACTIONS = {"buy", "sell", "hold"}
+
+
+def format_headlines(headlines: list[dict[str, Any]]) -> str:
+    # Ingested headlines carry is_new: stories not seen in an earlier round
+    return "\n".join(
+        f"- {'[new] ' if h.get('is_new') else ''}{h['title']}" for h in headlines if h.get("title"))
+
+
+def stale_marker(headlines: list[dict[str, Any]]) -> dict[str, Any]:
+    # Headlines carry stale_as_of when the feed was down and an earlier round's were reused
+    as_of = next((h["stale_as_of"] for h in headlines if h.get("stale_as_of")), None)
+    return {"stale": {"headlines_as_of": as_of}} if as_of else {}
+
+
+def parse_analysis(analysis: str) -> tuple[Signal, dict[str, Any]]:
+    fields = parse_fields(analysis, ANSWER_FIELDS)
+    sentiment, action = str(fields.get("sentiment", "")).lower(), str(fields.get("action", "")).lower()
+    if sentiment in SENTIMENTS and action in ACTIONS:
+        return action, {"sentiment": sentiment, "raw": analysis[:2000]}  # type: ignore[return-value]
+    # Not the requested JSON: fall back to keyword search
+    sentiment = "neutral"
+    action: Signal = "hold"
+    lower = analysis.lower()
+    if "buy" in lower:
+        action = "buy"
+    if "sell" in lower:
+        action = "sell"
+    if "positive" in lower:
+        sentiment = "positive"
+    elif "negative" in lower:
+        sentiment = "negative"
+    return action, {"sentiment": sentiment, "raw": analysis[:2000]}
+
 
 class NewsAgent(AgentBase):
-    def __init__(self, name: str, prompt: str = DEFAULT_NEWS_PROMPT):
+    def __init__(self, name: str, prompt: str = DEFAULT_NEWS_PROMPT, headlines: list[dict[str, Any]] | None = None):
         super().__init__(name=name, prompt=prompt)
         self.news = NewsService()
         self.llm = LLMService()
+        # The round's ingested headlines; fetched per run when not given
+        self.headlines = headlines
 
-    async def run(self) -> tuple[Signal, dict[str, Any]]:
-        headlines = await self.news.fetch_headlines(limit=20)
-        text = "\n".join(
-            f"- {h['title']}" for h in headlines if h.get("title"))
-        instruction = (
-            self.prompt
-            + "\nReturn JSON with fields sentiment in {positive,negative,neutral} and action in {buy,sell,hold}.\n"
-            + text
-        )
+    def build_instruction(self, headlines: list[dict[str, Any]]) -> str:
+        return self.prompt + "\n" + RESPONSE_FORMAT + "\n" + format_headlines(headlines)
+
+    async def analyze(self, headlines: list[dict[str, Any]]) -> tuple[Signal, dict[str, Any]]:
         # Use LLM to interpret sentiment according to prompt
         try:
-            analysis = await self.llm.chat("System: news sentiment", instruction)
-        except Exception:
-            analysis = "{\"sentiment\":\"neutral\",\"action\":\"hold\"}"
-        # naive parse
-        sentiment = "neutral"
-        action: Signal = "hold"
-        lower = analysis.lower()
-        if "buy" in lower:
-            action = "buy"
-        if "sell" in lower:
-            action = "sell"
-        if "positive" in lower:
-            sentiment = "positive"
-        elif "negative" in lower:
-            sentiment = "negative"
-        return action, {"sentiment": sentiment, "raw": analysis[:2000]}
+            # Streamed: the request stops as soon as sentiment and action are complete
+            analysis = await self.llm.chat(
+                "System: news sentiment", self.build_instruction(headlines),
+                max_tokens=settings.llm_max_tokens_news, json_fields=ANSWER_FIELDS,
+            )
+        except Exception as exc:
+            # Every routed backend failed: hold, but say why instead of passing as a real answer
+            logger.warning("news analysis failed for %s", self.name, exc_info=True)
+            return "hold", {"sentiment": "neutral", "error": f"{type(exc).__name__}: {exc}"[:500],
+                            **stale_marker(headlines)}
+        signal, details = parse_analysis(analysis)
+        return signal, {**details, **stale_marker(headlines)}
+
+    async def run(self) -> tuple[Signal, dict[str, Any]]:
+        headlines = self.headlines
+        if headlines is None:
+            headlines = await self.news.fetch_headlines(limit=20)
+        return await self.analyze(headlines)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import functools
+import re
+from dataclasses import replace
+
+from app.services.prompt_loader import TechnicalPromptConfig, load_prompts
+from .rules import TechnicalRules
+
+
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_NUM = r"(\d+(?:\.\d+)?)"
+
+_RSI_LENGTH_RES = (
+    re.compile(r"\bRSI\s*\(\s*(\d+)\s*\)", re.I),
+    re.compile(r"\bRSI\s*(?:length|period)\s*[:=]?\s*(\d+)", re.I),
+    re.compile(r"\b(\d+)[- ]period RSI\b", re.I),
+)
+_MACD_RE = re.compile(r"\bMACD\s*\(?\s*(\d+)\s*[,/ ]\s*(\d+)\s*[,/ ]\s*(\d+)", re.I)
+_SMA_PAIR_RE = re.compile(r"\bSMA\s*\(\s*(\d+)\s*,\s*(\d+)\s*\)", re.I)
+_SMA_RE = re.compile(r"\bSMA\s*\(?\s*(\d+)", re.I)
+_RSI_BELOW_RE = re.compile(rf"\bRSI\s*(?:<=?|below|under)\s*{_NUM}", re.I)
+_RSI_ABOVE_RE = re.compile(rf"\bRSI\s*(?:>=?|above|over)\s*{_NUM}", re.I)
+
+
+def render_prompt(template: str, cfg: TechnicalPromptConfig) -> str:
+    """Fill ``{{name}}`` placeholders from the prompt config; unknown names are left as-is."""
+    values = cfg.model_dump()
+
+    def sub(match: re.Match) -> str:
+        value = values.get(match[1])
+        if value is None or match[1] == "base_prompt":
+            return match[0]
+        return ", ".join(map(str, value)) if isinstance(value, (list, tuple)) else str(value)
+
+    return _PLACEHOLDER_RE.sub(sub, template)
+
+
+def _first(patterns, text: str) -> re.Match | None:
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match
+    return None
+
+
+def _valid(rules: TechnicalRules) -> bool:
+    fast, slow, signal = rules.macd
+    return (
+        2 <= rules.rsi_length <= 500
+        and 1 <= fast < slow <= 1000 and 1 <= signal <= 500
+        and 1 <= rules.sma_fast < rules.sma_slow <= 2000
+        and 0 < rules.rsi_buy < rules.rsi_sell < 100
+    )
+
+
+def _try(rules: TechnicalRules, **changes) -> TechnicalRules:
+    candidate = replace(rules, **changes)
+    return candidate if _valid(candidate) else rules
+
+
+def compile_rules(prompt: str, defaults: TechnicalRules, cfg: TechnicalPromptConfig) -> TechnicalRules:
+    """Extract indicator parameters and RSI thresholds from a technical prompt.
+
+    Each parameter group the prompt does not mention, or states inconsistently,
+    keeps its default, so free-form (mutated) prompts always yield runnable rules.
+    """
+    text = render_prompt(prompt, cfg)
+    rules = defaults
+
+    match = _first(_RSI_LENGTH_RES, text)
+    if match:
+        rules = _try(rules, rsi_length=int(match[1]))
+
+    match = _MACD_RE.search(text)
+    if match:
+        rules = _try(rules, macd=(int(match[1]), int(match[2]), int(match[3])))
+
+    match = _SMA_PAIR_RE.search(text)
+    if match:
+        rules = _try(rules, sma_fast=int(match[1]), sma_slow=int(match[2]))
+    else:
+        lengths = sorted({int(m) for m in _SMA_RE.findall(text)})
+        if len(lengths) >= 2:
+            rules = _try(rules, sma_fast=lengths[0], sma_slow=lengths[-1])
+        elif len(lengths) == 1:
+            # A single SMA in trend rules ("price above SMA100") is the slow trend filter
+            rules = _try(rules, sma_slow=lengths[0], sma_fast=min(rules.sma_fast, max(lengths[0] // 2, 1)))
+
+    thresholds: dict[str, float] = {}
+    below = _RSI_BELOW_RE.search(text)
+    if below:
+        thresholds["rsi_buy"] = float(below[1])
+    above = _RSI_ABOVE_RE.search(text)
+    if above:
+        thresholds["rsi_sell"] = float(above[1])
+    if thresholds:
+        rules = _try(rules, **thresholds)
+    return rules
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_technical_prompt(prompt: str) -> TechnicalRules:
+    """Compiled rules for ``prompt`` against the configured defaults, cached per prompt."""
+    cfg = load_prompts().technical
+    return compile_rules(prompt, TechnicalRules.from_config(cfg), cfg)
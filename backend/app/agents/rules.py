@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services.indicators import IndicatorSpec
+from app.services.prompt_loader import TechnicalPromptConfig
+
+
+@dataclass(frozen=True)
+class TechnicalRules:
+    rsi_length: int = 14
+    macd: tuple[int, int, int] = (12, 26, 9)
+    sma_fast: int = 50
+    sma_slow: int = 200
+    rsi_buy: float = 30.0
+    rsi_sell: float = 70.0
+
+    @classmethod
+    def from_config(cls, cfg: TechnicalPromptConfig) -> "TechnicalRules":
+        return cls(
+            rsi_length=cfg.rsi_length,
+            macd=tuple(cfg.macd),
+            sma_fast=cfg.sma_fast,
+            sma_slow=cfg.sma_slow,
+        )
+
+    @property
+    def rsi_spec(self) -> IndicatorSpec:
+        return IndicatorSpec.rsi(self.rsi_length)
+
+    @property
+    def macd_spec(self) -> IndicatorSpec:
+        return IndicatorSpec.macd(*self.macd)
+
+    @property
+    def sma_fast_spec(self) -> IndicatorSpec:
+        return IndicatorSpec.sma(self.sma_fast)
+
+    @property
+    def sma_slow_spec(self) -> IndicatorSpec:
+        return IndicatorSpec.sma(self.sma_slow)
+
+    def indicator_specs(self) -> tuple[IndicatorSpec, ...]:
+        return (self.rsi_spec, self.macd_spec, self.sma_fast_spec, self.sma_slow_spec)
+
+    def conditions(self, close: np.ndarray, values: dict[IndicatorSpec, np.ndarray]) -> dict[str, np.ndarray]:
+        """Per-bar rule conditions over whole series; warmup (NaN) bars are all False."""
+        rsi = values[self.rsi_spec]
+        macd, macd_signal = values[self.macd_spec]
+        sma_slow = values[self.sma_slow_spec]
+        with np.errstate(invalid="ignore"):
+            trend_buy = (close > sma_slow) & (rsi < self.rsi_buy)
+            trend_sell = (close < sma_slow) & (rsi > self.rsi_sell)
+            above = macd > macd_signal
+            below = macd < macd_signal
+        cross_up = np.zeros_like(above)
+        cross_up[1:] = below[:-1] & above[1:]
+        cross_down = np.zeros_like(below)
+        cross_down[1:] = above[:-1] & below[1:]
+        return {"trend_buy": trend_buy, "trend_sell": trend_sell,
+                "cross_up": cross_up, "cross_down": cross_down}
+
+    @staticmethod
+    def signals(conditions: dict[str, np.ndarray]) -> np.ndarray:
+        """Signal per bar: 1 buy, -1 sell, 0 hold. A MACD cross never overrides the opposite trend signal."""
+        signals = np.zeros(conditions["trend_buy"].shape, dtype=np.int8)
+        signals[conditions["trend_buy"]] = 1
+        signals[conditions["trend_sell"]] = -1
+        signals[conditions["cross_up"] & (signals != -1)] = 1
+        signals[conditions["cross_down"] & (signals != 1)] = -1
+        return signals
@@ -1,96 +1,88 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any
 
-import numpy as np
-import pandas as pd
-
-try:
-    import pandas_ta as ta  # type: ignore
-except Exception:  # pragma: no cover - optional in dev
-    ta = None
-
 from app.core.config import get_settings
 from app.services.prompt_loader import load_prompts
 from app.services.bybit import BybitService
+from app.services.indicator_state import IndicatorState
+from app.services.indicators import indicator_engine
+from app.services.market_data import MarketDataSnapshot
 from .base import AgentBase, Signal
+from .prompt_compiler import compile_technical_prompt, render_prompt
+from .rules import TechnicalRules
 
 
 settings = get_settings()
 
 
-DEFAULT_TECH_PROMPT = load_prompts().technical.base_prompt
+# Rendered so stored prompts (and the mutations derived from them) carry concrete values
+DEFAULT_TECH_PROMPT = render_prompt(load_prompts().technical.base_prompt, load_prompts().technical)
+DEFAULT_TECH_RULES = compile_technical_prompt(DEFAULT_TECH_PROMPT)
+SIGNALS: dict[int, Signal] = {1: "buy", -1: "sell", 0: "hold"}
 
 
 class TechnicalAgent(AgentBase):
-    def __init__(self, name: str, prompt: str = DEFAULT_TECH_PROMPT):
+    def __init__(
+        self,
+        name: str,
+        prompt: str = DEFAULT_TECH_PROMPT,
+        market: MarketDataSnapshot | None = None,
+        rules: TechnicalRules | None = None,
+        live: IndicatorState | None = None,
+    ):
         super().__init__(name=name, prompt=prompt)
-        self.bybit = BybitService()
+        # Agents of one round share the round's snapshot; standalone agents get their own
+        self.market = market or MarketDataSnapshot(BybitService())
+        # The prompt is the agent's genome: its parameters drive indicators and thresholds
+        self.rules = rules or compile_technical_prompt(prompt)
+        # State kept by the kline stream; rounds hand it over in precompute_indicators
+        self.live = live
 
     async def run(self) -> tuple[Signal, dict[str, Any]]:
-        candles = await self.bybit.get_klines(
+        candles = await self.market.get_candles(
             settings.bybit_symbol, settings.bybit_interval, settings.bybit_lookback_candles
         )
-        df = pd.DataFrame(candles)
-        df["close"] = df["close"].astype(float)
-
-        if ta is not None:
-            df["rsi"] = ta.rsi(df["close"], length=14)
-            macd = ta.macd(df["close"], fast=12, slow=26, signal=9)
-            df["macd"] = macd["MACD_12_26_9"]
-            df["macd_signal"] = macd["MACDs_12_26_9"]
-            df["sma50"] = ta.sma(df["close"], length=50)
-            df["sma200"] = ta.sma(df["close"], length=200)
+        rules = self.rules
+        bars = self.live.bars(rules.indicator_specs(), candles) if self.live is not None else None
+        if bars is not None:
+            # The streamed state gives the last two bars in O(1), all the rules read
+            close, values = bars
         else:
-            # Fallback crude indicators
-            df["rsi"] = self._rsi(df["close"].values, 14)
-            df["sma50"] = df["close"].rolling(50).mean()
-            df["sma200"] = df["close"].rolling(200).mean()
-            df["macd"] = df["close"].ewm(
-                span=12).mean() - df["close"].ewm(span=26).mean()
-            df["macd_signal"] = df["macd"].ewm(span=9).mean()
-
-        latest = df.iloc[-1]
-        prev = df.iloc[-2]
-
-        signal: Signal = "hold"
+            # Cached per candle snapshot: agents sharing a spec reuse the same arrays
+            close, values = candles.close, indicator_engine.compute(candles, rules.indicator_specs())
+        rsi = values[rules.rsi_spec]
+        macd, macd_signal = values[rules.macd_spec]
+        sma_fast = values[rules.sma_fast_spec]
+        sma_slow = values[rules.sma_slow_spec]
+
+        # Same vectorized rules the backtest replays, read at the last bar
+        conditions = rules.conditions(close, values)
+        signal: Signal = SIGNALS[int(rules.signals(conditions)[-1])]
         reasoning: list[str] = []
-
-        sma200 = float(latest.get("sma200", np.nan))
-        rsi_val = float(latest.get("rsi", np.nan))
-        close_val = float(latest.get("close", np.nan))
-        if not np.isnan(sma200) and not np.isnan(rsi_val) and close_val > sma200 and rsi_val < 30:
-            signal = "buy"
-            reasoning.append("Above SMA200 and RSI<30")
-        if not np.isnan(sma200) and not np.isnan(rsi_val) and close_val < sma200 and rsi_val > 70:
-            signal = "sell"
-            reasoning.append("Below SMA200 and RSI>70")
-
-        macd_cross_up = prev["macd"] < prev["macd_signal"] and latest["macd"] > latest["macd_signal"]
-        macd_cross_down = prev["macd"] > prev["macd_signal"] and latest["macd"] < latest["macd_signal"]
-        if macd_cross_up and signal != "sell":
-            signal = "buy"
+        if conditions["trend_buy"][-1]:
+            reasoning.append(f"Above SMA{rules.sma_slow} and RSI<{rules.rsi_buy:g}")
+        if conditions["trend_sell"][-1]:
+            reasoning.append(f"Below SMA{rules.sma_slow} and RSI>{rules.rsi_sell:g}")
+        if conditions["cross_up"][-1] and not conditions["trend_sell"][-1]:
             reasoning.append("MACD cross up")
-        if macd_cross_down and signal != "buy":
-            signal = "sell"
+        if conditions["cross_down"][-1] and not conditions["trend_buy"][-1]:
             reasoning.append("MACD cross down")
 
-        return signal, {
+        sma200 = float(sma_slow[-1])
+        rsi_val = float(rsi[-1])
+        close_val = float(close[-1])
+        details: dict[str, Any] = {
             "close": close_val,
             "rsi": rsi_val,
-            "sma50": float(latest.get("sma50", np.nan)),
+            "sma50": float(sma_fast[-1]),
             "sma200": sma200,
-            "macd": float(latest.get("macd", np.nan)),
-            "macd_signal": float(latest.get("macd_signal", np.nan)),
+            "macd": float(macd[-1]),
+            "macd_signal": float(macd_signal[-1]),
             "reasoning": "; ".join(reasoning),
         }
-
-    @staticmethod
-    def _rsi(prices: np.ndarray, period: int) -> pd.Series:
-        delta = np.diff(prices, prepend=prices[0])
-        gain = np.where(delta > 0, delta, 0.0)
-        loss = np.where(delta < 0, -delta, 0.0)
-        roll_up = pd.Series(gain).ewm(span=period).mean()
-        roll_down = pd.Series(loss).ewm(span=period).mean()
-        rs = roll_up / (roll_down + 1e-9)
-        return 100.0 - (100.0 / (1.0 + rs))
+        if candles.stale_as_of is not None:
+            # Bybit was unavailable: the signal comes from the last good snapshot
+            details["stale"] = {"klines_as_of": datetime.utcfromtimestamp(candles.stale_as_of).isoformat()}
+        return signal, details
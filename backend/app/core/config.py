@@ -25,12 +25,24 @@ class Settings(BaseSettings):
     celery_broker_url: str = Field(default="redis://redis:6379/1")
     celery_result_backend: str = Field(default="redis://redis:6379/2")
 
+    # Upstream HTTP clients (shared per process)
+    http_max_connections: int = Field(default=100)
+    http_max_keepalive_connections: int = Field(default=20)
+    http_keepalive_expiry: float = Field(default=30.0)
+    http2_enabled: bool = Field(default=False)
+
     # Bybit
     bybit_base_url: AnyUrl = Field(default="https://api-testnet.bybit.com")
     bybit_symbol: str = Field(default="BTCUSDT")
     # minutes: 1,3,5,15,30,60,120,240,360,720,D,W,M
     bybit_interval: str = Field(default="15")
     bybit_lookback_candles: int = Field(default=200)
+    bybit_ws_url: str = Field(default="wss://stream-testnet.bybit.com/v5/public/linear")
+    # Local kline history in Redis; rounds only fetch candles newer than the last stored one
+    kline_store_enabled: bool = Field(default=True)
+    kline_store_max_candles: int = Field(default=5000)
+    # Specs the kline stream keeps incremental indicator state for after a round last used them
+    indicator_spec_ttl_seconds: float = Field(default=24 * 3600)
 
     # LLM
     llm_provider: Literal["openai", "ollama"] = Field(default="openai")
@@ -39,12 +51,111 @@ class Settings(BaseSettings):
     openai_model: str = Field(default="gpt-4o-mini")
     ollama_base_url: str = Field(default="http://host.docker.internal:11434")
     ollama_model: str = Field(default="mistral")
+    # Routed backends, a JSON list of {"kind", "base_url", "model", ["name", "api_key",
+    # "max_concurrency", "rate_per_second"]}; empty = the single llm_provider backend
+    llm_backends: str = Field(default="")
+    llm_hedging_enabled: bool = Field(default=True)
+    llm_hedge_default_seconds: float = Field(default=10.0)  # hedge delay until enough latency samples
+    llm_hedge_min_samples: int = Field(default=20)
+    llm_latency_window: int = Field(default=200)
+    llm_max_attempts: int = Field(default=3)
+    llm_failure_threshold: int = Field(default=3)  # consecutive failures before a cool-down
+    llm_cooldown_seconds: float = Field(default=15.0)
+    llm_cooldown_max_seconds: float = Field(default=300.0)
+    # Completion cache keyed by (provider, model, temperature, prompts)
+    llm_cache_enabled: bool = Field(default=True)
+    llm_cache_ttl_seconds: int = Field(default=6 * 3600)
+    llm_cache_max_entries: int = Field(default=1024)
+    llm_cache_redis_enabled: bool = Field(default=True)
+    # Stream classification answers and stop once their JSON fields are in; output caps per call type
+    llm_streaming_enabled: bool = Field(default=True)
+    llm_max_tokens_news: int = Field(default=64)
+    llm_max_tokens_news_batch_per_prompt: int = Field(default=40)
+    llm_max_tokens_mutation: int = Field(default=600)
 
     # Agents / Orchestration
     initial_agents_per_type: int = Field(default=4)
     elite_per_type: int = Field(default=2)
     mutated_per_type: int = Field(default=2)
     use_paper_trading: bool = Field(default=True)
+    # Prompt mutation pool used by evolution
+    mutation_concurrency: int = Field(default=4)
+    mutation_timeout_seconds: float = Field(default=60.0)
+    mutation_retries: int = Field(default=2)
+    mutation_backoff_seconds: float = Field(default=1.0)
+    # Score all news agents' prompts in shared LLM requests (prompt tokens per request)
+    news_batch_enabled: bool = Field(default=True)
+    news_batch_token_budget: int = Field(default=3000)
+    # Headline ingestion: one feed fetch per round, near-duplicates collapsed by MinHash
+    news_fetch_limit: int = Field(default=50)
+    news_prompt_headlines: int = Field(default=20)
+    news_dedup_threshold: float = Field(default=0.6)  # estimated Jaccard over title shingles
+    news_minhash_permutations: int = Field(default=64)
+    news_dedup_lookback_hours: int = Field(default=48)
+    news_dedup_lookback_max: int = Field(default=500)
+
+    # Round execution: agent concurrency and deadlines (seconds)
+    agent_concurrency: int = Field(default=16)
+    agent_timeout_seconds: float = Field(default=90.0)
+    round_timeout_seconds: float = Field(default=600.0)
+    # Finished runs are bulk-inserted and committed in chunks of this size
+    run_checkpoint_size: int = Field(default=200)
+    # Only one round at a time: Redis lease and what to do when a round is already running
+    round_lease_ttl_seconds: float = Field(default=60.0)
+    round_overlap_policy: Literal["skip", "queue", "coalesce"] = Field(default="skip")
+    round_queue_timeout_seconds: float = Field(default=300.0)
+    round_queue_poll_seconds: float = Field(default=2.0)
+    # Round jobs: status/event retention and SSE keep-alive interval
+    job_ttl_seconds: int = Field(default=24 * 3600)
+    job_events_max: int = Field(default=10000)
+    job_sse_keepalive_seconds: float = Field(default=15.0)
+    # Fan scheduled rounds out as Celery shard tasks joined by a chord
+    distributed_rounds: bool = Field(default=False)
+    round_shard_size: int = Field(default=50)
+    round_shard_retries: int = Field(default=3)
+    # A delivery that finds its shard running elsewhere re-checks after this long
+    round_shard_busy_retry_seconds: int = Field(default=15)
+
+    # Per-upstream limits: max in-flight requests and requests started per second (0 = unlimited)
+    bybit_max_concurrency: int = Field(default=5)
+    bybit_rate_per_second: float = Field(default=10.0)
+    news_max_concurrency: int = Field(default=2)
+    news_rate_per_second: float = Field(default=1.0)
+    llm_max_concurrency: int = Field(default=4)
+    llm_rate_per_second: float = Field(default=2.0)
+    # Per-endpoint circuit breakers; past the deadline rounds use the last good snapshot
+    circuit_failure_threshold: int = Field(default=3)
+    circuit_reset_seconds: float = Field(default=30.0)
+    upstream_fresh_deadline_seconds: float = Field(default=5.0)
+    # How long a worker task waits, once done, for fetches that outlived that deadline
+    upstream_refresh_drain_seconds: float = Field(default=30.0)
+
+    # Backtest fitness for technical agents (bybit fees/slippage in basis points)
+    backtest_enabled: bool = Field(default=True)
+    backtest_candles: int = Field(default=3000)
+    backtest_fee_bps: float = Field(default=5.5)
+    backtest_slippage_bps: float = Field(default=2.0)
+    backtest_allow_short: bool = Field(default=True)
+    # Process pool for population evaluation (0 = one worker per CPU)
+    eval_workers: int = Field(default=0)
+    eval_min_shard_size: int = Field(default=8)
+    # Celery queue of the evaluation worker (a --pool=threads worker owning the node's process
+    # pool); empty evaluates in the round's own process
+    eval_queue: str = Field(default="")
+    eval_remote_timeout_seconds: float = Field(default=300.0)
+
+    # agent_run partitions: months created ahead, retention before archival
+    run_partition_months_ahead: int = Field(default=2)
+    run_retention_days: int = Field(default=365)
+    run_archive_drop: bool = Field(default=False)
+
+    # Listing endpoints: keyset page sizes and NDJSON export batch size
+    page_size_default: int = Field(default=100)
+    page_size_max: int = Field(default=1000)
+    export_batch_size: int = Field(default=1000)
+    # Dashboard reads cached in Redis until the next round or agent change
+    dashboard_cache_enabled: bool = Field(default=True)
+    dashboard_cache_ttl_seconds: int = Field(default=15 * 60)
 
     # Scheduler
     schedule_cron: str = Field(default="*/15 * * * *")  # every 15 minutes
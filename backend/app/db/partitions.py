@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+PARENT = "agentrun"
+DEFAULT = f"{PARENT}_default"
+ARCHIVE_SCHEMA = "archive"
+_PARTITION_RE = re.compile(rf"^{PARENT}_p(\d{{4}})(\d{{2}})$")
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+async def list_partitions(conn: AsyncConnection) -> dict[date, str]:
+    rows = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass)"
+    ), {"parent": PARENT})
+    partitions: dict[date, str] = {}
+    for (name,) in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int | None = None) -> list[str]:
+    """Create monthly partitions from the current month up to ``months_ahead`` months out."""
+    months_ahead = settings.run_partition_months_ahead if months_ahead is None else months_ahead
+    existing = await list_partitions(conn)
+    created: list[str] = []
+    month = _month_start(datetime.utcnow().date())
+    for _ in range(months_ahead + 1):
+        if month not in existing:
+            name = f"{PARENT}_p{month:%Y%m}"
+            try:
+                # Savepoint: a month that cannot be attached must not abort the others
+                async with conn.begin_nested():
+                    await _create_partition(conn, name, month)
+                created.append(name)
+            except DBAPIError:
+                logger.warning("could not create partition %s; skipped until the next run", name, exc_info=True)
+        month = _next_month(month)
+    return created
+
+
+async def _create_partition(conn: AsyncConnection, name: str, month: date) -> None:
+    bounds = f"FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+    where = f"created_at >= '{month.isoformat()}' AND created_at < '{_next_month(month).isoformat()}'"
+    # Attaching checks that the default partition holds no rows for the month; lock it so
+    # rows cannot land there between moving them out and attaching.
+    await conn.execute(text(f"LOCK TABLE {DEFAULT} IN SHARE ROW EXCLUSIVE MODE"))
+    stray = (await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT} WHERE {where})"))).scalar()
+    if not stray:
+        await conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES {bounds}"))
+        return
+    # Rows for this month were written before its partition existed: move them into
+    # the new table first, then attach it
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT} WHERE {where} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    await conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    logger.info("moved %s rows from %s into %s", moved.rowcount, DEFAULT, name)
+
+
+async def archive_partitions(conn: AsyncConnection, retention_days: int | None = None) -> list[str]:
+    """Detach partitions entirely older than the retention window.
+
+    Detached partitions are moved to the ``archive`` schema (kept for export) or dropped
+    when ``run_archive_drop`` is set. Aggregates in agentstats/generationstats keep their totals.
+    """
+    retention_days = settings.run_retention_days if retention_days is None else retention_days
+    cutoff = datetime.utcnow().date() - timedelta(days=retention_days)
+    archived: list[str] = []
+    for month, name in sorted((await list_partitions(conn)).items()):
+        if _next_month(month) > cutoff:
+            continue
+        await conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        if settings.run_archive_drop:
+            await conn.execute(text(f"DROP TABLE {name}"))
+        else:
+            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        archived.append(name)
+    return archived
+
+
+async def maintain_partitions(conn: AsyncConnection) -> None:
+    created = await ensure_partitions(conn)
+    archived = await archive_partitions(conn)
+    if created or archived:
+        logger.info("agentrun partitions created=%s archived=%s", created, archived)
@@ -1,14 +1,21 @@
 import logging
 import sys
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import get_settings
+from app.db.session import engine
+from app.services.evaluation import shutdown_pool
+from app.services.http_clients import clients
+from app.services.round_lease import LeaseLost, RoundBusy
 from app.services.logging_setup import JsonFormatter
 from app.routes import agents as agents_routes
 from app.routes import orchestrator as orchestrator_routes
 from app.routes import public as public_routes
+from app.routes.pagination import NEXT_CURSOR_HEADER
 
 
 def configure_logging():
@@ -29,10 +36,19 @@ def configure_logging():
         )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Upstream clients are created lazily on the server loop and torn down here
+    yield
+    await clients.aclose()
+    await engine.dispose()
+    shutdown_pool()
+
+
 def create_app() -> FastAPI:
     configure_logging()
     settings = get_settings()
-    app = FastAPI(title=settings.app_name, version="0.1.0")
+    app = FastAPI(title=settings.app_name, version="0.1.0", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -40,8 +56,18 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
+    @app.exception_handler(RoundBusy)
+    async def round_busy(_: Request, exc: RoundBusy):
+        return JSONResponse(status_code=409, content={"detail": "Round already running", "lease": exc.lease})
+
+    @app.exception_handler(LeaseLost)
+    async def lease_lost(_: Request, exc: LeaseLost):
+        # A newer round took over; this request's population changes were rolled back
+        return JSONResponse(status_code=409, content={"detail": f"Round lease lost, changes rolled back: {exc}"})
+
     app.include_router(agents_routes.router,
                        prefix="/api/agents", tags=["agents"])
     app.include_router(orchestrator_routes.router,
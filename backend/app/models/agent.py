@@ -2,7 +2,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional, Literal
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, ForeignKey, Index, Integer, Sequence, String, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -27,8 +27,14 @@ class Agent(Base):
     runs: Mapped[list[AgentRun]] = relationship(
         "AgentRun", back_populates="agent")  # type: ignore[name-defined]
 
+    __table_args__ = (
+        Index("ix_agent_active_type", "agent_type", "id", postgresql_where=text("is_active")),
+    )
+
 
 class AgentRun(Base):
+    # Range-partitioned by month on created_at (see migration 20261018_000002),
+    # hence created_at is part of the primary key.
     id: Mapped[int] = mapped_column(
         Integer, primary_key=True, autoincrement=True)
     agent_id: Mapped[int] = mapped_column(
@@ -37,15 +43,23 @@ class AgentRun(Base):
         ForeignKey("round.id", ondelete="CASCADE"))
     signal: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
     pnl: Mapped[float] = mapped_column(Float, default=0.0)
+    # Backtested PnL % of a technical agent's rules; elites are ranked on it when set.
+    # Kept apart from pnl, the per-round score the stats aggregates sum up.
+    fitness: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     details: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow)
+        DateTime, default=datetime.utcnow, primary_key=True)
 
     agent: Mapped[Agent] = relationship(
         "Agent", back_populates="runs")  # type: ignore[name-defined]
     round: Mapped["Round"] = relationship(
         "Round", back_populates="runs")  # type: ignore[name-defined]
 
+    __table_args__ = (
+        Index("ix_agentrun_agent_id_id", "agent_id", "id"),
+        Index("ix_agentrun_round_id_id", "round_id", "id"),
+    )
+
 
 class Round(Base):
     id: Mapped[int] = mapped_column(
@@ -56,6 +70,18 @@ class Round(Base):
     finished_at: Mapped[Optional[datetime]
                         ] = mapped_column(DateTime, nullable=True)
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Fencing token of the round lease that last wrote this round (see RoundLease.fence)
+    fence: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
 
     runs: Mapped[list[AgentRun]] = relationship(
         "AgentRun", back_populates="round")  # type: ignore[name-defined]
+
+    __table_args__ = (
+        Index("ix_round_unfinished", "id", postgresql_where=text("finished_at IS NULL")),
+        Index("ix_round_fence", "fence"),
+    )
+
+
+# Source of round lease fencing tokens: kept next to the fences it is checked against,
+# so tokens keep growing even if Redis loses its data
+round_fence_seq = Sequence("round_fence_seq", metadata=Base.metadata)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Headline(Base):
+    # One row per distinct story, keyed by a hash of its normalized title
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    title: Mapped[str] = mapped_column(Text, nullable=False)
+    url: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    source: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    published_at: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    first_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    first_round_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("round.id", ondelete="SET NULL"), nullable=True)
+
+
+class RoundHeadline(Base):
+    # The de-duplicated headline set every news agent of a round reads
+    round_id: Mapped[int] = mapped_column(ForeignKey("round.id", ondelete="CASCADE"), primary_key=True)
+    headline_id: Mapped[int] = mapped_column(ForeignKey("headline.id", ondelete="CASCADE"), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    is_new: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    duplicates: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+# Running totals maintained in the same transaction as AgentRun inserts, so the
+# dashboard never has to aggregate the full run history.
+
+
+class AgentStats(Base):
+    agent_id: Mapped[int] = mapped_column(
+        ForeignKey("agent.id", ondelete="CASCADE"), primary_key=True)
+    total_pnl: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    runs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class GenerationStats(Base):
+    generation: Mapped[int] = mapped_column(Integer, primary_key=True)
+    total_pnl: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    runs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from redis.exceptions import RedisError
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import engine
+from app.models.agent import Agent, AgentRun, Round
+from app.orchestrator.evolution import active_agents, finish_round, run_agents, start_round
+from app.services.jobs import RoundJob
+from app.services.response_cache import invalidate
+from app.services.round_lease import RoundLease, take_pending
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ShardBusy(Exception):
+    """Another delivery of the shard holds its lock."""
+
+
+def shard_task_id(round_id: int, shard_no: int) -> str:
+    # Deterministic ids: a redelivered or retried shard is recognisably the same task
+    return f"round-{round_id}-shard-{shard_no}"
+
+
+def finish_task_id(round_id: int) -> str:
+    return f"round-{round_id}-finish"
+
+
+async def plan_round(db: AsyncSession, name: str, lease: RoundLease | None = None) -> tuple[int, list[list[int]]]:
+    """Create the round and split its active agents into shards of ``round_shard_size``."""
+    round_obj = await start_round(db, name, lease)
+    agent_ids = sorted(a.id for a in await active_agents(db))
+    size = max(settings.round_shard_size, 1)
+    return round_obj.id, [agent_ids[i:i + size] for i in range(0, len(agent_ids), size)]
+
+
+async def run_shard(
+    db: AsyncSession, round_id: int, shard_no: int, agent_ids: list[int],
+    lease: RoundLease | None = None, job: RoundJob | None = None,
+) -> int:
+    """Run one shard of a round; safe to retry or deliver twice.
+
+    A session-level advisory lock keyed by (round, shard) keeps two deliveries from running
+    concurrently (the loser raises :class:`ShardBusy`), and agents that already have a run
+    in this round are skipped, so a retry after a partial checkpoint only runs the remainder.
+    Returns the number of agents run.
+    """
+    async with engine.connect() as lock_conn:
+        locked = (await lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:round_id, :shard_no)"),
+            {"round_id": round_id, "shard_no": shard_no},
+        )).scalar()
+        if not locked:
+            raise ShardBusy(f"round {round_id} shard {shard_no} is running elsewhere")
+        try:
+            done = set((await db.execute(
+                select(AgentRun.agent_id).where(AgentRun.round_id == round_id, AgentRun.agent_id.in_(agent_ids))
+            )).scalars())
+            todo = [i for i in agent_ids if i not in done]
+            agents = list((await db.execute(select(Agent).where(Agent.id.in_(todo)))).scalars()) if todo else []
+            if agents:
+                if lease is not None:
+                    # Shards are the distributed round's heartbeat
+                    await lease.ensure_held()
+                await run_agents(db, round_id, agents, lease, job)
+            return len(agents)
+        finally:
+            await lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:round_id, :shard_no)"),
+                {"round_id": round_id, "shard_no": shard_no},
+            )
+
+
+async def finish_distributed_round(db: AsyncSession, round_id: int, lease: RoundLease | None = None) -> None:
+    round_obj = await db.get(Round, round_id, with_for_update=True)
+    if round_obj is None or round_obj.finished_at is not None:
+        # Already evolved by an earlier delivery of the chord callback
+        await db.rollback()
+        return
+    try:
+        await finish_round(db, round_obj, lease)
+    finally:
+        if lease is not None:
+            await _release(lease)
+    if await take_pending():
+        from app.services.scheduler import run_round_task
+        run_round_task.delay()
+
+
+async def fail_round(db: AsyncSession, round_id: int, lease: RoundLease | None = None) -> None:
+    """Close a round whose shards could not all finish; it is not evolved."""
+    round_obj = await db.get(Round, round_id)
+    if round_obj is not None and round_obj.finished_at is None:
+        round_obj.finished_at = datetime.utcnow()
+        round_obj.notes = "failed: shard error, not evolved"
+        await db.commit()
+        await invalidate("round failed")
+    if lease is not None:
+        await _release(lease)
+
+
+async def _release(lease: RoundLease) -> None:
+    try:
+        await lease.release()
+    except RedisError:
+        logger.warning("round lease release failed", exc_info=True)
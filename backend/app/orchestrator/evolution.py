@@ -1,21 +1,38 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import select, update
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.models.agent import Agent, AgentRun, Round
-from app.services.llm import LLMService
+from app.services.backtest import BacktestResult
+from app.services.evaluation import evaluate_population
+from app.services.headlines import round_headlines
+from app.services.http_clients import clients
+from app.services.indicator_state import IndicatorState, IndicatorStateStore
+from app.services.indicators import indicator_engine
+from app.services.jobs import RoundJob
+from app.services.market_data import MarketDataSnapshot
+from app.services.response_cache import invalidate
+from app.services.round_lease import LeaseLost, OverlapPolicy, RoundLease, run_exclusive, take_pending
+from app.agents.rules import TechnicalRules
 from app.agents.technical import TechnicalAgent, DEFAULT_TECH_PROMPT
 from app.agents.news import NewsAgent, DEFAULT_NEWS_PROMPT
+from app.orchestrator.executor import AgentExecutor
+from app.orchestrator.mutation import MutationPool, MutationRequest
+from app.orchestrator.news_batch import run_news_batch
+from app.orchestrator.results import AgentResult, insert_runs, score_signal
 
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -24,10 +41,12 @@ class RuntimeAgent:
     instance: Any
 
 
-def instantiate_agent(agent: Agent) -> Any:
+def instantiate_agent(
+    agent: Agent, market: MarketDataSnapshot | None = None, headlines: list[dict[str, Any]] | None = None,
+) -> Any:
     if agent.agent_type == "technical":
-        return TechnicalAgent(name=agent.name, prompt=agent.prompt)
-    return NewsAgent(name=agent.name, prompt=agent.prompt)
+        return TechnicalAgent(name=agent.name, prompt=agent.prompt, market=market)
+    return NewsAgent(name=agent.name, prompt=agent.prompt, headlines=headlines)
 
 
 async def ensure_initial_agents(db: AsyncSession) -> None:
@@ -44,77 +63,271 @@ async def ensure_initial_agents(db: AsyncSession) -> None:
     await db.commit()
 
 
-async def run_round(db: AsyncSession, name: str = "round") -> Round:
+async def precompute_indicators(market: MarketDataSnapshot, runtime_agents: list[RuntimeAgent]) -> None:
+    """Give technical agents the kline stream's indicator state, and batch-compute what it lacks.
+
+    The union of every technical agent's specs is registered for the stream to keep state
+    for from the next candle on; specs it does not cover yet are computed in one batch.
+    """
+    technical = [ra.instance for ra in runtime_agents if isinstance(ra.instance, TechnicalAgent)]
+    specs = {spec for agent in technical for spec in agent.rules.indicator_specs()}
+    if not specs:
+        return
+    states = IndicatorStateStore(clients.redis())
+    live: IndicatorState | None = None
+    try:
+        await states.track(specs)
+        live = await states.load()
+    except RedisError:
+        logger.warning("streamed indicator state unavailable, computing indicators in batch", exc_info=True)
+    try:
+        candles = await market.get_candles(
+            settings.bybit_symbol, settings.bybit_interval, settings.bybit_lookback_candles)
+    except Exception:
+        # Agents retry the fetch themselves and surface the error individually
+        logger.warning("market snapshot prefetch failed", exc_info=True)
+        return
+    for agent in technical:
+        agent.live = live
+    missing = specs
+    if live is not None and live.bars(specs & live.states.keys(), candles) is not None:
+        missing = specs - live.states.keys()
+    if missing:
+        indicator_engine.compute(candles, missing)
+
+
+async def backtest_agents(market: MarketDataSnapshot, runtime_agents: list[RuntimeAgent]) -> dict[int, BacktestResult]:
+    """Fitness of every technical agent's rules replayed over the stored kline history."""
+    technical = [ra for ra in runtime_agents if isinstance(ra.instance, TechnicalAgent)]
+    if not settings.backtest_enabled or not technical:
+        return {}
+    try:
+        candles = await market.get_candles(settings.bybit_symbol, settings.bybit_interval, settings.backtest_candles)
+    except Exception:
+        # Without history the round falls back to ranking on the live signal
+        logger.warning("backtest history fetch failed", exc_info=True)
+        return {}
+    if len(candles) < settings.backtest_candles:
+        logger.warning("backtesting on %d of %d candles: history is shorter", len(candles), settings.backtest_candles)
+    # CPU-bound: sharded across the evaluation process pool, off the event loop
+    results = await evaluate_population(candles, [ra.instance.rules for ra in technical])
+    return {ra.model.id: result for ra, result in zip(technical, results)}
+
+
+async def start_round(db: AsyncSession, name: str = "round", lease: RoundLease | None = None) -> Round:
     await ensure_initial_agents(db)
 
     round_obj = Round(name=name)
     db.add(round_obj)
     await db.flush()
+    if lease is not None:
+        # From here on writes by holders of older leases fail their fence
+        await lease.fence(db, round_obj.id)
     # Persist the new round early so that other API calls can see a "running" round
     await db.commit()
+    await invalidate("round started")
+    return round_obj
+
+
+async def active_agents(db: AsyncSession) -> list[Agent]:
+    return list((await db.execute(select(Agent).where(Agent.is_active == True))).scalars().all())  # noqa: E712
+
+
+async def run_round(
+    db: AsyncSession, name: str = "round", lease: RoundLease | None = None, job: RoundJob | None = None,
+) -> Round:
+    round_obj = await start_round(db, name, lease)
+    agents = await active_agents(db)
+    if lease is not None:
+        await lease.update(round_id=round_obj.id, total=len(agents))
+    if job is not None:
+        await job.started(round_obj.id, len(agents))
+    await run_agents(db, round_obj.id, agents, lease, job)
+    await finish_round(db, round_obj, lease)
+    return round_obj
+
+
+async def run_round_exclusive(
+    db: AsyncSession, name: str, policy: OverlapPolicy | None = None, job: RoundJob | None = None,
+) -> Round | None:
+    """``run_round`` under the round lease; None if coalesced into the running round.
+
+    Raises :class:`RoundBusy` when the overlap policy rejects the round.
+    """
+    round_obj = await run_exclusive(name, lambda lease: run_round(db, name, lease, job), policy)
+    if round_obj is not None and await take_pending():
+        from app.services.scheduler import run_round_task
+        run_round_task.delay()
+    return round_obj
+
+
+async def evolve_exclusive(db: AsyncSession, round_obj: Round) -> None:
+    """Evolve outside a round (manual API call) without racing a running round."""
+    async def evolve(lease: RoundLease | None) -> bool:
+        await evolve_agents(db, round_obj)
+        if lease is not None:
+            await lease.fence(db, round_obj.id)
+        await db.commit()
+        await invalidate("evolved")
+        return True
+
+    await run_exclusive(f"evolve-{round_obj.id}", evolve, policy="skip")
 
-    agents = (await db.execute(select(Agent).where(Agent.is_active == True))).scalars().all()  # noqa: E712
+
+async def run_agents(
+    db: AsyncSession, round_id: int, agents: list[Agent],
+    lease: RoundLease | None = None, job: RoundJob | None = None,
+) -> None:
+    """Run ``agents`` for round ``round_id`` and store their results (a whole round or one shard)."""
+    # One market snapshot per run: every technical agent reads the same klines
+    market = MarketDataSnapshot()
+    # One headline fetch per round, shared by its shards and every news agent
+    headlines = await round_headlines(db, round_id) if any(a.agent_type == "news" for a in agents) else None
     runtime_agents: list[RuntimeAgent] = [
-        RuntimeAgent(a, instantiate_agent(a)) for a in agents]
-
-    async def run_one(ra: RuntimeAgent) -> AgentRun:
-        signal, details = await ra.instance.run()
-        # PnL proxy: simplistic scoring
-        pnl = 1.0 if signal == "buy" else (-1.0 if signal == "sell" else 0.0)
-        ar = AgentRun(agent_id=ra.model.id, round_id=round_obj.id,
-                      signal=signal, pnl=pnl, details=str(details))
-        db.add(ar)
-        return ar
-
-    results = await asyncio.gather(*[run_one(ra) for ra in runtime_agents])
+        RuntimeAgent(a, instantiate_agent(a, market, headlines)) for a in agents]
+
+    news_agents = [ra.instance for ra in runtime_agents if isinstance(ra.instance, NewsAgent)]
+    news_batch: asyncio.Future | None = None
+    if settings.news_batch_enabled and len(news_agents) > 1:
+        # News agents share a few packed LLM requests
+        news_batch = asyncio.ensure_future(run_news_batch(news_agents, headlines))
+
+    # Technical agents whose prompts compile to the same rules share one run
+    technical_runs: dict[TechnicalRules, asyncio.Future] = {}
+
+    def task(ra: RuntimeAgent):
+        async def run_one():
+            if news_batch is not None and isinstance(ra.instance, NewsAgent):
+                return (await asyncio.shield(news_batch))[ra.instance.prompt]
+            if isinstance(ra.instance, TechnicalAgent):
+                fut = technical_runs.get(ra.instance.rules)
+                if fut is None:
+                    fut = technical_runs[ra.instance.rules] = asyncio.ensure_future(ra.instance.run())
+                return await asyncio.shield(fut)
+            return await ra.instance.run()
+        return run_one
+
+    await precompute_indicators(market, runtime_agents)
+    fitness = await backtest_agents(market, runtime_agents)
+    # Agents only produce plain results; this coroutine is the session's sole user and
+    # writes them in bulk, committing a checkpoint every run_checkpoint_size results.
+    generations = {ra.model.id: ra.model.generation for ra in runtime_agents}
+    buffer: list[AgentResult] = []
+    try:
+        async for agent_id, (signal, details) in AgentExecutor().stream({ra.model.id: task(ra) for ra in runtime_agents}):
+            pnl = score_signal(signal)
+            backtest = fitness.get(agent_id)
+            if backtest is not None:
+                details = {**details, "backtest": backtest.as_dict()}
+            buffer.append(AgentResult(
+                agent_id, signal, pnl, details, generation=generations[agent_id],
+                fitness=backtest.pnl if backtest is not None else None))
+            if job is not None:
+                await job.agent_done(agent_id, signal, pnl)
+            if len(buffer) >= settings.run_checkpoint_size:
+                await insert_runs(db, round_id, buffer)
+                if lease is not None:
+                    await lease.fence(db, round_id)
+                await db.commit()
+                if lease is not None:
+                    await lease.advance(len(buffer))
+                buffer = []
+    finally:
+        if news_batch is not None and not news_batch.done():
+            news_batch.cancel()
+        for fut in technical_runs.values():
+            fut.cancel()
+    await insert_runs(db, round_id, buffer)
+    if lease is not None and buffer:
+        await lease.fence(db, round_id)
     await db.commit()
+    if lease is not None and buffer:
+        await lease.advance(len(buffer))
+    await invalidate("round runs")
+
 
+async def finish_round(db: AsyncSession, round_obj: Round, lease: RoundLease | None = None) -> None:
     await evolve_agents(db, round_obj)
+    if lease is not None:
+        # Fence: a holder that lost its lease mid-round must not rewrite the population
+        try:
+            await lease.fence(db, round_obj.id)
+        except LeaseLost:
+            await db.rollback()
+            round_obj.finished_at = datetime.utcnow()
+            round_obj.notes = "lease lost, not evolved"
+            await db.commit()
+            raise
     round_obj.finished_at = datetime.utcnow()
     await db.commit()
-    return round_obj
+    await invalidate("round evolved")
+
+
+async def select_elites(db: AsyncSession, round_obj: Round) -> dict[str, list[Any]]:
+    """Top ``elite_per_type`` agents of each type by fitness in ``round_obj``, ranked in SQL.
+
+    Fitness is the backtested PnL where the run has one, else the round's signal score.
+    """
+    ranked = (
+        select(
+            Agent.id,
+            Agent.agent_type,
+            Agent.generation,
+            Agent.prompt,
+            func.row_number().over(
+                partition_by=Agent.agent_type,
+                order_by=(func.coalesce(AgentRun.fitness, AgentRun.pnl).desc(), AgentRun.id),
+            ).label("rank"),
+        )
+        .join(AgentRun, AgentRun.agent_id == Agent.id)
+        .where(AgentRun.round_id == round_obj.id)
+        .subquery()
+    )
+    rows = (
+        await db.execute(
+            select(ranked)
+            .where(ranked.c.rank <= settings.elite_per_type)
+            .order_by(ranked.c.agent_type, ranked.c.rank)
+        )
+    ).all()
+    elites: dict[str, list[Any]] = {}
+    for row in rows:
+        elites.setdefault(row.agent_type, []).append(row)
+    return elites
 
 
 async def evolve_agents(db: AsyncSession, round_obj: Round) -> None:
-    # Select best per type by last round pnl
-    runs = (await db.execute(select(AgentRun).where(AgentRun.round_id == round_obj.id))).scalars().all()
-    by_type: dict[str, list[tuple[AgentRun, Agent]]] = {
-        "technical": [], "news": []}
-    for r in runs:
-        agent = await db.get(Agent, r.agent_id)
-        if agent:
-            by_type[agent.agent_type].append((r, agent))
-
-    new_agents: list[Agent] = []
-    llm = LLMService()
-    for agent_type, tuples in by_type.items():
-        tuples.sort(key=lambda t: t[0].pnl, reverse=True)
-        elites = [t[1] for t in tuples[: settings.elite_per_type]]
-        # keep elites
-        for e in elites:
-            e.is_active = True
-        # deactivate others of this type
-        for _, a in tuples[settings.elite_per_type:]:
-            a.is_active = False
-
-        # mutations
-        for idx, base_agent in enumerate(elites[: settings.mutated_per_type]):
+    # Select best per type by last round fitness
+    elites = await select_elites(db, round_obj)
+    elite_ids = [row.id for rows in elites.values() for row in rows]
+    # Keep elites, deactivate every other agent that ran in this round: one UPDATE
+    await db.execute(
+        update(Agent)
+        .where(Agent.id.in_(select(AgentRun.agent_id).where(AgentRun.round_id == round_obj.id)))
+        .values(is_active=Agent.id.in_(elite_ids))
+        .execution_options(synchronize_session="fetch")
+    )
+
+    # mutations: every type and elite at once through a bounded pool
+    parents: list[tuple[int, Any]] = []
+    requests: list[MutationRequest] = []
+    for agent_type, rows in elites.items():
+        for idx, base_agent in enumerate(rows[: settings.mutated_per_type]):
             description = (
                 f"Type: {agent_type}. Generation: {base_agent.generation}."
                 + " Goal: increase PnL with robust, low overfit rules."
             )
-            try:
-                improved = await llm.mutate_prompt(description, base_agent.prompt)
-            except Exception:
-                improved = base_agent.prompt
-            new_agents.append(
-                Agent(
-                    name=f"{agent_type}_mut_{base_agent.id}_{idx}",
-                    agent_type=agent_type,
-                    generation=base_agent.generation + 1,
-                    prompt=improved,
-                    is_active=True,
-                )
-            )
+            parents.append((idx, base_agent))
+            requests.append(MutationRequest(agent_type, description, base_agent.prompt))
+    improved = await MutationPool().mutate_many(requests)
 
-    db.add_all(new_agents)
+    db.add_all([
+        Agent(
+            name=f"{base_agent.agent_type}_mut_{base_agent.id}_{idx}",
+            agent_type=base_agent.agent_type,
+            generation=base_agent.generation + 1,
+            prompt=prompt,
+            is_active=True,
+        )
+        for (idx, base_agent), prompt in zip(parents, improved)
+    ])
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+
+from app.agents.base import Signal
+from app.core.config import get_settings
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+AgentJob = Callable[[], Awaitable[tuple[Signal, dict[str, Any]]]]
+
+
+class AgentExecutor:
+    """Runs agent jobs with a concurrency cap, a per-agent deadline and a round deadline.
+
+    A job that times out, fails, or is still running when the round deadline hits is
+    recorded as ``hold`` with an ``error`` entry in its details instead of failing the round.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        agent_timeout: float | None = None,
+        round_timeout: float | None = None,
+    ):
+        self.concurrency = concurrency or settings.agent_concurrency
+        self.agent_timeout = agent_timeout or settings.agent_timeout_seconds
+        self.round_timeout = round_timeout or settings.round_timeout_seconds
+
+    async def run(self, jobs: dict[Hashable, AgentJob]) -> dict[Hashable, tuple[Signal, dict[str, Any]]]:
+        results = {key: result async for key, result in self.stream(jobs)}
+        return {key: results[key] for key in jobs}
+
+    async def stream(self, jobs: dict[Hashable, AgentJob]) -> AsyncIterator[tuple[Hashable, tuple[Signal, dict[str, Any]]]]:
+        """Yield ``(key, result)`` pairs in completion order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def guarded(key: Hashable, job: AgentJob) -> tuple[Signal, dict[str, Any]]:
+            async with semaphore:
+                # The per-agent deadline starts once the agent has a slot, not while it queues
+                try:
+                    return await asyncio.wait_for(job(), timeout=self.agent_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("agent %s timed out after %gs", key, self.agent_timeout)
+                    return "hold", {"error": f"agent timeout after {self.agent_timeout:g}s"}
+                except Exception as exc:
+                    logger.warning("agent %s failed", key, exc_info=True)
+                    return "hold", {"error": f"{type(exc).__name__}: {exc}"[:500]}
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.round_timeout
+        tasks = {asyncio.ensure_future(guarded(key, job)): key for key, job in jobs.items()}
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield tasks[task], task.result()
+            if pending:
+                logger.warning("round deadline hit, %d agents cancelled", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                for task in pending:
+                    yield tasks[task], ("hold", {"error": f"round deadline after {self.round_timeout:g}s"})
+                pending = set()
+        finally:
+            # Consumer stopped early (error or cancellation): do not leave agents running
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from app.core.config import get_settings
+from app.services.llm import LLMService
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MutationRequest:
+    agent_type: str
+    description: str
+    prompt: str
+
+    @property
+    def dedupe_key(self) -> tuple[str, str]:
+        # Elites of one type sharing a prompt (e.g. clones) would get the same rewrite request
+        return self.agent_type, self.prompt
+
+
+class MutationPool:
+    """Runs prompt mutations concurrently with a cap, per-call timeouts and retries.
+
+    A mutation that still fails after all retries keeps the original prompt.
+    """
+
+    def __init__(
+        self,
+        llm: LLMService | None = None,
+        concurrency: int | None = None,
+        timeout: float | None = None,
+        retries: int | None = None,
+        backoff: float | None = None,
+    ):
+        self.llm = llm or LLMService()
+        self.concurrency = concurrency or settings.mutation_concurrency
+        self.timeout = timeout or settings.mutation_timeout_seconds
+        self.retries = settings.mutation_retries if retries is None else retries
+        self.backoff = settings.mutation_backoff_seconds if backoff is None else backoff
+
+    async def _mutate(self, semaphore: asyncio.Semaphore, request: MutationRequest) -> str:
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(
+                        self.llm.mutate_prompt(request.description, request.prompt), timeout=self.timeout)
+            except Exception:
+                if attempt == self.retries:
+                    logger.warning("prompt mutation failed after %d attempts", attempt + 1, exc_info=True)
+                    break
+                # Back off outside the semaphore so waiting retries do not hold slots
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        return request.prompt
+
+    async def mutate_many(self, requests: list[MutationRequest]) -> list[str]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        unique: dict[tuple[str, str], MutationRequest] = {}
+        for request in requests:
+            unique.setdefault(request.dedupe_key, request)
+        improved = await asyncio.gather(*[self._mutate(semaphore, r) for r in unique.values()])
+        by_key = dict(zip(unique, improved))
+        return [by_key[r.dedupe_key] for r in requests]
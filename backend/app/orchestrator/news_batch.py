@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from app.agents.base import Signal
+from app.agents.news import ACTIONS, SENTIMENTS, NewsAgent, format_headlines, stale_marker
+from app.core.config import get_settings
+from app.services.json_stream import first_value
+from app.services.llm import LLMService
+from app.services.news import NewsService
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+BATCH_SYSTEM_PROMPT = (
+    "System: news sentiment. You answer for several analysts at once; "
+    "each analyst applies only their own rules to the shared headlines."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough chars-per-token ratio; only used to size batches
+    return len(text) // 4 + 1
+
+
+def pack_prompts(prompts: list[str], token_budget: int) -> list[list[str]]:
+    batches: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for prompt in prompts:
+        cost = estimate_tokens(prompt)
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(prompt)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_instruction(prompts: list[str], headlines: list[dict[str, Any]]) -> str:
+    profiles = "\n\n".join(f"Analyst {i}:\n{p.strip()}" for i, p in enumerate(prompts))
+    return (
+        "Headlines:\n" + format_headlines(headlines) + "\n\n" + profiles + "\n\n"
+        "Return only a JSON array with one object per analyst: "
+        '[{"analyst": <number>, "sentiment": "positive|negative|neutral", "action": "buy|sell|hold"}].'
+    )
+
+
+def parse_batch(analysis: str, size: int) -> list[tuple[Signal, dict[str, Any]]] | None:
+    # The answer array, past any prose around it (which may hold brackets of its own)
+    items = first_value(analysis)
+    if not isinstance(items, list):
+        return None
+    results: dict[int, tuple[Signal, dict[str, Any]]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        idx = item.get("analyst")
+        sentiment = str(item.get("sentiment", "")).lower()
+        action = str(item.get("action", "")).lower()
+        if not isinstance(idx, int) or not 0 <= idx < size or sentiment not in SENTIMENTS or action not in ACTIONS:
+            return None
+        results[idx] = (action, {"sentiment": sentiment, "raw": json.dumps(item)[:2000], "batched": True})  # type: ignore[assignment]
+    if len(results) != size:
+        return None
+    return [results[i] for i in range(size)]
+
+
+async def analyze_news_batch(
+    agents: list[NewsAgent],
+    headlines: list[dict[str, Any]],
+    llm: LLMService | None = None,
+) -> dict[str, tuple[Signal, dict[str, Any]]]:
+    """Score every distinct news prompt against one headline set; returns results by prompt.
+
+    Prompts are packed into as few LLM requests as the token budget allows. A batch whose
+    answer cannot be parsed falls back to one request per prompt.
+    """
+    llm = llm or LLMService()
+    by_prompt: dict[str, NewsAgent] = {}
+    for agent in agents:
+        by_prompt.setdefault(agent.prompt, agent)
+
+    async def run_batch(batch: list[str]) -> list[tuple[Signal, dict[str, Any]]]:
+        if len(batch) > 1:
+            try:
+                # Streamed until the answer array closes
+                analysis = await llm.chat(
+                    BATCH_SYSTEM_PROMPT, build_batch_instruction(batch, headlines),
+                    max_tokens=settings.llm_max_tokens_news_batch_per_prompt * len(batch) + 16, json_fields=(),
+                )
+                parsed = parse_batch(analysis, len(batch))
+                if parsed is not None:
+                    return parsed
+            except Exception:
+                logger.warning("batched news analysis failed", exc_info=True)
+            logger.info("falling back to per-agent news analysis for %d prompts", len(batch))
+        return list(await asyncio.gather(*[by_prompt[p].analyze(headlines) for p in batch]))
+
+    batches = pack_prompts(list(by_prompt), settings.news_batch_token_budget)
+    marker = stale_marker(headlines)
+    results: dict[str, tuple[Signal, dict[str, Any]]] = {}
+    for batch, parsed in zip(batches, await asyncio.gather(*[run_batch(b) for b in batches])):
+        results.update((prompt, (signal, {**details, **marker})) for prompt, (signal, details) in zip(batch, parsed))
+    return results
+
+
+async def run_news_batch(
+    agents: list[NewsAgent], headlines: list[dict[str, Any]] | None = None,
+) -> dict[str, tuple[Signal, dict[str, Any]]]:
+    if headlines is None:
+        headlines = await NewsService().fetch_headlines(limit=20)
+    return await analyze_news_batch(agents, headlines)
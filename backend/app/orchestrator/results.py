@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.agents.base import Signal
+from app.models.agent import Agent, AgentRun
+from app.models.stats import AgentStats, GenerationStats
+
+
+@dataclass(frozen=True)
+class AgentResult:
+    agent_id: int
+    signal: Signal
+    pnl: float
+    details: dict[str, Any]
+    generation: int = 0
+    fitness: float | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def score_signal(signal: Signal) -> float:
+    # PnL proxy: simplistic scoring
+    return 1.0 if signal == "buy" else (-1.0 if signal == "sell" else 0.0)
+
+
+async def insert_runs(db: AsyncSession, round_id: int, results: list[AgentResult]) -> None:
+    """Write a batch of results as a single multi-row INSERT (no per-row ORM objects)."""
+    if not results:
+        return
+    await db.execute(
+        insert(AgentRun),
+        [
+            {
+                "agent_id": r.agent_id,
+                "round_id": round_id,
+                "signal": r.signal,
+                "pnl": r.pnl,
+                "fitness": r.fitness,
+                "details": str(r.details),
+                "created_at": r.created_at,
+            }
+            for r in results
+        ],
+    )
+    await apply_aggregates(db, results)
+
+
+async def apply_aggregates(db: AsyncSession, results: list[AgentResult]) -> None:
+    """Fold results into AgentStats/GenerationStats; call in the transaction that inserts the runs."""
+    per_agent: dict[int, tuple[float, int, datetime]] = {}
+    per_generation: dict[int, tuple[float, int]] = {}
+    for r in results:
+        pnl, runs, last = per_agent.get(r.agent_id, (0.0, 0, r.created_at))
+        per_agent[r.agent_id] = (pnl + r.pnl, runs + 1, max(last, r.created_at))
+        pnl, runs = per_generation.get(r.generation, (0.0, 0))
+        per_generation[r.generation] = (pnl + r.pnl, runs + 1)
+    if not per_agent:
+        return
+
+    stmt = pg_insert(AgentStats).values([
+        {"agent_id": agent_id, "total_pnl": pnl, "runs": runs, "last_run_at": last}
+        for agent_id, (pnl, runs, last) in sorted(per_agent.items())
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[AgentStats.agent_id],
+        set_={
+            "total_pnl": AgentStats.total_pnl + stmt.excluded.total_pnl,
+            "runs": AgentStats.runs + stmt.excluded.runs,
+            "last_run_at": stmt.excluded.last_run_at,
+        },
+    ))
+
+    stmt = pg_insert(GenerationStats).values([
+        {"generation": generation, "total_pnl": pnl, "runs": runs}
+        for generation, (pnl, runs) in sorted(per_generation.items())
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[GenerationStats.generation],
+        set_={
+            "total_pnl": GenerationStats.total_pnl + stmt.excluded.total_pnl,
+            "runs": GenerationStats.runs + stmt.excluded.runs,
+        },
+    ))
+
+
+async def remove_agent_aggregates(db: AsyncSession, agent: Agent) -> None:
+    """Take a deleted agent's totals out of its generation rollup (its runs cascade away)."""
+    stats = await db.get(AgentStats, agent.id)
+    if stats is None:
+        return
+    await db.execute(
+        update(GenerationStats)
+        .where(GenerationStats.generation == agent.generation)
+        .values(
+            total_pnl=GenerationStats.total_pnl - stats.total_pnl,
+            runs=GenerationStats.runs - stats.runs,
+        )
+    )
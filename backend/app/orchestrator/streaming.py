@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.agents.technical import DEFAULT_TECH_RULES
+from app.main import configure_logging
+from app.services.bybit_stream import BybitKlineStream
+from app.services.http_clients import clients
+
+
+async def main() -> None:
+    stream = BybitKlineStream(DEFAULT_TECH_RULES.indicator_specs())
+    try:
+        await stream.run()
+    finally:
+        await clients.aclose()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(main())
@@ -1,29 +1,61 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Request, Response
 from fastapi import HTTPException
 from fastapi import status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.models.agent import Agent, AgentRun, Round
+from app.models.stats import AgentStats
 from app.schemas.agent import AgentRead, AgentRunRead, AgentCreate, AgentUpdate, LeaderboardEntry
+from app.agents.base import Signal
 from app.agents.technical import TechnicalAgent
 from app.agents.news import NewsAgent
+from app.orchestrator.results import AgentResult, apply_aggregates, remove_agent_aggregates
+from app.routes.pagination import PageParams, filter_runs, ndjson_export
+from app.services.response_cache import dashboard_cache, invalidate
 
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[AgentRead])
-async def list_agents(db: AsyncSession = Depends(get_db)):
-    res = await db.execute(select(Agent))
-    return res.scalars().all()
+async def list_agents(request: Request, db: AsyncSession = Depends(get_db)):
+    async def compute(_: Response):
+        return (await db.execute(select(Agent))).scalars().all()
+
+    return await dashboard_cache.respond(request, compute, list[AgentRead])
 
 
 @router.get("/{agent_id}/runs", response_model=list[AgentRunRead])
-async def list_agent_runs(agent_id: int, db: AsyncSession = Depends(get_db)):
-    res = await db.execute(select(AgentRun).where(AgentRun.agent_id == agent_id))
-    return res.scalars().all()
+async def list_agent_runs(
+    agent_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    signal: Signal | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    # Newest first; the next page's cursor is returned in the X-Next-Cursor header
+    q = filter_runs(select(AgentRun).where(AgentRun.agent_id == agent_id), since, until, signal)
+    res = await db.execute(page.apply(q, AgentRun.id))
+    return page.finish(res.scalars().all(), response)
+
+
+@router.get("/{agent_id}/runs/export")
+async def export_agent_runs(
+    agent_id: int,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    signal: Signal | None = None,
+):
+    q = filter_runs(select(AgentRun.__table__).where(AgentRun.agent_id == agent_id), since, until, signal)
+    return StreamingResponse(ndjson_export(q, AgentRun.id, lambda r: dict(r._mapping)),
+                             media_type="application/x-ndjson")
 
 
 @router.post("/{agent_id}/run", response_model=AgentRunRead)
@@ -41,7 +73,11 @@ async def run_single_agent(agent_id: int, db: AsyncSession = Depends(get_db)):
     run = AgentRun(agent_id=agent.id, round_id=rnd.id,
                    signal=signal, pnl=0.0, details=str(details))
     db.add(run)
+    await db.flush()
+    await apply_aggregates(db, [AgentResult(agent.id, signal, run.pnl, details,
+                                            generation=agent.generation, created_at=run.created_at)])
     await db.commit()
+    await invalidate("agent run")
     await db.refresh(run)
     return run
 
@@ -57,6 +93,7 @@ async def create_agent(payload: AgentCreate, db: AsyncSession = Depends(get_db))
     )
     db.add(agent)
     await db.commit()
+    await invalidate("agent created")
     await db.refresh(agent)
     return agent
 
@@ -73,6 +110,7 @@ async def update_agent(agent_id: int, payload: AgentUpdate, db: AsyncSession = D
     if payload.is_active is not None:
         agent.is_active = payload.is_active
     await db.commit()
+    await invalidate("agent updated")
     await db.refresh(agent)
     return agent
 
@@ -82,24 +120,31 @@ async def delete_agent(agent_id: int, db: AsyncSession = Depends(get_db)):
     agent = await db.get(Agent, agent_id)
     if not agent:
         return
+    await remove_agent_aggregates(db, agent)
     await db.delete(agent)
     await db.commit()
+    await invalidate("agent deleted")
 
 
 @router.get("/leaderboard/top", response_model=list[LeaderboardEntry])
-async def leaderboard(limit: int = 10, db: AsyncSession = Depends(get_db)):
+async def leaderboard(request: Request, limit: int = 10, db: AsyncSession = Depends(get_db)):
+    return await dashboard_cache.respond(request, lambda _: _leaderboard(db, limit))
+
+
+async def _leaderboard(db: AsyncSession, limit: int) -> list[LeaderboardEntry]:
+    # Served from the maintained per-agent totals instead of summing agent_run
+    total_pnl = func.coalesce(AgentStats.total_pnl, 0.0)
     q = (
         select(
             Agent.id.label("agent_id"),
             Agent.name,
             Agent.agent_type,
             Agent.generation,
-            func.coalesce(func.sum(AgentRun.pnl), 0.0).label("total_pnl"),
-            func.count(AgentRun.id).label("runs"),
+            total_pnl.label("total_pnl"),
+            func.coalesce(AgentStats.runs, 0).label("runs"),
         )
-        .join(AgentRun, AgentRun.agent_id == Agent.id, isouter=True)
-        .group_by(Agent.id)
-        .order_by(func.coalesce(func.sum(AgentRun.pnl), 0.0).desc())
+        .join(AgentStats, AgentStats.agent_id == Agent.id, isouter=True)
+        .order_by(total_pnl.desc())
         .limit(limit)
     )
     res = await db.execute(q)
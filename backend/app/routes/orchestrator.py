@@ -1,27 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
-from app.models.agent import Round
+from app.models.agent import AgentRun, Round
 from app.schemas.agent import RoundRead, RoundSummary
-from app.orchestrator.evolution import run_round, evolve_agents
-from app.services.scheduler import run_round_task
+from app.orchestrator.evolution import evolve_exclusive
+from app.routes.pagination import PageParams
+from app.services.jobs import get_job, job_events
+from app.services.scheduler import enqueue_round
 
 
 router = APIRouter()
 
 
-@router.post("/run", response_model=RoundRead)
-async def run_once(db: AsyncSession = Depends(get_db)):
-    round_obj: Round = await run_round(db, name="manual")
-    return round_obj
+@router.post("/run", status_code=202)
+async def run_once():
+    # The round runs on the worker; follow it via the job endpoints below
+    job_id = await enqueue_round("manual")
+    return job_links(job_id)
 
 
-@router.post("/schedule/trigger")
+@router.post("/schedule/trigger", status_code=202)
 async def trigger_async_round():
-    run_round_task.delay()
-    return {"status": "queued"}
+    job_id = await enqueue_round("trigger")
+    return job_links(job_id)
+
+
+def job_links(job_id: str) -> dict:
+    return {
+        "status": "queued",
+        "job_id": job_id,
+        "status_url": f"/api/orchestrator/jobs/{job_id}",
+        "events_url": f"/api/orchestrator/jobs/{job_id}/events",
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_round_job(job_id: str):
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def round_job_events(job_id: str, last_event_id: str | None = Header(None)):
+    """Server-Sent Events: ``status`` changes and one ``agent`` event per finished agent.
+
+    Reconnecting clients resume after ``Last-Event-ID``; the stream ends with the job.
+    """
+    if await get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        async for item in job_events(job_id, last_event_id or "0"):
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            event_id, event, data = item
+            yield f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @router.post("/evolve", response_model=RoundRead)
@@ -35,21 +79,34 @@ async def force_evolve(round_id: int | None = None, db: AsyncSession = Depends(g
         round_obj = await db.get(Round, round_id)
         if not round_obj:
             raise HTTPException(status_code=404, detail="Round not found")
-    await evolve_agents(db, round_obj)
-    await db.commit()
+    await evolve_exclusive(db, round_obj)
     return round_obj
 
 
 @router.get("/rounds", response_model=list[RoundSummary])
-async def list_rounds(db: AsyncSession = Depends(get_db)):
-    from sqlalchemy import select, func
-    from app.models.agent import AgentRun
-
-    res = await db.execute(select(Round))
-    rounds = res.scalars().all()
-    summaries: list[RoundSummary] = []
-    for r in rounds:
-        count = (await db.execute(select(func.count(AgentRun.id)).where(AgentRun.round_id == r.id))).scalar() or 0
-        summaries.append(RoundSummary(
-            id=r.id, name=r.name, started_at=r.started_at, finished_at=r.finished_at, runs=int(count)))
-    return summaries
+async def list_rounds(
+    response: Response,
+    page: PageParams = Depends(),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    q = select(Round)
+    if since is not None:
+        q = q.where(Round.started_at >= since)
+    if until is not None:
+        q = q.where(Round.started_at < until)
+    rounds = page.finish((await db.execute(page.apply(q, Round.id))).scalars().all(), response)
+    if not rounds:
+        return []
+    # One grouped count for the whole page instead of a COUNT per round
+    counts = dict((await db.execute(
+        select(AgentRun.round_id, func.count())
+        .where(AgentRun.round_id.in_([r.id for r in rounds]))
+        .group_by(AgentRun.round_id)
+    )).all())
+    return [
+        RoundSummary(id=r.id, name=r.name, started_at=r.started_at,
+                     finished_at=r.finished_at, runs=int(counts.get(r.id, 0)))
+        for r in rounds
+    ]
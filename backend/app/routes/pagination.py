@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Sequence
+
+from fastapi import Query, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Select
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.agent import AgentRun
+
+
+settings = get_settings()
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Keyset page over descending ids: ``cursor`` is the last id of the previous page."""
+
+    def __init__(
+        self,
+        limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+        cursor: int | None = Query(None, ge=1),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+    def apply(self, q: Select, id_column) -> Select:
+        if self.cursor is not None:
+            q = q.where(id_column < self.cursor)
+        # One extra row tells whether a next page exists without a COUNT
+        return q.order_by(id_column.desc()).limit(self.limit + 1)
+
+    def finish(self, rows: Sequence[Any], response: Response, key: Callable[[Any], int] = lambda r: r.id) -> Sequence[Any]:
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            response.headers[NEXT_CURSOR_HEADER] = str(key(rows[-1]))
+        return rows
+
+
+def filter_runs(q: Select, since: datetime | None, until: datetime | None, signal: str | None) -> Select:
+    # created_at bounds also let Postgres prune agentrun partitions
+    if since is not None:
+        q = q.where(AgentRun.created_at >= since)
+    if until is not None:
+        q = q.where(AgentRun.created_at < until)
+    if signal is not None:
+        q = q.where(AgentRun.signal == signal)
+    return q
+
+
+async def ndjson_export(q: Select, id_column, row_to_dict: Callable[[Any], dict]) -> AsyncIterator[bytes]:
+    """Stream ``q`` as NDJSON in ascending id batches.
+
+    Uses its own session: the request-scoped one is closed before a streaming body is sent.
+    Each batch is a fresh keyset query, so memory stays at one batch however long the history.
+    """
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            batch = (await db.execute(
+                q.where(id_column > last_id).order_by(id_column.asc()).limit(settings.export_batch_size)
+            )).all()
+            if not batch:
+                return
+            yield "".join(json.dumps(jsonable_encoder(row_to_dict(r))) + "\n" for r in batch).encode()
+            last_id = batch[-1].id
+            # Release the batch's transaction snapshot between chunks
+            await db.rollback()
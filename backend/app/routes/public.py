@@ -1,28 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.base import Signal
+from app.core.config import get_settings
 from app.db.session import get_db
 from app.models.agent import Agent, AgentRun, Round
+from app.models.stats import AgentStats, GenerationStats
 from app.schemas.agent import AgentRead
 from app.schemas.stats import StatsOverview, BestAgent, GenerationPnL
-from app.orchestrator.evolution import run_round, evolve_agents
+from app.orchestrator.evolution import evolve_exclusive
+from app.routes.orchestrator import job_links
+from app.routes.pagination import PageParams, filter_runs, ndjson_export
+from app.services.llm_cache import llm_cache
+from app.services.llm_router import llm_router
+from app.services.resilience import breaker_status
+from app.services.response_cache import dashboard_cache
+from app.services.round_lease import current_lease
+from app.services.scheduler import enqueue_round
+
+
+settings = get_settings()
 
 
 router = APIRouter()
 
 
 @router.get("/agents", response_model=list[AgentRead])
-async def api_agents(db: AsyncSession = Depends(get_db)):
-    res = await db.execute(select(Agent))
-    return res.scalars().all()
+async def api_agents(request: Request, db: AsyncSession = Depends(get_db)):
+    async def compute(_: Response):
+        return (await db.execute(select(Agent))).scalars().all()
 
+    return await dashboard_cache.respond(request, compute, list[AgentRead])
 
-@router.post("/agents/run")
-async def api_run_all(db: AsyncSession = Depends(get_db)):
-    await run_round(db, name="api")
-    await db.commit()
-    return {"status": "ok"}
+
+@router.post("/agents/run", status_code=202)
+async def api_run_all():
+    # Same payload as /api/orchestrator/run: follow status_url or the events_url stream
+    return job_links(await enqueue_round("api"))
 
 
 @router.get("/agents/{agent_id}", response_model=AgentRead)
@@ -39,29 +58,32 @@ async def api_evolve(db: AsyncSession = Depends(get_db)):
     last_round = res.scalars().first()
     if not last_round:
         raise HTTPException(400, "No rounds to evolve")
-    await evolve_agents(db, last_round)
-    await db.commit()
+    await evolve_exclusive(db, last_round)
     return {"status": "ok"}
 
 
 @router.get("/stats", response_model=StatsOverview)
-async def api_stats(db: AsyncSession = Depends(get_db)):
+async def api_stats(request: Request, db: AsyncSession = Depends(get_db)):
+    return await dashboard_cache.respond(request, lambda _: _stats(db))
+
+
+async def _stats(db: AsyncSession) -> StatsOverview:
     total_agents = (await db.execute(select(func.count(Agent.id)))).scalar() or 0
     active_agents = (
         await db.execute(select(func.count(Agent.id)).where(Agent.is_active == True))  # noqa: E712
     ).scalar() or 0
     total_rounds = (await db.execute(select(func.count(Round.id)))).scalar() or 0
-    total_runs = (await db.execute(select(func.count(AgentRun.id)))).scalar() or 0
+    # Totals come from the maintained aggregates, never from a scan of agent_run
+    total_runs = (await db.execute(select(func.sum(GenerationStats.runs)))).scalar() or 0
 
     best_row = (
         await db.execute(
             select(
                 Agent.id, Agent.name, Agent.agent_type, Agent.generation, func.coalesce(
-                    func.sum(AgentRun.pnl), 0.0)
+                    AgentStats.total_pnl, 0.0)
             )
-            .join(AgentRun, AgentRun.agent_id == Agent.id, isouter=True)
-            .group_by(Agent.id)
-            .order_by(func.coalesce(func.sum(AgentRun.pnl), 0.0).desc())
+            .join(AgentStats, AgentStats.agent_id == Agent.id, isouter=True)
+            .order_by(func.coalesce(AgentStats.total_pnl, 0.0).desc())
             .limit(1)
         )
     ).first()
@@ -75,17 +97,19 @@ async def api_stats(db: AsyncSession = Depends(get_db)):
             total_pnl=float(best_row[4] or 0.0),
         )
 
-    gen_rows = (
-        await db.execute(
-            select(Agent.generation, func.coalesce(
-                func.sum(AgentRun.pnl), 0.0), func.count(Agent.id))
-            .join(AgentRun, AgentRun.agent_id == Agent.id, isouter=True)
-            .group_by(Agent.generation)
-            .order_by(Agent.generation)
-        )
-    ).all()
+    agents_by_generation = dict(
+        (await db.execute(select(Agent.generation, func.count(Agent.id)).group_by(Agent.generation))).all()
+    )
+    pnl_by_generation_map = dict(
+        (await db.execute(select(GenerationStats.generation, GenerationStats.total_pnl))).all()
+    )
     pnl_by_generation = [
-        GenerationPnL(generation=int(r[0]), total_pnl=float(r[1] or 0.0), agents=int(r[2] or 0)) for r in gen_rows
+        GenerationPnL(
+            generation=int(gen),
+            total_pnl=float(pnl_by_generation_map.get(gen) or 0.0),
+            agents=int(agents_by_generation.get(gen, 0)),
+        )
+        for gen in sorted(agents_by_generation)
     ]
 
     last_round_started_at = (await db.execute(select(Round.started_at).order_by(Round.id.desc()).limit(1))).scalar()
@@ -105,6 +129,11 @@ async def api_stats(db: AsyncSession = Depends(get_db)):
 async def api_status(db: AsyncSession = Depends(get_db)):
     # Shows if there is an unfinished round and active worker heartbeat info could be added later
     running_round = (await db.execute(select(Round).where(Round.finished_at.is_(None)).order_by(Round.id.desc()))).scalars().first()
+    try:
+        # Holder, fencing token and progress (done/total agents) of the running round
+        lease = await current_lease()
+    except RedisError:
+        lease = None
     return {
         "running": bool(running_round),
         "round": {
@@ -112,28 +141,59 @@ async def api_status(db: AsyncSession = Depends(get_db)):
             "name": running_round.name,
             "started_at": running_round.started_at,
         } if running_round else None,
+        "lease": lease,
+        "llm_cache": llm_cache.metrics(),
+        "llm_backends": llm_router().status(),
+        "circuits": breaker_status(),
     }
 
 
-@router.get("/recent-runs")
-async def api_recent_runs(limit: int = 50, db: AsyncSession = Depends(get_db)):
-    q = (
+def _recent_runs_query():
+    return (
         select(AgentRun.id, AgentRun.agent_id, AgentRun.round_id,
-               AgentRun.signal, AgentRun.pnl, AgentRun.created_at, Agent.name)
+               AgentRun.signal, AgentRun.pnl, AgentRun.fitness, AgentRun.created_at, Agent.name)
         .join(Agent, Agent.id == AgentRun.agent_id)
-        .order_by(AgentRun.id.desc())
-        .limit(limit)
     )
-    rows = (await db.execute(q)).all()
-    return [
-        {
-            "id": r.id,
-            "agent_id": r.agent_id,
-            "agent_name": r.name,
-            "round_id": r.round_id,
-            "signal": r.signal,
-            "pnl": r.pnl,
-            "created_at": r.created_at,
-        }
-        for r in rows
-    ]
+
+
+def _recent_run_dict(r) -> dict:
+    return {
+        "id": r.id,
+        "agent_id": r.agent_id,
+        "agent_name": r.name,
+        "round_id": r.round_id,
+        "signal": r.signal,
+        "pnl": r.pnl,
+        "fitness": r.fitness,
+        "created_at": r.created_at,
+    }
+
+
+@router.get("/recent-runs")
+async def api_recent_runs(
+    request: Request,
+    limit: int = Query(50, ge=1, le=settings.page_size_max),
+    cursor: int | None = Query(None, ge=1),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    signal: Signal | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    page = PageParams(limit=limit, cursor=cursor)
+    q = filter_runs(_recent_runs_query(), since, until, signal)
+
+    async def compute(response: Response):
+        rows = page.finish((await db.execute(page.apply(q, AgentRun.id))).all(), response)
+        return [_recent_run_dict(r) for r in rows]
+
+    return await dashboard_cache.respond(request, compute)
+
+
+@router.get("/runs/export")
+async def api_export_runs(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    signal: Signal | None = None,
+):
+    q = filter_runs(_recent_runs_query(), since, until, signal)
+    return StreamingResponse(ndjson_export(q, AgentRun.id, _recent_run_dict), media_type="application/x-ndjson")
@@ -42,6 +42,7 @@ class AgentRunRead(BaseModel):
     round_id: int
     signal: Optional[str] = None
     pnl: float
+    fitness: Optional[float] = None
     details: Optional[str] = None
     created_at: datetime
 
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.candle_store import interval_ms
+from app.services.indicators import compute_indicators
+from app.services.market_data import Candles
+
+if TYPE_CHECKING:
+    from app.agents.rules import TechnicalRules
+
+
+settings = get_settings()
+
+_YEAR_MS = 365 * 24 * 3600 * 1000
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    fee_bps: float
+    slippage_bps: float
+    allow_short: bool
+
+    @classmethod
+    def from_settings(cls) -> "BacktestConfig":
+        return cls(settings.backtest_fee_bps, settings.backtest_slippage_bps, settings.backtest_allow_short)
+
+    @property
+    def cost(self) -> float:
+        # Paid on every unit of position change
+        return (self.fee_bps + self.slippage_bps) / 1e4
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    pnl: float  # compounded return over the window, in percent
+    sharpe: float  # annualized, per-bar returns
+    max_drawdown: float  # in percent of peak equity
+    trades: int
+    bars: int
+
+    def as_dict(self) -> dict[str, float | int]:
+        return asdict(self)
+
+
+def positions_from_signals(signals: np.ndarray, allow_short: bool) -> np.ndarray:
+    """Turn (A, T) signals into held positions: buy goes long, sell goes short (or flat), hold keeps."""
+    events = signals != 0
+    targets = np.where(signals > 0, 1.0, -1.0 if allow_short else 0.0)
+    # Forward-fill the index of the latest event on each row
+    idx = np.where(events, np.arange(signals.shape[1]), -1)
+    idx = np.maximum.accumulate(idx, axis=1)
+    held = np.take_along_axis(targets, np.maximum(idx, 0), axis=1)
+    return np.where(idx >= 0, held, 0.0)
+
+
+def backtest_signals(close: np.ndarray, signals: np.ndarray, config: BacktestConfig, periods_per_year: float) -> list[BacktestResult]:
+    """Score every row of ``signals`` against ``close`` at once.
+
+    A position decided on bar t's close is held over bar t+1, so no signal sees its own outcome.
+    """
+    n_agents, n_bars = signals.shape
+    if n_bars < 2:
+        return [BacktestResult(0.0, 0.0, 0.0, 0, n_bars) for _ in range(n_agents)]
+    positions = positions_from_signals(signals, config.allow_short)
+    turnover = np.abs(np.diff(positions, axis=1, prepend=0.0))[:, :-1]
+    returns = positions[:, :-1] * (close[1:] / close[:-1] - 1.0) - turnover * config.cost
+
+    equity = np.cumprod(1.0 + returns, axis=1)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=1)
+    drawdown = (1.0 - equity / peak).max(axis=1)
+    std = returns.std(axis=1)
+    sharpe = np.divide(returns.mean(axis=1), std, out=np.zeros(n_agents), where=std > 0) * np.sqrt(periods_per_year)
+    trades = np.count_nonzero(turnover, axis=1)
+    return [
+        BacktestResult(float(equity[i, -1] - 1.0) * 100, float(sharpe[i]), float(drawdown[i]) * 100, int(trades[i]), n_bars)
+        for i in range(n_agents)
+    ]
+
+
+def backtest_rules(candles: Candles, rules: Sequence["TechnicalRules"], config: BacktestConfig | None = None) -> list[BacktestResult]:
+    return backtest_close(candles.close, candles.interval, rules, config)
+
+
+def backtest_close(close: np.ndarray, interval: str, rules: Sequence["TechnicalRules"], config: BacktestConfig | None = None) -> list[BacktestResult]:
+    """Replay each rule set over the whole close series.
+
+    Indicators for the union of specs are computed once; identical rule sets are scored once.
+    """
+    config = config or BacktestConfig.from_settings()
+    unique = list(dict.fromkeys(rules))
+    if not unique:
+        return []
+    values = compute_indicators(close, {spec for r in unique for spec in r.indicator_specs()})
+    signals = np.stack([r.signals(r.conditions(close, values)) for r in unique])
+    step = interval_ms(interval)
+    periods_per_year = _YEAR_MS / step if step else 12.0
+    by_rules = dict(zip(unique, backtest_signals(close, signals, config, periods_per_year)))
+    return [by_rules[r] for r in rules]
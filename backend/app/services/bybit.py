@@ -1,36 +1,66 @@
 from __future__ import annotations
 
-import asyncio
-from datetime import datetime, timedelta
 from typing import Any
 
 import httpx
 
 from app.core.config import get_settings
+from app.services.http_clients import clients
+from app.services.ratelimit import limiter
+from app.services.resilience import breaker
 
 
 settings = get_settings()
 
+MAX_KLINES_PER_REQUEST = 1000
+
 
 class BybitService:
-    def __init__(self, base_url: str | None = None):
+    def __init__(self, base_url: str | None = None, client: httpx.AsyncClient | None = None):
         self.base_url = str(base_url or settings.bybit_base_url)
-        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=30)
+        self._client = client or clients.http("bybit", base_url=self.base_url, timeout=30)
 
-    async def close(self):
-        await self._client.aclose()
+    async def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """The newest ``limit`` candles of [start, end], oldest first, paged past the per-request cap."""
+        candles: list[dict[str, Any]] = []
+        while len(candles) < limit:
+            wanted = min(limit - len(candles), MAX_KLINES_PER_REQUEST)
+            page = await self._get_page(symbol, interval, wanted, start, end)
+            candles = page + candles
+            if len(page) < wanted:
+                break
+            end = page[0]["timestamp"] - 1
+        return candles
 
-    async def get_klines(self, symbol: str, interval: str, limit: int) -> list[dict[str, Any]]:
-        # Bybit v5: GET /v5/market/kline
+    async def _get_page(
+        self, symbol: str, interval: str, limit: int, start: int | None, end: int | None,
+    ) -> list[dict[str, Any]]:
+        # Bybit v5: GET /v5/market/kline (at most 1000 rows, newest first; start/end are ms timestamps)
         params = {
             "category": "linear",
             "symbol": symbol,
             "interval": interval,
             "limit": str(limit),
         }
-        r = await self._client.get("/v5/market/kline", params=params)
-        r.raise_for_status()
-        data = r.json()
+        if start is not None:
+            params["start"] = str(start)
+        if end is not None:
+            params["end"] = str(end)
+        async def request() -> Any:
+            async with limiter("bybit"):
+                r = await self._client.get("/v5/market/kline", params=params)
+            r.raise_for_status()
+            return r.json()
+
+        # Fails fast while Bybit keeps failing instead of every agent waiting out the timeout
+        data = await breaker("bybit:kline").call(request)
         result = data.get("result", {})
         list_data = result.get("list", [])
         candles: list[dict[str, Any]] = []
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Iterable
+
+import httpx
+import websockets
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.services.bybit import BybitService
+from app.services.candle_store import CandleStore, interval_ms
+from app.services.http_clients import clients
+from app.services.indicator_state import IndicatorState, IndicatorStateStore
+from app.services.indicators import IndicatorSpec
+from app.services.resilience import CircuitOpen
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+OnClose = Callable[[dict[str, Any], IndicatorState], Awaitable[None]]
+
+
+def _parse_kline(item: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "timestamp": int(item["start"]),
+        "open": float(item["open"]),
+        "high": float(item["high"]),
+        "low": float(item["low"]),
+        "close": float(item["close"]),
+        "volume": float(item["volume"]),
+    }
+
+
+class BybitKlineStream:
+    """Consumes the public kline WebSocket and advances indicator state on every closed candle.
+
+    Closed candles are written to the candle store, and the state is saved to Redis after
+    each one, for rounds to read and for the next process to resume from. It covers
+    ``specs`` plus every spec rounds have registered, and is re-seeded from the store when
+    that set changes or candles were missed while disconnected.
+    """
+
+    def __init__(
+        self,
+        specs: Iterable[IndicatorSpec],
+        symbol: str | None = None,
+        interval: str | None = None,
+        url: str | None = None,
+        store: CandleStore | None = None,
+        states: IndicatorStateStore | None = None,
+        on_close: OnClose | None = None,
+    ):
+        self.specs = frozenset(specs)
+        self.symbol = symbol or settings.bybit_symbol
+        self.interval = interval or settings.bybit_interval
+        self.url = url or settings.bybit_ws_url
+        self._store = store or CandleStore(clients.redis(), BybitService())
+        self._states = states or IndicatorStateStore(clients.redis(), self.symbol, self.interval)
+        self._on_close = on_close
+        self.state: IndicatorState | None = None
+
+    @property
+    def topic(self) -> str:
+        return f"kline.{self.interval}.{self.symbol}"
+
+    async def seed_state(self, specs: Iterable[IndicatorSpec], before: int) -> IndicatorState:
+        # One-off O(history) replay of the candles before ``before``; afterwards every candle costs O(1)
+        state = IndicatorState(specs)
+        candles = await self._store.get_klines(self.symbol, self.interval, settings.bybit_lookback_candles)
+        for c in candles:
+            if c["timestamp"] >= before:
+                break
+            state.update(c["timestamp"], c["close"])
+        return state
+
+    async def _prepare(self, candle: dict[str, Any]) -> None:
+        if self.state is None:
+            # Resume from the last process's state; checked like any other below
+            self.state = await self._states.load()
+        specs = self.specs | await self._states.tracked()
+        state = self.state
+        step = interval_ms(self.interval)
+        if (
+            state is None
+            or state.last_timestamp is None
+            or state.states.keys() != specs
+            or (step is not None and candle["timestamp"] > state.last_timestamp + step)
+        ):
+            # New spec set, or candles missed while disconnected: rebuild from the (gap-filling) store
+            self.state = await self.seed_state(specs, before=candle["timestamp"])
+
+    async def handle_message(self, message: dict[str, Any]) -> None:
+        if message.get("topic") != self.topic:
+            return
+        for item in message.get("data", []):
+            if not item.get("confirm"):
+                continue
+            candle = _parse_kline(item)
+            await self._store.save(self.symbol, self.interval, [candle])
+            await self._prepare(candle)
+            if not self.state.update(candle["timestamp"], candle["close"]):
+                continue
+            await self._states.save(self.state)
+            if self._on_close is not None:
+                await self._on_close(candle, self.state)
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        stop = stop or asyncio.Event()
+        backoff = 1.0
+        while not stop.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    await ws.send(json.dumps({"op": "subscribe", "args": [self.topic]}))
+                    backoff = 1.0
+                    heartbeat = asyncio.create_task(self._heartbeat(ws))
+                    try:
+                        async for raw in ws:
+                            await self.handle_message(json.loads(raw))
+                            if stop.is_set():
+                                break
+                    finally:
+                        heartbeat.cancel()
+            except (OSError, websockets.WebSocketException, RedisError, httpx.HTTPError, CircuitOpen):
+                # Store or seed failures too: the stream must outlive Redis and Bybit REST outages
+                logger.warning("kline stream disconnected, retrying in %.0fs", backoff, exc_info=True)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    @staticmethod
+    async def _heartbeat(ws) -> None:
+        # Bybit drops public connections without an application-level ping every ~20s
+        while True:
+            await asyncio.sleep(20)
+            await ws.send(json.dumps({"op": "ping"}))
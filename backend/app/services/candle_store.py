@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+from app.services.bybit import BybitService
+
+
+settings = get_settings()
+
+
+_MINUTE_MS = 60_000
+# Monthly candles have no fixed width; they are always fetched in full
+_FIXED_INTERVALS_MS: dict[str, int] = {
+    **{m: int(m) * _MINUTE_MS for m in ("1", "3", "5", "15", "30", "60", "120", "240", "360", "720")},
+    "D": 1440 * _MINUTE_MS,
+    "W": 7 * 1440 * _MINUTE_MS,
+}
+
+
+def interval_ms(interval: str) -> int | None:
+    return _FIXED_INTERVALS_MS.get(interval)
+
+
+class CandleStore:
+    """Kline history kept in a Redis sorted set per symbol/interval (score = candle start ms).
+
+    Only candles at or after the last stored timestamp are requested from Bybit, so the
+    still-open last candle is re-fetched and overwritten on every call.
+    """
+
+    def __init__(self, redis: Redis, bybit: BybitService, max_candles: int | None = None):
+        self._redis = redis
+        self._bybit = bybit
+        self._max_candles = max_candles or settings.kline_store_max_candles
+
+    @staticmethod
+    def _key(symbol: str, interval: str) -> str:
+        return f"klines:{symbol}:{interval}"
+
+    async def get_klines(self, symbol: str, interval: str, limit: int) -> list[dict[str, Any]]:
+        step = interval_ms(interval)
+        if step is None or limit > self._max_candles:
+            return await self._bybit.get_klines(symbol, interval, limit)
+
+        key = self._key(symbol, interval)
+        last = await self._redis.zrange(key, -1, -1, withscores=True)
+        now_ms = int(time.time() * 1000)
+        if not last or (now_ms - int(last[0][1])) // step >= limit:
+            # Empty or too stale to be worth patching: pull the window in full
+            await self._save(key, await self._bybit.get_klines(symbol, interval, limit))
+        else:
+            await self._save(key, await self._fetch_range(symbol, interval, int(last[0][1]), now_ms, step))
+
+        rows = await self._load(key, limit)
+        if len(rows) < limit:
+            # History shorter than requested: extend it backwards once
+            end = rows[0]["timestamp"] - 1 if rows else None
+            await self._save(key, await self._bybit.get_klines(symbol, interval, limit - len(rows), end=end))
+            rows = await self._load(key, limit)
+
+        gaps = self._find_gaps(rows, step)
+        if gaps:
+            for start, end in gaps:
+                await self._save(key, await self._fetch_range(symbol, interval, start, end, step))
+            rows = await self._load(key, limit)
+        return rows
+
+    async def stored_klines(self, symbol: str, interval: str, limit: int) -> list[dict[str, Any]]:
+        """The stored tail of the history, without contacting Bybit."""
+        return await self._load(self._key(symbol, interval), limit)
+
+    async def save(self, symbol: str, interval: str, candles: list[dict[str, Any]]) -> None:
+        await self._save(self._key(symbol, interval), candles)
+
+    async def _fetch_range(self, symbol: str, interval: str, start: int, end: int, step: int) -> list[dict[str, Any]]:
+        return await self._bybit.get_klines(symbol, interval, (end - start) // step + 1, start=start, end=end)
+
+    async def _save(self, key: str, candles: list[dict[str, Any]]) -> None:
+        if not candles:
+            return
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for c in candles:
+                ts = c["timestamp"]
+                # Replace rather than add: the open candle changes between fetches
+                pipe.zremrangebyscore(key, ts, ts)
+                pipe.zadd(key, {json.dumps(c, separators=(",", ":")): ts})
+            pipe.zremrangebyrank(key, 0, -(self._max_candles + 1))
+            await pipe.execute()
+
+    async def _load(self, key: str, limit: int) -> list[dict[str, Any]]:
+        members = await self._redis.zrange(key, -limit, -1)
+        return [json.loads(m) for m in members]
+
+    @staticmethod
+    def _find_gaps(rows: list[dict[str, Any]], step: int) -> list[tuple[int, int]]:
+        gaps: list[tuple[int, int]] = []
+        for prev, cur in zip(rows, rows[1:]):
+            if cur["timestamp"] - prev["timestamp"] > step:
+                gaps.append((prev["timestamp"] + step, cur["timestamp"] - step))
+        return gaps
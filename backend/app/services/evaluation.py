@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any, Sequence
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.backtest import BacktestConfig, BacktestResult, backtest_close
+from app.services.market_data import Candles
+
+if TYPE_CHECKING:
+    from app.agents.rules import TechnicalRules
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable handle to a read-only array living in a shared memory block."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    def attach(self) -> tuple[SharedMemory, np.ndarray]:
+        # The parent owns and unlinks the block. Spawned workers share its resource
+        # tracker, where the block is already registered, so attaching must not unregister it
+        if sys.version_info >= (3, 13):
+            shm = SharedMemory(name=self.name, track=False)
+        else:
+            shm = SharedMemory(name=self.name)
+        arr = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+        arr.flags.writeable = False
+        return shm, arr
+
+
+def _evaluate_shard(close: SharedArray, interval: str, rules: list["TechnicalRules"], config: BacktestConfig) -> list[BacktestResult]:
+    shm, arr = close.attach()
+    try:
+        return backtest_close(arr, interval, rules, config)
+    finally:
+        del arr
+        shm.close()
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _workers() -> int:
+    return settings.eval_workers or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if multiprocessing.current_process().daemon:
+                # Celery prefork children cannot have children: they use the eval_queue worker
+                return None
+            # spawn: the parent runs an event loop and client threads that must not be forked
+            _pool = ProcessPoolExecutor(max_workers=_workers(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _shards(rules: list["TechnicalRules"], count: int) -> list[list["TechnicalRules"]]:
+    # Neighbouring rule sets share indicator specs, so contiguous shards recompute little
+    ordered = sorted(rules, key=lambda r: (r.sma_slow, r.sma_fast, r.macd, r.rsi_length))
+    size = -(-len(ordered) // count)
+    return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+
+def evaluate_close(close: np.ndarray, interval: str, rules: Sequence["TechnicalRules"], config: BacktestConfig) -> list[BacktestResult]:
+    """Backtest every rule set over ``close``, sharded across this process's pool.
+
+    ``close`` is copied once into shared memory; each task only pickles its rule sets.
+    Small populations, or processes that cannot start workers, are evaluated inline.
+    """
+    unique = list(dict.fromkeys(rules))
+    count = min(_workers(), len(unique) // max(settings.eval_min_shard_size, 1))
+    pool = _get_pool() if count > 1 else None
+    if pool is None:
+        return backtest_close(close, interval, rules, config)
+
+    close = np.ascontiguousarray(close)
+    shm = SharedMemory(create=True, size=max(close.nbytes, 1))
+    try:
+        np.ndarray(close.shape, dtype=close.dtype, buffer=shm.buf)[:] = close
+        handle = SharedArray(shm.name, close.shape, close.dtype.str)
+        shards = _shards(unique, count)
+        futures = [pool.submit(_evaluate_shard, handle, interval, shard, config) for shard in shards]
+        results = [f.result() for f in futures]
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed): start a fresh pool next time, finish this one inline
+        logger.warning("evaluation pool broken, evaluating in-process", exc_info=True)
+        shutdown_pool()
+        return backtest_close(close, interval, rules, config)
+    finally:
+        shm.close()
+        shm.unlink()
+    by_rules = {r: result for shard, shard_results in zip(shards, results) for r, result in zip(shard, shard_results)}
+    return [by_rules[r] for r in rules]
+
+
+def evaluation_payload(candles: Candles, rules: Sequence["TechnicalRules"], config: BacktestConfig) -> dict[str, Any]:
+    return {
+        "close": candles.close.tolist(),
+        "interval": candles.interval,
+        "rules": [asdict(r) for r in rules],
+        "config": asdict(config),
+    }
+
+
+def evaluate_payload(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """Evaluate an :func:`evaluation_payload` (JSON-safe both ways, for the eval_queue task)."""
+    from app.agents.rules import TechnicalRules
+
+    rules = [TechnicalRules(**{**r, "macd": tuple(r["macd"])}) for r in payload["rules"]]
+    close = np.asarray(payload["close"], dtype=np.float64)
+    results = evaluate_close(close, payload["interval"], rules, BacktestConfig(**payload["config"]))
+    return [result.as_dict() for result in results]
+
+
+async def _evaluate_remote(candles: Candles, rules: Sequence["TechnicalRules"], config: BacktestConfig) -> list[BacktestResult]:
+    from app.services.scheduler import evaluate_population_task
+
+    unique = list(dict.fromkeys(rules))
+    payload = evaluation_payload(candles, unique, config)
+    result = evaluate_population_task.apply_async(args=[payload], queue=settings.eval_queue)
+    try:
+        # Waited on in a thread: the round's event loop keeps serving its agents meanwhile
+        rows = await asyncio.to_thread(
+            result.get, timeout=settings.eval_remote_timeout_seconds, disable_sync_subtasks=False)
+    except BaseException:
+        result.revoke()
+        raise
+    by_rules = {r: BacktestResult(**row) for r, row in zip(unique, rows)}
+    return [by_rules[r] for r in rules]
+
+
+async def evaluate_population(candles: Candles, rules: Sequence["TechnicalRules"], config: BacktestConfig | None = None) -> list[BacktestResult]:
+    """Backtest every rule set, off the event loop.
+
+    With ``eval_queue`` set the population goes to the evaluation worker, whose single
+    process pool serves the whole node. If that fails or is not configured, it is
+    evaluated here: in this process's pool, or inline in a thread where none can start.
+    """
+    config = config or BacktestConfig.from_settings()
+    if settings.eval_queue:
+        try:
+            return await _evaluate_remote(candles, rules, config)
+        except Exception:
+            logger.warning("evaluation worker unavailable, evaluating in-process", exc_info=True)
+    return await asyncio.to_thread(evaluate_close, candles.close, candles.interval, rules, config)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.agent import Round
+from app.models.news import Headline, RoundHeadline
+from app.services.news import NewsService
+from app.services.resilience import BackgroundRefresh
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+_SHINGLE = 4
+_PRIME = (1 << 31) - 1
+# Namespace for the single-key advisory lock taken while ingesting a round's headlines
+_INGEST_LOCK = 0x6E657773 << 32
+# The feed fetch outlives a round that stopped waiting for it
+_refresh = BackgroundRefresh()
+
+
+def normalize_title(title: str) -> str:
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub(" ", title.lower())).strip()
+
+
+def content_hash(title: str) -> str:
+    return hashlib.sha256(normalize_title(title).encode("utf-8")).hexdigest()
+
+
+class MinHasher:
+    """MinHash signatures over character shingles of normalized titles.
+
+    The share of equal signature slots estimates the Jaccard similarity of two
+    titles' shingle sets, so reworded copies of one story score close to 1.
+    """
+
+    def __init__(self, permutations: int | None = None, seed: int = 1):
+        n = permutations or settings.news_minhash_permutations
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, n, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, _PRIME, n, dtype=np.uint64)[:, None]
+
+    def signature(self, title: str) -> np.ndarray:
+        norm = normalize_title(title)
+        shingles = {norm[i:i + _SHINGLE] for i in range(max(len(norm) - _SHINGLE + 1, 1))}
+        x = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") % _PRIME
+             for s in shingles),
+            dtype=np.uint64, count=len(shingles),
+        )
+        return ((self._a * x + self._b) % _PRIME).min(axis=1)
+
+    def signatures(self, titles: list[str]) -> np.ndarray:
+        if not titles:
+            return np.empty((0, len(self._a)), dtype=np.uint64)
+        return np.stack([self.signature(t) for t in titles])
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of every row of ``a`` with every row of ``b``."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+    return (a[:, None, :] == b[None, :, :]).mean(axis=2)
+
+
+def collapse_near_duplicates(signatures: np.ndarray, threshold: float) -> list[list[int]]:
+    """Group rows into clusters of near-duplicates, in input order.
+
+    Each cluster starts with its first (newest, for a feed) member, which is the one
+    kept; later rows join the first earlier cluster head they resemble.
+    """
+    sims = similarity(signatures, signatures)
+    clusters: list[list[int]] = []
+    for i in range(len(signatures)):
+        for cluster in clusters:
+            if sims[i, cluster[0]] >= threshold:
+                cluster.append(i)
+                break
+        else:
+            clusters.append([i])
+    return clusters
+
+
+def _as_dict(h: Headline, rh: RoundHeadline) -> dict[str, Any]:
+    return {
+        "title": h.title,
+        "url": h.url,
+        "source": h.source,
+        "published_at": h.published_at,
+        "is_new": rh.is_new,
+        "duplicates": rh.duplicates,
+    }
+
+
+async def _load_round(db: AsyncSession, round_id: int) -> list[dict[str, Any]] | None:
+    rows = (await db.execute(
+        select(Headline, RoundHeadline)
+        .join(RoundHeadline, RoundHeadline.headline_id == Headline.id)
+        .where(RoundHeadline.round_id == round_id)
+        .order_by(RoundHeadline.position)
+    )).all()
+    return [_as_dict(h, rh) for h, rh in rows] if rows else None
+
+
+async def _previous_round(db: AsyncSession, round_id: int) -> list[dict[str, Any]] | None:
+    """The latest earlier round's headlines, marked stale, for when the feed is down."""
+    prev = (await db.execute(
+        select(RoundHeadline.round_id).where(RoundHeadline.round_id < round_id)
+        .order_by(RoundHeadline.round_id.desc()).limit(1)
+    )).scalar()
+    if prev is None:
+        return None
+    started_at = (await db.execute(select(Round.started_at).where(Round.id == prev))).scalar()
+    as_of = started_at.isoformat() if started_at else str(prev)
+    return [{**h, "is_new": False, "stale_as_of": as_of} for h in await _load_round(db, prev) or []] or None
+
+
+async def round_headlines(db: AsyncSession, round_id: int, news: NewsService | None = None) -> list[dict[str, Any]]:
+    """The round's headlines, fetched and stored by the first caller in the round.
+
+    Later callers (other shards, retries) read the stored set instead of refetching.
+    Headlines are de-duplicated by content hash and by MinHash similarity, and marked
+    ``is_new`` unless they (or a near-duplicate) were seen in an earlier round.
+    """
+    stored = await _load_round(db, round_id)
+    if stored is not None:
+        return stored
+    # Serialize ingestion per round; released at commit
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _INGEST_LOCK | round_id})
+    stored = await _load_round(db, round_id)
+    if stored is not None:
+        await db.commit()
+        return stored
+
+    news = news or NewsService()
+
+    def fetch():
+        return news.get_headlines(limit=settings.news_fetch_limit)
+
+    try:
+        raw = await _refresh.fetch("feed", fetch, settings.upstream_fresh_deadline_seconds)
+    except Exception as exc:
+        stale = await _previous_round(db, round_id)
+        await db.commit()
+        if stale is not None:
+            # Not stored for this round, so a later shard or retry tries the feed again
+            logger.warning("serving round %s the previous headlines as of %s: %r",
+                           round_id, stale[0]["stale_as_of"], exc)
+            return stale
+        if not isinstance(exc, asyncio.TimeoutError):
+            logger.warning("headline fetch failed: %r", exc)
+            return []
+        # Nothing to fall back on: wait for the fetch after all
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _INGEST_LOCK | round_id})
+        stored = await _load_round(db, round_id)
+        if stored is not None:
+            # Another shard ingested the round while the lock was released
+            await db.commit()
+            return stored
+        try:
+            raw = await _refresh.fetch("feed", fetch)
+        except Exception:
+            logger.warning("headline fetch failed", exc_info=True)
+            await db.commit()
+            return []
+    items: dict[str, dict[str, Any]] = {}
+    for item in raw:
+        title = (item.get("title") or "").strip()
+        if title:
+            items.setdefault(content_hash(title), {**item, "title": title})
+    if not items:
+        await db.commit()
+        return []
+
+    hashes = list(items)
+    known = set((await db.execute(
+        select(Headline.content_hash).where(Headline.content_hash.in_(hashes))
+    )).scalars())
+    fresh = [
+        {"content_hash": h, "title": items[h]["title"], "url": items[h].get("url"),
+         "source": items[h].get("source"), "published_at": items[h].get("published_at"),
+         "first_seen_at": datetime.utcnow(), "first_round_id": round_id}
+        for h in hashes if h not in known
+    ]
+    if fresh:
+        await db.execute(pg_insert(Headline).values(fresh).on_conflict_do_nothing(index_elements=["content_hash"]))
+    ids = dict((await db.execute(
+        select(Headline.content_hash, Headline.id).where(Headline.content_hash.in_(hashes))
+    )).all())
+
+    hasher = MinHasher()
+    signatures = hasher.signatures([items[h]["title"] for h in hashes])
+    threshold = settings.news_dedup_threshold
+    # Stories from earlier rounds: a reworded copy of one is not news
+    since = datetime.utcnow() - timedelta(hours=settings.news_dedup_lookback_hours)
+    earlier = list((await db.execute(
+        select(Headline.title)
+        .where(Headline.first_seen_at >= since, Headline.content_hash.notin_(hashes))
+        .order_by(Headline.id.desc())
+        .limit(settings.news_dedup_lookback_max)
+    )).scalars())
+    seen_before = similarity(signatures, hasher.signatures(earlier)).max(axis=1, initial=0.0) >= threshold
+
+    clusters = collapse_near_duplicates(signatures, threshold)[: settings.news_prompt_headlines]
+    rows = []
+    for position, cluster in enumerate(clusters):
+        head = hashes[cluster[0]]
+        rows.append({
+            "round_id": round_id,
+            "headline_id": ids[head],
+            "position": position,
+            "is_new": all(hashes[i] not in known and not seen_before[i] for i in cluster),
+            "duplicates": len(cluster) - 1,
+        })
+    await db.execute(pg_insert(RoundHeadline).values(rows).on_conflict_do_nothing())
+    await db.commit()
+    logger.info(
+        "round %s headlines: %d fetched, %d distinct, %d after near-duplicate collapse, %d new",
+        round_id, len(raw), len(hashes), len(clusters), sum(r["is_new"] for r in rows),
+    )
+    return await _load_round(db, round_id) or []
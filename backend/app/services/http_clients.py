@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import httpx
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+
+
+settings = get_settings()
+
+
+class ClientRegistry:
+    """Process-wide pool of long-lived upstream clients.
+
+    Clients are created lazily on first use and closed by the FastAPI lifespan or the
+    Celery worker shutdown hook. They are bound to the event loop that first uses them,
+    so each process must keep a single loop for its lifetime.
+    """
+
+    def __init__(self):
+        self._http: dict[tuple[str, str | None], httpx.AsyncClient] = {}
+        self._redis: Redis | None = None
+
+    def http(self, name: str, base_url: str | None = None, timeout: float = 30.0) -> httpx.AsyncClient:
+        key = (name, base_url)
+        client = self._http.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url or "",
+                timeout=timeout,
+                http2=settings.http2_enabled,
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+            )
+            self._http[key] = client
+        return client
+
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = Redis.from_url(settings.redis_url)
+        return self._redis
+
+    async def aclose(self) -> None:
+        clients, self._http = list(self._http.values()), {}
+        for client in clients:
+            await client.aclose()
+        if self._redis is not None:
+            redis, self._redis = self._redis, None
+            await redis.aclose()
+
+
+clients = ClientRegistry()
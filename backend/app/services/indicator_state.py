@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Iterable
+
+import numpy as np
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+from app.services.indicators import IndicatorSpec
+
+if TYPE_CHECKING:
+    from app.services.market_data import Candles
+
+
+settings = get_settings()
+
+
+# Incremental counterparts of app.services.indicators: each update is O(1) and the
+# values match the batch engine run over the same closes. ``peek`` is the value one
+# more close would give, without applying it.
+
+
+class EmaState:
+    def __init__(self, length: int, alpha: float | None = None):
+        self.length = length
+        self.alpha = alpha if alpha is not None else 2.0 / (length + 1.0)
+        self.mean: float | None = None
+        self.count = 0
+
+    def next_mean(self, x: float) -> float:
+        return x if self.mean is None else self.mean + self.alpha * (x - self.mean)
+
+    def update(self, x: float) -> float:
+        self.mean = self.next_mean(x)
+        self.count += 1
+        return self.mean
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.length
+
+    @property
+    def value(self) -> float:
+        return self.mean if self.ready and self.mean is not None else math.nan
+
+    def peek(self, x: float) -> float:
+        return self.next_mean(x) if self.count + 1 >= self.length else math.nan
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"mean": self.mean, "count": self.count}
+
+    def load(self, data: dict[str, Any]) -> None:
+        self.mean = data["mean"]
+        self.count = data["count"]
+
+
+class SmaState:
+    def __init__(self, length: int):
+        self.length = length
+        self.window: deque[float] = deque(maxlen=length)
+        self.total = 0.0
+
+    def update(self, x: float) -> float:
+        if len(self.window) == self.length:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.total / self.length if len(self.window) == self.length else math.nan
+
+    def peek(self, x: float) -> float:
+        if len(self.window) < self.length - 1:
+            return math.nan
+        dropped = self.window[0] if len(self.window) == self.length else 0.0
+        return (self.total - dropped + x) / self.length
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"window": list(self.window)}
+
+    def load(self, data: dict[str, Any]) -> None:
+        self.window = deque(data["window"], maxlen=self.length)
+        self.total = float(sum(self.window))
+
+
+class RsiState:
+    """Wilder RSI: gains and losses smoothed with alpha = 1/length."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.prev_close: float | None = None
+        self.avg_gain = EmaState(length, alpha=1.0 / length)
+        self.avg_loss = EmaState(length, alpha=1.0 / length)
+
+    def update(self, close: float) -> float:
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.avg_gain.update(max(delta, 0.0))
+        self.avg_loss.update(max(-delta, 0.0))
+        return self.value
+
+    @staticmethod
+    def _rsi(gain: float, loss: float) -> float:
+        return 100.0 - 100.0 / (1.0 + gain / (loss + 1e-9))
+
+    @property
+    def value(self) -> float:
+        # The batch engine masks the first `length` bars
+        if self.avg_gain.count <= self.length:
+            return math.nan
+        return self._rsi(self.avg_gain.mean, self.avg_loss.mean)
+
+    def peek(self, close: float) -> float:
+        if self.avg_gain.count + 1 <= self.length:
+            return math.nan
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        return self._rsi(self.avg_gain.next_mean(max(delta, 0.0)), self.avg_loss.next_mean(max(-delta, 0.0)))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"prev_close": self.prev_close, "gain": self.avg_gain.to_dict(), "loss": self.avg_loss.to_dict()}
+
+    def load(self, data: dict[str, Any]) -> None:
+        self.prev_close = data["prev_close"]
+        self.avg_gain.load(data["gain"])
+        self.avg_loss.load(data["loss"])
+
+
+class MacdState:
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.fast = EmaState(fast)
+        self.slow = EmaState(slow)
+        self.signal = EmaState(signal)
+
+    def update(self, close: float) -> tuple[float, float]:
+        line = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(line)
+        return self.value
+
+    def _masked(self, line: float, signal: float, count: int) -> tuple[float, float]:
+        return (line if count >= self.slow.length else math.nan,
+                signal if count >= self.slow.length + self.signal.length - 1 else math.nan)
+
+    @property
+    def value(self) -> tuple[float, float]:
+        if self.slow.mean is None:
+            return math.nan, math.nan
+        return self._masked(self.fast.mean - self.slow.mean, self.signal.mean, self.slow.count)
+
+    def peek(self, close: float) -> tuple[float, float]:
+        line = self.fast.next_mean(close) - self.slow.next_mean(close)
+        return self._masked(line, self.signal.next_mean(line), self.slow.count + 1)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"fast": self.fast.to_dict(), "slow": self.slow.to_dict(), "signal": self.signal.to_dict()}
+
+    def load(self, data: dict[str, Any]) -> None:
+        self.fast.load(data["fast"])
+        self.slow.load(data["slow"])
+        self.signal.load(data["signal"])
+
+
+def _new_state(spec: IndicatorSpec):
+    if spec.kind == "sma":
+        return SmaState(*spec.params)
+    if spec.kind == "ema":
+        return EmaState(*spec.params)
+    if spec.kind == "rsi":
+        return RsiState(*spec.params)
+    return MacdState(*spec.params)
+
+
+def _spec_key(spec: IndicatorSpec) -> str:
+    return f"{spec.kind}:" + ",".join(str(p) for p in spec.params)
+
+
+def _parse_spec(key: str) -> IndicatorSpec:
+    kind, params = key.split(":")
+    return IndicatorSpec(kind, tuple(int(p) for p in params.split(",")))  # type: ignore[arg-type]
+
+
+class IndicatorState:
+    """Latest value of a set of indicators, advanced one closed candle at a time.
+
+    The values before the last update are kept as well, so a round can read the last two
+    bars (what its MACD cross check looks at) without the history.
+    """
+
+    def __init__(self, specs: Iterable[IndicatorSpec]):
+        self.states = {spec: _new_state(spec) for spec in sorted(set(specs))}
+        self.last_timestamp: int | None = None
+        self.last_close: float | None = None
+        self.previous: tuple[float, dict[IndicatorSpec, Any]] | None = None
+
+    def update(self, timestamp: int, close: float) -> bool:
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+        if self.last_close is not None:
+            self.previous = (self.last_close, self.values())
+        for state in self.states.values():
+            state.update(close)
+        self.last_timestamp = timestamp
+        self.last_close = close
+        return True
+
+    def values(self) -> dict[IndicatorSpec, Any]:
+        return {spec: state.value for spec, state in self.states.items()}
+
+    def bars(self, specs: Iterable[IndicatorSpec], candles: "Candles") -> tuple[np.ndarray, dict[IndicatorSpec, np.ndarray]] | None:
+        """The last two bars of ``candles`` as (close, values) arrays shaped like the batch engine's.
+
+        ``candles`` may end with the candle this state last applied, or with the still-open
+        one after it, which is peeked at. None if the state covers neither or lacks a spec.
+        """
+        specs = set(specs)
+        if len(candles) < 2 or self.last_close is None or not specs <= self.states.keys():
+            return None
+        if int(candles.timestamp[-1]) == self.last_timestamp and self.previous is not None:
+            prev_close, prev_values = self.previous
+            closes = (prev_close, self.last_close)
+            rows = {spec: (prev_values[spec], self.states[spec].value) for spec in specs}
+        elif int(candles.timestamp[-2]) == self.last_timestamp:
+            close = float(candles.close[-1])
+            closes = (self.last_close, close)
+            rows = {spec: (self.states[spec].value, self.states[spec].peek(close)) for spec in specs}
+        else:
+            return None
+        # MACD pairs become (2, 2): line and signal rows, like the batch engine's (2, T)
+        return np.array(closes), {spec: np.array(pair, dtype=np.float64).T for spec, pair in rows.items()}
+
+    def to_dict(self) -> dict[str, Any]:
+        previous = None
+        if self.previous is not None:
+            close, values = self.previous
+            previous = {"close": close, "values": {_spec_key(spec): value for spec, value in values.items()}}
+        return {
+            "last_timestamp": self.last_timestamp,
+            "last_close": self.last_close,
+            "previous": previous,
+            "states": {_spec_key(spec): state.to_dict() for spec, state in self.states.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "IndicatorState":
+        saved = data["states"]
+        obj = cls(_parse_spec(key) for key in saved)
+        for spec, state in obj.states.items():
+            state.load(saved[_spec_key(spec)])
+        obj.last_timestamp = data["last_timestamp"]
+        obj.last_close = data["last_close"]
+        if data["previous"] is not None:
+            values = {_parse_spec(key): tuple(v) if isinstance(v, list) else v
+                      for key, v in data["previous"]["values"].items()}
+            obj.previous = (data["previous"]["close"], values)
+        return obj
+
+
+class IndicatorStateStore:
+    """Streamed indicator state of one symbol/interval, shared through Redis.
+
+    The stream service saves the state after every closed candle. Rounds register the
+    specs their agents use with :meth:`track` and read the state instead of recomputing
+    their window; specs no round asked for within ``indicator_spec_ttl_seconds`` are dropped.
+    """
+
+    def __init__(self, redis: Redis, symbol: str | None = None, interval: str | None = None):
+        self._redis = redis
+        symbol = symbol or settings.bybit_symbol
+        interval = interval or settings.bybit_interval
+        self.state_key = f"indicator_state:{symbol}:{interval}"
+        self.specs_key = f"indicator_specs:{symbol}:{interval}"
+
+    async def load(self) -> IndicatorState | None:
+        raw = await self._redis.get(self.state_key)
+        return IndicatorState.from_dict(json.loads(raw)) if raw else None
+
+    async def save(self, state: IndicatorState) -> None:
+        await self._redis.set(self.state_key, json.dumps(state.to_dict()))
+
+    async def track(self, specs: Iterable[IndicatorSpec]) -> None:
+        now = time.time()
+        mapping = {_spec_key(spec): now for spec in specs}
+        if mapping:
+            await self._redis.zadd(self.specs_key, mapping)
+
+    async def tracked(self) -> set[IndicatorSpec]:
+        await self._redis.zremrangebyscore(self.specs_key, "-inf", time.time() - settings.indicator_spec_ttl_seconds)
+        return {_parse_spec(m.decode() if isinstance(m, bytes) else m) for m in await self._redis.zrange(self.specs_key, 0, -1)}
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Literal
+
+import numpy as np
+
+from app.services.market_data import Candles
+
+
+IndicatorKind = Literal["sma", "ema", "rsi", "macd"]
+
+
+@dataclass(frozen=True, order=True)
+class IndicatorSpec:
+    kind: IndicatorKind
+    params: tuple[int, ...]
+
+    @classmethod
+    def sma(cls, length: int) -> "IndicatorSpec":
+        return cls("sma", (length,))
+
+    @classmethod
+    def ema(cls, length: int) -> "IndicatorSpec":
+        return cls("ema", (length,))
+
+    @classmethod
+    def rsi(cls, length: int) -> "IndicatorSpec":
+        return cls("rsi", (length,))
+
+    @classmethod
+    def macd(cls, fast: int, slow: int, signal: int) -> "IndicatorSpec":
+        return cls("macd", (fast, slow, signal))
+
+
+def _ema_rows(x: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    """Recursive EMA of every row of ``x`` at once, each row with its own alpha.
+
+    The loop runs over time only; all series advance together in one vector op.
+    """
+    out = np.empty_like(x)
+    out[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        prev = out[:, t - 1]
+        out[:, t] = prev + alpha * (x[:, t] - prev)
+    return out
+
+
+def _mask_warmup(values: np.ndarray, warmup: np.ndarray) -> np.ndarray:
+    idx = np.arange(values.shape[-1])
+    values[idx[None, :] < warmup[:, None]] = np.nan
+    return values
+
+
+def compute_indicators(close: np.ndarray, specs: Iterable[IndicatorSpec]) -> dict[IndicatorSpec, np.ndarray]:
+    """Compute all ``specs`` over ``close`` in a single batched pass.
+
+    SMAs share one cumulative sum, EMAs/RSIs/MACDs of every length are stacked into
+    matrices and smoothed together. MACD results have shape (2, T): line and signal.
+    """
+    specs = sorted(set(specs))
+    n = close.shape[0]
+    out: dict[IndicatorSpec, np.ndarray] = {}
+    if n == 0 or not specs:
+        return {s: np.full(n, np.nan) for s in specs}
+
+    sma_specs = [s for s in specs if s.kind == "sma"]
+    if sma_specs:
+        csum = np.concatenate(([0.0], np.cumsum(close)))
+        for s in sma_specs:
+            length = s.params[0]
+            values = np.full(n, np.nan)
+            if length <= n:
+                values[length - 1:] = (csum[length:] - csum[:-length]) / length
+            out[s] = values
+
+    # EMA spans needed directly and by MACD legs
+    macd_specs = [s for s in specs if s.kind == "macd"]
+    spans = sorted({s.params[0] for s in specs if s.kind == "ema"}
+                   | {p for s in macd_specs for p in s.params[:2]})
+    ema_rows: dict[int, np.ndarray] = {}
+    if spans:
+        lengths = np.array(spans, dtype=np.float64)
+        smoothed = _ema_rows(np.broadcast_to(close, (len(spans), n)).copy(), 2.0 / (lengths + 1.0))
+        ema_rows = {span: smoothed[i] for i, span in enumerate(spans)}
+        for s in specs:
+            if s.kind == "ema":
+                values = ema_rows[s.params[0]].copy()
+                values[: s.params[0] - 1] = np.nan
+                out[s] = values
+
+    if macd_specs:
+        lines = np.stack([ema_rows[s.params[0]] - ema_rows[s.params[1]] for s in macd_specs])
+        signal_len = np.array([s.params[2] for s in macd_specs], dtype=np.float64)
+        signals = _ema_rows(lines, 2.0 / (signal_len + 1.0))
+        slow = np.array([s.params[1] for s in macd_specs])
+        lines = _mask_warmup(lines, slow - 1)
+        signals = _mask_warmup(signals, slow + signal_len.astype(int) - 2)
+        for i, s in enumerate(macd_specs):
+            out[s] = np.stack([lines[i], signals[i]])
+
+    rsi_specs = [s for s in specs if s.kind == "rsi"]
+    if rsi_specs:
+        delta = np.diff(close, prepend=close[0])
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        lengths = np.array([s.params[0] for s in rsi_specs])
+        k = len(rsi_specs)
+        # Wilder smoothing (alpha = 1/length) of gains and losses for every length together
+        stacked = np.concatenate([np.broadcast_to(gain, (k, n)), np.broadcast_to(loss, (k, n))])
+        smoothed = _ema_rows(stacked.copy(), np.tile(1.0 / lengths, 2))
+        avg_gain, avg_loss = smoothed[:k], smoothed[k:]
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / (avg_loss + 1e-9))
+        rsi = _mask_warmup(rsi, lengths)
+        for i, s in enumerate(rsi_specs):
+            out[s] = rsi[i]
+
+    return out
+
+
+class IndicatorEngine:
+    """Indicator cache keyed by (candle snapshot digest, spec).
+
+    Only specs missing from the cache are computed, in one batch per call.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self._max_entries = max_entries
+        self._cache: OrderedDict[tuple[str, IndicatorSpec], np.ndarray] = OrderedDict()
+
+    def compute(self, candles: Candles, specs: Iterable[IndicatorSpec]) -> dict[IndicatorSpec, np.ndarray]:
+        digest = candles.digest
+        result: dict[IndicatorSpec, np.ndarray] = {}
+        missing: list[IndicatorSpec] = []
+        for s in set(specs):
+            cached = self._cache.get((digest, s))
+            if cached is None:
+                missing.append(s)
+            else:
+                self._cache.move_to_end((digest, s))
+                result[s] = cached
+        if missing:
+            for spec, values in compute_indicators(candles.close, missing).items():
+                values.flags.writeable = False
+                self._cache[(digest, spec)] = values
+                result[spec] = values
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+
+indicator_engine = IndicatorEngine()
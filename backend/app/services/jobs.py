@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.services.http_clients import clients
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+JobStatus = Literal["queued", "running", "finished", "failed", "skipped", "coalesced"]
+TERMINAL_STATUSES = {"finished", "failed", "skipped", "coalesced"}
+
+
+def _key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def _events_key(job_id: str) -> str:
+    return f"job:{job_id}:events"
+
+
+class RoundJob:
+    """Status hash plus an event stream for one enqueued round.
+
+    Events go to a Redis stream rather than pub/sub, so a client that connects late
+    (or reconnects with Last-Event-ID) replays what it missed. Writes are best effort:
+    a Redis hiccup loses an update, never the round.
+    """
+
+    def __init__(self, job_id: str, redis: Redis | None = None):
+        self.id = job_id
+        self._redis = redis or clients.redis()
+
+    @classmethod
+    async def create(cls, name: str, job_id: str | None = None) -> "RoundJob":
+        job = cls(job_id or uuid.uuid4().hex)
+        await job._write({"status": "queued", "name": name, "created_at": datetime.utcnow().isoformat(),
+                          "round_id": "", "done": 0, "total": 0, "error": ""}, "status")
+        return job
+
+    async def set_status(self, status: JobStatus, **fields: Any) -> None:
+        await self._write({"status": status, **fields}, "status")
+
+    async def started(self, round_id: int, total: int) -> None:
+        await self.set_status("running", round_id=round_id, total=total, started_at=datetime.utcnow().isoformat())
+
+    async def agent_done(self, agent_id: int, signal: str, pnl: float) -> None:
+        try:
+            done = await self._redis.hincrby(_key(self.id), "done", 1)
+            await self._event("agent", {"agent_id": agent_id, "signal": signal, "pnl": pnl, "done": done})
+        except RedisError:
+            logger.warning("job %s progress update failed", self.id, exc_info=True)
+
+    async def _write(self, fields: dict[str, Any], event: str) -> None:
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.hset(_key(self.id), mapping=fields)
+                pipe.expire(_key(self.id), settings.job_ttl_seconds)
+                await pipe.execute()
+            await self._event(event, fields)
+        except RedisError:
+            logger.warning("job %s update failed", self.id, exc_info=True)
+
+    async def _event(self, event: str, data: dict[str, Any]) -> None:
+        key = _events_key(self.id)
+        await self._redis.xadd(key, {"event": event, "data": json.dumps(data, default=str)},
+                               maxlen=settings.job_events_max, approximate=True)
+        await self._redis.expire(key, settings.job_ttl_seconds)
+
+
+async def ensure_job(name: str, job_id: str) -> RoundJob:
+    """The job enqueued by the API, or a new one for rounds started by beat or a follow-up."""
+    try:
+        if await get_job(job_id) is not None:
+            return RoundJob(job_id)
+    except RedisError:
+        logger.warning("job lookup failed", exc_info=True)
+    return await RoundJob.create(name, job_id)
+
+
+async def get_job(job_id: str, redis: Redis | None = None) -> dict[str, Any] | None:
+    raw = await (redis or clients.redis()).hgetall(_key(job_id))
+    if not raw:
+        return None
+    job: dict[str, Any] = {k.decode(): v.decode() for k, v in raw.items()}
+    job["id"] = job_id
+    job["round_id"] = int(job["round_id"]) if job.get("round_id") else None
+    for key in ("done", "total"):
+        job[key] = int(job.get(key) or 0)
+    return job
+
+
+async def job_events(job_id: str, last_id: str = "0", redis: Redis | None = None) -> AsyncIterator[tuple[str, str, str] | None]:
+    """Yield ``(event id, event, json data)`` from ``last_id`` on until the job ends.
+
+    Yields None when nothing arrived within ``job_sse_keepalive_seconds`` so the caller
+    can send a keep-alive.
+    """
+    redis = redis or clients.redis()
+    key = _events_key(job_id)
+    while True:
+        batch = await redis.xread({key: last_id}, count=100, block=int(settings.job_sse_keepalive_seconds * 1000))
+        if not batch:
+            job = await get_job(job_id, redis)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                return
+            yield None
+            continue
+        for event_id, fields in batch[0][1]:
+            last_id = event_id.decode()
+            event, data = fields[b"event"].decode(), fields[b"data"].decode()
+            yield last_id, event, data
+            if event == "status" and json.loads(data).get("status") in TERMINAL_STATUSES:
+                return
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable
+
+
+class JsonFieldParser:
+    """Incremental scanner for the first JSON value in a streamed completion.
+
+    Text before the value (prose, code fences) is skipped. With ``fields`` the value is an
+    object; without, an object or an array of them. Scalar fields of the top-level object
+    are collected as soon as their value is complete, so a caller can stop reading once
+    the fields it needs are in (:attr:`complete`) or the value has closed (:attr:`closed`,
+    the parsed value in :attr:`value`). A bracketed span that is not such a value, like
+    ``[1]`` or ``{see below}`` in prose, is skipped. Malformed input never raises.
+    """
+
+    def __init__(self, fields: Iterable[str] = ()):
+        self.fields = frozenset(fields)
+        self.values: dict[str, Any] = {}
+        self.value: Any = None
+        self.closed = False
+        self._openers = "{" if self.fields else "{["
+        self._raw: list[str] = []
+        self._has_object = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buf: list[str] = []
+        self._literal: list[str] = []
+        self._last_string: str | None = None
+        self._key: str | None = None
+
+    @property
+    def complete(self) -> bool:
+        return self.closed or (bool(self.fields) and self.fields <= self.values.keys())
+
+    def feed(self, chunk: str) -> bool:
+        """Consume ``chunk``; True once :attr:`complete`."""
+        for ch in chunk:
+            if self.closed:
+                break
+            if self._depth == 0:
+                if ch in self._openers:
+                    self._depth = 1
+                    self._raw = [ch]
+                    self._has_object = ch == "{"
+                continue
+            self._raw.append(ch)
+            if self._in_string:
+                self._string_char(ch)
+            elif ch == '"':
+                self._end_literal()
+                self._in_string = True
+                self._buf = []
+            elif ch in "{[":
+                self._end_literal()
+                self._depth += 1
+                self._key = None
+                self._has_object = self._has_object or ch == "{"
+            elif ch in "}]":
+                self._end_literal()
+                self._depth -= 1
+                self._key = None
+                if self._depth == 0:
+                    self._close()
+            elif ch == ":":
+                self._key, self._last_string = self._last_string, None
+            elif ch == ",":
+                self._end_literal()
+                self._key = self._last_string = None
+            elif not ch.isspace():
+                self._literal.append(ch)
+            elif self._literal:
+                self._end_literal()
+        return self.complete
+
+    def _close(self) -> None:
+        try:
+            self.value = json.loads("".join(self._raw))
+        except ValueError:
+            self.value = None
+        if self._has_object and self.value is not None:
+            self.closed = True
+            return
+        # Not the answer: forget what it yielded and look for the next value
+        self.values = {}
+        self.value = None
+        self._raw = []
+        self._in_string = self._escape = False
+        self._literal = []
+        self._last_string = self._key = None
+
+    def _string_char(self, ch: str) -> None:
+        if self._escape:
+            self._buf.append("\\" + ch)
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            self._in_string = False
+            try:
+                value = json.loads('"' + "".join(self._buf) + '"')
+            except ValueError:
+                value = "".join(self._buf)
+            if self._key is not None:
+                self._set(value)
+            else:
+                self._last_string = value
+        else:
+            self._buf.append(ch)
+
+    def _end_literal(self) -> None:
+        if not self._literal:
+            return
+        raw, self._literal = "".join(self._literal), []
+        if self._key is None:
+            return
+        try:
+            self._set(json.loads(raw))
+        except ValueError:
+            self._key = None
+
+    def _set(self, value: Any) -> None:
+        # Only the top-level object's own fields; nested values are skipped
+        if self._depth == 1:
+            self.values.setdefault(self._key, value)
+        self._key = None
+
+
+def parse_fields(text: str, fields: Iterable[str]) -> dict[str, Any]:
+    parser = JsonFieldParser(fields)
+    parser.feed(text)
+    return parser.values
+
+
+def first_value(text: str) -> Any:
+    """The first JSON object, or array holding objects, in ``text``; None if there is none."""
+    parser = JsonFieldParser()
+    parser.feed(text)
+    return parser.value
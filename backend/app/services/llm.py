@@ -1,23 +1,80 @@
 from __future__ import annotations
 
-from typing import Any
-
-import httpx
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Iterable
 
 from app.core.config import get_settings
+from app.services.http_clients import clients
+from app.services.json_stream import JsonFieldParser
+from app.services.llm_cache import LLMResponseCache, llm_cache
+from app.services.llm_router import LLMBackend, LLMRouter, llm_router
 
 
 settings = get_settings()
 
+OPENAI_TEMPERATURE = 0.3
+
 
 class LLMService:
-    def __init__(self):
-        self.provider = settings.llm_provider
+    def __init__(self, cache: LLMResponseCache | None = None, router: LLMRouter | None = None):
+        self.router = router or llm_router()
+        models = sorted({(b.kind, b.model) for b in self.router.backends})
+        # Cache identity: the backend pool answers as one logical model
+        self.provider = models[0][0] if len(models) == 1 else "routed"
+        self.model = ",".join(f"{kind}:{model}" for kind, model in models) if len(models) > 1 else models[0][1]
+        self.temperature = OPENAI_TEMPERATURE if any(kind == "openai" for kind, _ in models) else None
+        self.cache = cache if cache is not None else (llm_cache if settings.llm_cache_enabled else None)
+
+    async def chat(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int | None = None,
+        json_fields: Iterable[str] | None = None,
+    ) -> str:
+        """Complete a chat; with ``json_fields``, stream and stop early.
+
+        A streamed completion is cut off as soon as the answer's top-level JSON object
+        has all of ``json_fields`` (or its first JSON value closes, for an empty
+        tuple), so the returned text may be a truncated but parseable prefix.
+        """
+        fields = tuple(json_fields) if json_fields is not None and settings.llm_streaming_enabled else None
+
+        async def complete() -> str:
+            return await self._complete(system_prompt, user_prompt, max_tokens, fields)
+
+        if self.cache is None:
+            return await complete()
+        key = self.cache.make_key(self.provider, self.model, self.temperature, system_prompt, user_prompt)
+        return await self.cache.get_or_compute(key, complete)
+
+    async def _complete(
+        self, system_prompt: str, user_prompt: str, max_tokens: int | None = None, fields: tuple[str, ...] | None = None,
+    ) -> str:
+        async def on(backend: LLMBackend) -> str:
+            if fields is not None:
+                return await self._stream_until(backend, system_prompt, user_prompt, max_tokens, fields)
+            if backend.kind == "openai":
+                return await self._openai_chat(backend, system_prompt, user_prompt, max_tokens)
+            return await self._ollama_chat(backend, system_prompt, user_prompt, max_tokens)
+
+        # Each backend applies its own limiter; hedges and failover happen in the router
+        return await self.router.call(on)
 
-    async def chat(self, system_prompt: str, user_prompt: str) -> str:
-        if self.provider == "openai":
-            return await self._openai_chat(system_prompt, user_prompt)
-        return await self._ollama_chat(system_prompt, user_prompt)
+    async def _stream_until(
+        self, backend: LLMBackend, system_prompt: str, user_prompt: str, max_tokens: int | None, fields: tuple[str, ...],
+    ) -> str:
+        parser = JsonFieldParser(fields)
+        stream = self._openai_stream if backend.kind == "openai" else self._ollama_stream
+        parts: list[str] = []
+        # Closing the stream early drops the response, which ends generation upstream
+        async with aclosing(stream(backend, system_prompt, user_prompt, max_tokens)) as pieces:
+            async for piece in pieces:
+                parts.append(piece)
+                if parser.feed(piece):
+                    break
+        return "".join(parts).strip()
 
     async def mutate_prompt(self, description: str, current_prompt: str) -> str:
         system_prompt = (
@@ -28,40 +85,89 @@ class LLMService:
             "\n\nCurrent prompt:\n" + current_prompt + "\n\n"
             "Respond with an improved prompt only, concise, with concrete parameter values and rules."
         )
-        return await self.chat(system_prompt, user_prompt)
+        return await self.chat(system_prompt, user_prompt, max_tokens=settings.llm_max_tokens_mutation)
 
-    async def _openai_chat(self, system_prompt: str, user_prompt: str) -> str:
-        base_url = settings.openai_base_url or "https://api.openai.com/v1"
+    def _openai_request(
+        self, backend: LLMBackend, system_prompt: str, user_prompt: str, max_tokens: int | None,
+    ) -> tuple[Any, dict, dict]:
         headers = {
-            "Authorization": f"Bearer {settings.openai_api_key}",
+            "Authorization": f"Bearer {backend.api_key}",
             "Content-Type": "application/json",
         }
         payload = {
-            "model": settings.openai_model,
+            "model": backend.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            "temperature": 0.3,
+            "temperature": OPENAI_TEMPERATURE,
         }
-        async with httpx.AsyncClient(timeout=60, base_url=base_url) as client:
-            r = await client.post("/chat/completions", json=payload, headers=headers)
-            r.raise_for_status()
-            data = r.json()
-            return data["choices"][0]["message"]["content"].strip()
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        return clients.http(backend.name, base_url=backend.base_url, timeout=60), payload, headers
 
-    async def _ollama_chat(self, system_prompt: str, user_prompt: str) -> str:
-        base_url = settings.ollama_base_url.rstrip("/")
-        payload = {
-            "model": settings.ollama_model,
+    def _ollama_request(
+        self, backend: LLMBackend, system_prompt: str, user_prompt: str, max_tokens: int | None, stream: bool,
+    ) -> tuple[Any, dict]:
+        payload: dict[str, Any] = {
+            "model": backend.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            "stream": False,
+            "stream": stream,
         }
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(f"{base_url}/api/chat", json=payload)
+        if max_tokens:
+            payload["options"] = {"num_predict": max_tokens}
+        return clients.http(backend.name, base_url=backend.base_url, timeout=60), payload
+
+    async def _openai_chat(
+        self, backend: LLMBackend, system_prompt: str, user_prompt: str, max_tokens: int | None = None,
+    ) -> str:
+        client, payload, headers = self._openai_request(backend, system_prompt, user_prompt, max_tokens)
+        r = await client.post("/chat/completions", json=payload, headers=headers)
+        r.raise_for_status()
+        data = r.json()
+        return data["choices"][0]["message"]["content"].strip()
+
+    async def _openai_stream(
+        self, backend: LLMBackend, system_prompt: str, user_prompt: str, max_tokens: int | None,
+    ) -> AsyncIterator[str]:
+        client, payload, headers = self._openai_request(backend, system_prompt, user_prompt, max_tokens)
+        async with client.stream("POST", "/chat/completions", json={**payload, "stream": True}, headers=headers) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or [{}]
+                piece = (choices[0].get("delta") or {}).get("content")
+                if piece:
+                    yield piece
+
+    async def _ollama_chat(
+        self, backend: LLMBackend, system_prompt: str, user_prompt: str, max_tokens: int | None = None,
+    ) -> str:
+        client, payload = self._ollama_request(backend, system_prompt, user_prompt, max_tokens, stream=False)
+        r = await client.post("/api/chat", json=payload)
+        r.raise_for_status()
+        data = r.json()
+        return data["message"]["content"].strip()
+
+    async def _ollama_stream(
+        self, backend: LLMBackend, system_prompt: str, user_prompt: str, max_tokens: int | None,
+    ) -> AsyncIterator[str]:
+        client, payload = self._ollama_request(backend, system_prompt, user_prompt, max_tokens, stream=True)
+        async with client.stream("POST", "/api/chat", json=payload) as r:
             r.raise_for_status()
-            data = r.json()
-            return data["message"]["content"].strip()
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                piece = (data.get("message") or {}).get("content")
+                if piece:
+                    yield piece
+                if data.get("done"):
+                    return
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.services.http_clients import clients
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Content-addressed completion cache: in-process LRU in front of a shared Redis tier.
+
+    Both tiers expire entries after ``ttl`` seconds; Redis errors degrade to a miss.
+    Concurrent misses on one key share a single upstream call.
+    """
+
+    def __init__(self, ttl: int | None = None, max_entries: int | None = None, use_redis: bool | None = None):
+        self.ttl = ttl if ttl is not None else settings.llm_cache_ttl_seconds
+        self.max_entries = max_entries if max_entries is not None else settings.llm_cache_max_entries
+        self.use_redis = settings.llm_cache_redis_enabled if use_redis is None else use_redis
+        self._local: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[str]] = {}
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0, "coalesced": 0}
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float | None, system_prompt: str, user_prompt: str) -> str:
+        payload = json.dumps([provider, model, temperature, system_prompt, user_prompt], ensure_ascii=False)
+        return "llm:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await self._join(key, pending, compute)
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # Another caller started the request while we were checking Redis
+            return await self._join(key, pending, compute)
+        fut: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            # Mark retrieved so an exception nobody else awaited is not logged as lost
+            fut.exception()
+            raise
+        else:
+            fut.set_result(value)
+            await self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _join(self, key: str, pending: asyncio.Future[str], compute: Callable[[], Awaitable[str]]) -> str:
+        self.stats["coalesced"] += 1
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # The leader was cancelled, not us: take over the request
+            if pending.cancelled() and not asyncio.current_task().cancelling():
+                return await self.get_or_compute(key, compute)
+            raise
+
+    async def get(self, key: str) -> str | None:
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                self.stats["local_hits"] += 1
+                return value
+            del self._local[key]
+        if self.use_redis:
+            try:
+                raw = await clients.redis().get(key)
+            except RedisError:
+                logger.warning("llm cache redis tier unavailable", exc_info=True)
+                raw = None
+            if raw is not None:
+                value = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+                self._remember(key, value)
+                self.stats["redis_hits"] += 1
+                return value
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        self.stats["stores"] += 1
+        if self.use_redis:
+            try:
+                await clients.redis().set(key, value, ex=self.ttl)
+            except RedisError:
+                logger.warning("llm cache redis tier unavailable", exc_info=True)
+
+    def _remember(self, key: str, value: str) -> None:
+        self._local[key] = (time.monotonic() + self.ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def metrics(self) -> dict[str, Any]:
+        lookups = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {**self.stats, "entries": len(self._local), "hit_ratio": hits / lookups if lookups else 0.0}
+
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Literal, TypeVar
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.ratelimit import UpstreamLimiter
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BackendKind = Literal["openai", "ollama"]
+
+
+@dataclass(eq=False)
+class LLMBackend:
+    """One endpoint serving a model, with its own limiter and health record."""
+
+    name: str
+    kind: BackendKind
+    base_url: str
+    model: str
+    api_key: str | None = None
+    max_concurrency: int = field(default_factory=lambda: settings.llm_max_concurrency)
+    rate_per_second: float = field(default_factory=lambda: settings.llm_rate_per_second)
+
+    def __post_init__(self):
+        self.limiter = UpstreamLimiter(self.max_concurrency, self.rate_per_second)
+        self.latencies: deque[float] = deque(maxlen=settings.llm_latency_window)
+        self.inflight = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def expected_latency(self) -> float:
+        if not self.latencies:
+            return settings.llm_hedge_default_seconds
+        return float(np.median(self.latencies))
+
+    def p95(self) -> float:
+        if len(self.latencies) < settings.llm_hedge_min_samples:
+            return settings.llm_hedge_default_seconds
+        return float(np.percentile(self.latencies, 95))
+
+    def record_success(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        self.failures = 0
+        self.down_until = 0.0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= settings.llm_failure_threshold:
+            # Exponential cool-down; the backend is retried once it elapses
+            backoff = settings.llm_cooldown_seconds * 2 ** (self.failures - settings.llm_failure_threshold)
+            self.down_until = time.monotonic() + min(backoff, settings.llm_cooldown_max_seconds)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "model": self.model,
+            "healthy": self.healthy,
+            "inflight": self.inflight,
+            "failures": self.failures,
+            "p50": round(self.expected_latency(), 3),
+            "p95": round(self.p95(), 3),
+            "samples": len(self.latencies),
+        }
+
+
+def backends_from_settings() -> list[LLMBackend]:
+    """Backends from ``llm_backends`` (JSON list), else the single ``llm_provider`` one."""
+    if settings.llm_backends:
+        specs = json.loads(settings.llm_backends)
+        return [
+            LLMBackend(
+                name=spec.get("name") or f"{spec['kind']}-{i}",
+                kind=spec["kind"],
+                base_url=spec["base_url"].rstrip("/"),
+                model=spec["model"],
+                api_key=spec.get("api_key", settings.openai_api_key if spec["kind"] == "openai" else None),
+                **{k: spec[k] for k in ("max_concurrency", "rate_per_second") if k in spec},
+            )
+            for i, spec in enumerate(specs)
+        ]
+    if settings.llm_provider == "openai":
+        return [LLMBackend("openai", "openai", settings.openai_base_url or "https://api.openai.com/v1",
+                           settings.openai_model, settings.openai_api_key)]
+    return [LLMBackend("ollama", "ollama", settings.ollama_base_url.rstrip("/"), settings.ollama_model)]
+
+
+class AllBackendsFailed(Exception):
+    pass
+
+
+class LLMRouter:
+    """Latency-aware routing with hedging and failover across LLM backends.
+
+    Healthy backends are tried in order of expected latency scaled by their in-flight
+    load. If the first has not answered within its p95 latency of getting past its
+    limiter (time queued does not count) a hedge goes to the next, and a failure starts
+    the next one at once; the first answer wins and the other attempts are cancelled.
+    Backends that keep failing sit out an exponential cool-down.
+    """
+
+    def __init__(self, backends: list[LLMBackend]):
+        if not backends:
+            raise ValueError("no LLM backends configured")
+        self.backends = backends
+
+    def ranked(self) -> list[LLMBackend]:
+        def score(b: LLMBackend) -> float:
+            return b.expected_latency() * (1 + b.inflight / max(b.max_concurrency, 1))
+
+        healthy = sorted((b for b in self.backends if b.healthy), key=score)
+        # Cooling-down backends are the last resort, soonest-back first
+        return healthy + sorted((b for b in self.backends if not b.healthy), key=lambda b: b.down_until)
+
+    async def call(self, fn: Callable[[LLMBackend], Awaitable[T]]) -> T:
+        candidates = self.ranked()[: max(settings.llm_max_attempts, 1)]
+        attempts: dict[asyncio.Task, LLMBackend] = {}
+        # Per attempt: resolves to the time it got past its backend's limiter
+        acquired: dict[asyncio.Task, asyncio.Future[float]] = {}
+        errors: list[str] = []
+
+        async def attempt(backend: LLMBackend, admitted: asyncio.Future[float]) -> T:
+            async with backend.limiter:
+                started = time.monotonic()
+                admitted.set_result(started)
+                try:
+                    result = await fn(backend)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    backend.record_failure()
+                    raise
+                backend.record_success(time.monotonic() - started)
+                return result
+
+        def launch() -> None:
+            backend = candidates[len(attempts)]
+            # Load counts from launch, queued behind the limiter included, so calls made
+            # together rank the backend as busy and spread out
+            backend.inflight += 1
+            admitted = asyncio.get_running_loop().create_future()
+            task = asyncio.ensure_future(attempt(backend, admitted))
+
+            def finished(_: asyncio.Task) -> None:
+                backend.inflight -= 1
+
+            task.add_done_callback(finished)
+            attempts[task] = backend
+            acquired[task] = admitted
+
+        launch()
+        pending = set(attempts)
+        try:
+            while pending:
+                waiting: set[asyncio.Future] = set(pending)
+                timeout = None
+                if settings.llm_hedging_enabled and len(attempts) < len(candidates) and len(pending) == 1:
+                    (task,) = pending
+                    if acquired[task].done():
+                        # Measured like the latencies behind p95: from admission, not launch
+                        timeout = max(attempts[task].p95() - (time.monotonic() - acquired[task].result()), 0.0)
+                    else:
+                        # Still queued behind its limiter: not slow yet, so nothing to hedge
+                        waiting.add(acquired[task])
+                done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                done = {t for t in done if t in attempts}
+                pending = {t for t in attempts if not t.done()}
+                if not done:
+                    if timeout is not None:
+                        logger.info("hedging llm request to %s", candidates[len(attempts)].name)
+                        launch()
+                        pending = {t for t in attempts if not t.done()}
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    backend = attempts[task]
+                    logger.warning("llm backend %s failed: %r", backend.name, task.exception())
+                    errors.append(f"{backend.name}: {task.exception()!r}")
+                if len(attempts) < len(candidates):
+                    # Fail over at once rather than waiting for a hedge timer
+                    launch()
+                    pending = {t for t in attempts if not t.done()}
+        finally:
+            for task in attempts:
+                if task.done() and not task.cancelled():
+                    task.exception()
+                task.cancel()
+        raise AllBackendsFailed("; ".join(errors))
+
+    def status(self) -> list[dict[str, Any]]:
+        return [b.status() for b in self.backends]
+
+
+_router: LLMRouter | None = None
+
+
+def llm_router() -> LLMRouter:
+    global _router
+    if _router is None:
+        _router = LLMRouter(backends_from_settings())
+    return _router
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, replace
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.services.bybit import BybitService
+from app.services.candle_store import CandleStore
+from app.services.http_clients import clients
+from app.services.resilience import BackgroundRefresh
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class Candles:
+    """Read-only OHLCV arrays shared by every agent of a round."""
+
+    symbol: str
+    interval: str
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    # Set when served from the last good snapshot during an upstream outage: epoch
+    # seconds the data is current as of
+    stale_as_of: float | None = None
+
+    @classmethod
+    def from_rows(cls, symbol: str, interval: str, rows: list[dict[str, Any]]) -> "Candles":
+        arrays: dict[str, np.ndarray] = {}
+        for field in FIELDS:
+            dtype = np.int64 if field == "timestamp" else np.float64
+            arr = np.array([row[field] for row in rows], dtype=dtype)
+            arr.flags.writeable = False
+            arrays[field] = arr
+        return cls(symbol=symbol, interval=interval, **arrays)
+
+    def __len__(self) -> int:
+        return int(self.close.shape[0])
+
+    @cached_property
+    def digest(self) -> str:
+        h = hashlib.sha1(f"{self.symbol}:{self.interval}".encode())
+        for field in FIELDS:
+            h.update(getattr(self, field).tobytes())
+        return h.hexdigest()
+
+
+class MarketDataSnapshot:
+    """Round-scoped kline cache: each (symbol, interval, limit) is fetched once.
+
+    Concurrent callers asking for the same key await the same in-flight request.
+    """
+
+    def __init__(self, bybit: BybitService | None = None, use_store: bool | None = None):
+        self._bybit = bybit or BybitService()
+        self._store: CandleStore | None = None
+        if settings.kline_store_enabled if use_store is None else use_store:
+            self._store = CandleStore(clients.redis(), self._bybit)
+        self._pending: dict[tuple[str, str, int], asyncio.Future[Candles]] = {}
+
+    async def get_candles(self, symbol: str, interval: str, limit: int) -> Candles:
+        key = (symbol, interval, limit)
+        fut = self._pending.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._load(symbol, interval, limit))
+            self._pending[key] = fut
+        try:
+            # shield: a cancelled agent must not cancel the fetch other agents are waiting on
+            return await asyncio.shield(fut)
+        except Exception:
+            # Failed fetches are not memoized so that a later caller can retry
+            if self._pending.get(key) is fut:
+                self._pending.pop(key, None)
+            raise
+
+    async def _load(self, symbol: str, interval: str, limit: int) -> Candles:
+        key = (symbol, interval, limit)
+
+        def fetch():
+            return self._fetch(symbol, interval, limit)
+
+        try:
+            # Stale-while-revalidate: past the deadline the fetch finishes in the background
+            return await _refresh.fetch(key, fetch, settings.upstream_fresh_deadline_seconds)
+        except Exception as exc:
+            stale = await self._last_good(symbol, interval, limit)
+            if stale is not None:
+                logger.warning("serving stale %s/%s klines as of %s: %r", symbol, interval, stale.stale_as_of, exc)
+                return stale
+            if not isinstance(exc, asyncio.TimeoutError):
+                raise
+        # Nothing to fall back on: wait for the fetch after all
+        return await _refresh.fetch(key, fetch)
+
+    async def _fetch(self, symbol: str, interval: str, limit: int) -> Candles:
+        rows: list[dict[str, Any]] | None = None
+        if self._store is not None:
+            try:
+                rows = await self._store.get_klines(symbol, interval, limit)
+            except RedisError:
+                logger.warning("kline store unavailable, fetching %s/%s directly", symbol, interval)
+        if rows is None:
+            rows = await self._bybit.get_klines(symbol, interval, limit)
+        candles = Candles.from_rows(symbol, interval, rows)
+        _last_fetched[(symbol, interval, limit)] = (time.time(), candles)
+        return candles
+
+    async def _last_good(self, symbol: str, interval: str, limit: int) -> Candles | None:
+        cached = _last_fetched.get((symbol, interval, limit))
+        if cached is not None:
+            fetched_at, candles = cached
+            return replace(candles, stale_as_of=fetched_at)
+        if self._store is None:
+            return None
+        try:
+            rows = await self._store.stored_klines(symbol, interval, limit)
+        except RedisError:
+            return None
+        if len(rows) < limit:
+            return None
+        return replace(Candles.from_rows(symbol, interval, rows), stale_as_of=rows[-1]["timestamp"] / 1000)
+
+
+# Process-wide: the last good snapshot per key outlives the round that fetched it
+_refresh = BackgroundRefresh()
+_last_fetched: dict[tuple[str, str, int], tuple[float, Candles]] = {}
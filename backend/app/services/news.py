@@ -1,34 +1,50 @@
 from __future__ import annotations
 
+import logging
 from typing import Any
 
 import httpx
 
+from app.services.http_clients import clients
+from app.services.ratelimit import limiter
+from app.services.resilience import breaker
+
+
+logger = logging.getLogger(__name__)
+
 
 class NewsService:
-    def __init__(self, rss_url: str = "https://cryptopanic.com/api/v1/posts/?auth_token=demo&kind=news"):
-        self._client = httpx.AsyncClient(timeout=30)
+    def __init__(
+        self,
+        rss_url: str = "https://cryptopanic.com/api/v1/posts/?auth_token=demo&kind=news",
+        client: httpx.AsyncClient | None = None,
+    ):
+        self._client = client or clients.http("news", timeout=30)
         self._rss_url = rss_url
 
-    async def close(self):
-        await self._client.aclose()
+    async def get_headlines(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Latest headlines; raises on upstream errors (or :class:`CircuitOpen`)."""
+        async def request() -> Any:
+            async with limiter("news"):
+                r = await self._client.get(self._rss_url)
+            r.raise_for_status()
+            return r.json()
+
+        data = await breaker("news:posts").call(request)
+        items = data.get("results", [])[:limit]
+        return [
+            {
+                "title": item.get("title"),
+                "url": item.get("url"),
+                "source": item.get("domain"),
+                "published_at": item.get("published_at"),
+            }
+            for item in items
+        ]
 
     async def fetch_headlines(self, limit: int = 20) -> list[dict[str, Any]]:
         try:
-            r = await self._client.get(self._rss_url)
-            if r.status_code != 200:
-                return []
-            data = r.json()
-            items = data.get("results", [])[:limit]
-            headlines = [
-                {
-                    "title": item.get("title"),
-                    "url": item.get("url"),
-                    "source": item.get("domain"),
-                    "published_at": item.get("published_at"),
-                }
-                for item in items
-            ]
-            return headlines
-        except Exception:
+            return await self.get_headlines(limit)
+        except Exception as exc:
+            logger.warning("headline fetch failed: %r", exc)
             return []
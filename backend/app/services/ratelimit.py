@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Literal
+
+from app.core.config import get_settings
+
+
+settings = get_settings()
+
+
+# LLM backends each carry their own limiter (see llm_router)
+Upstream = Literal["bybit", "news"]
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts up to ``capacity``; rate <= 0 disables it."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+class UpstreamLimiter:
+    """Caps in-flight requests to one upstream and paces how fast new ones start."""
+
+    def __init__(self, max_concurrency: int, rate: float):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate)
+
+    async def __aenter__(self) -> "UpstreamLimiter":
+        await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._semaphore.release()
+
+
+_limiters: dict[str, UpstreamLimiter] = {}
+
+
+def limiter(upstream: Upstream) -> UpstreamLimiter:
+    lim = _limiters.get(upstream)
+    if lim is None:
+        lim = UpstreamLimiter(
+            getattr(settings, f"{upstream}_max_concurrency"),
+            getattr(settings, f"{upstream}_rate_per_second"),
+        )
+        _limiters[upstream] = lim
+    return lim
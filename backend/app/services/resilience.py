@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Hashable, Literal, TypeVar
+
+from app.core.config import get_settings
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"circuit {name} open, retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Fails calls to an endpoint fast after ``failure_threshold`` consecutive failures.
+
+    Once ``reset_seconds`` have passed a single probe call is let through (half-open):
+    success closes the circuit, failure opens it for another period.
+    """
+
+    def __init__(self, name: str, failure_threshold: int | None = None, reset_seconds: float | None = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.circuit_failure_threshold
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.circuit_reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        state = self.state
+        probe = False
+        if state == "open" or (state == "half_open" and self._probing):
+            raise CircuitOpen(self.name, max(self.reset_seconds - (time.monotonic() - (self.opened_at or 0.0)), 0.0))
+        if state == "half_open":
+            probe = self._probing = True
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record_failure()
+            raise
+        finally:
+            if probe:
+                self._probing = False
+        self.failures = 0
+        if self.opened_at is not None:
+            logger.info("circuit %s closed", self.name)
+            self.opened_at = None
+        return result
+
+    def _record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("circuit %s open after %d failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+
+    def status(self) -> dict[str, Any]:
+        return {"state": self.state, "failures": self.failures}
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker(endpoint: str) -> CircuitBreaker:
+    cb = _breakers.get(endpoint)
+    if cb is None:
+        cb = _breakers[endpoint] = CircuitBreaker(endpoint)
+    return cb
+
+
+def breaker_status() -> dict[str, dict[str, Any]]:
+    return {name: cb.status() for name, cb in _breakers.items()}
+
+
+class BackgroundRefresh:
+    """Single-flight upstream fetches that outlive a caller's deadline.
+
+    :meth:`fetch` waits at most ``deadline`` seconds; a fetch still running then keeps
+    going in the background (so the caller can serve stale data meanwhile) and later
+    callers for the same key join it instead of starting another.
+
+    The fetch only progresses while its event loop runs. Celery workers drive the loop
+    per task, so ``run_async`` lets leftovers finish through :func:`drain_refreshes`
+    before returning; otherwise they would sit frozen until the next task.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        _refreshes.add(self)
+
+    async def fetch(self, key: Hashable, fetch: Callable[[], Awaitable[T]], deadline: float | None = None) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.wait_for(asyncio.shield(task), deadline)
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here: callers that gave up waiting never see it
+            logger.debug("background refresh %s failed: %r", key, task.exception())
+
+
+_refreshes: weakref.WeakSet[BackgroundRefresh] = weakref.WeakSet()
+
+
+async def drain_refreshes(timeout: float) -> None:
+    """Wait up to ``timeout`` seconds for every background fetch still running on this loop."""
+    loop = asyncio.get_running_loop()
+    tasks = [t for r in list(_refreshes) for t in r._inflight.values() if t.get_loop() is loop]
+    if tasks:
+        logger.info("letting %d background refreshes finish", len(tasks))
+        await asyncio.wait(tasks, timeout=timeout)
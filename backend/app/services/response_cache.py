@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.services.http_clients import clients
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "dashboard:version"
+# Response headers computed with the body that must be replayed on a hit
+_KEPT_HEADERS = ("x-next-cursor",)
+
+
+@functools.lru_cache(maxsize=64)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class DashboardCache:
+    """Read-through Redis cache for dashboard reads, with ETag revalidation.
+
+    Entries are keyed by a version counter that rounds, evolution and agent edits bump
+    through :func:`invalidate`, so a write makes every older entry unreachable at once;
+    stale entries just expire after ``ttl``. Redis errors degrade to computing the
+    response, and concurrent misses on one key in a process share one computation.
+    """
+
+    def __init__(self, ttl: int | None = None, enabled: bool | None = None):
+        self.ttl = ttl if ttl is not None else settings.dashboard_cache_ttl_seconds
+        self.enabled = settings.dashboard_cache_enabled if enabled is None else enabled
+        self._inflight: dict[str, asyncio.Future[tuple[bytes, dict[str, str]]]] = {}
+
+    @staticmethod
+    def _key(version: int, request: Request) -> str:
+        query = sorted(request.query_params.multi_items())
+        raw = json.dumps([request.url.path, query], separators=(",", ":"))
+        return f"dashboard:{version}:" + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    async def respond(
+        self,
+        request: Request,
+        compute: Callable[[Response], Awaitable[Any]],
+        model: Any = None,
+    ) -> Response:
+        """Serve ``compute``'s result for this request, from the cache when possible.
+
+        ``compute`` receives a scratch response to set headers on (e.g. the next-page
+        cursor); ``model`` validates ORM rows the way ``response_model`` would.
+        """
+        async def render() -> tuple[bytes, dict[str, str]]:
+            scratch = Response()
+            data = await compute(scratch)
+            if model is not None:
+                adapter = _adapter(model)
+                data = adapter.dump_python(adapter.validate_python(data, from_attributes=True), mode="json")
+            body = JSONResponse(jsonable_encoder(data)).body
+            return body, {k: v for k, v in scratch.headers.items() if k in _KEPT_HEADERS}
+
+        if not self.enabled:
+            body, headers = await render()
+        else:
+            body, headers = await self._get_or_render(request, render)
+
+        etag = _etag(body)
+        # Clients may keep the body but must revalidate it on every poll
+        headers = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+        if _matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def _get_or_render(self, request: Request, render) -> tuple[bytes, dict[str, str]]:
+        redis = clients.redis()
+        try:
+            version = int(await redis.get(VERSION_KEY) or 0)
+            key = self._key(version, request)
+            cached = await redis.hgetall(key)
+        except RedisError:
+            logger.warning("dashboard cache unavailable", exc_info=True)
+            return await render()
+        if cached:
+            return cached[b"body"], json.loads(cached[b"headers"])
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leader's client went away, not ours
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    return await render()
+                raise
+        fut: asyncio.Future[tuple[bytes, dict[str, str]]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await render()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            # Mark retrieved so an exception nobody else awaited is not logged as lost
+            fut.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        fut.set_result(result)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"body": result[0], "headers": json.dumps(result[1])})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.warning("dashboard cache store failed", exc_info=True)
+        return result
+
+
+async def invalidate(reason: str = "") -> None:
+    """Make every cached dashboard response stale; call after committing a change."""
+    try:
+        await clients.redis().incr(VERSION_KEY)
+    except RedisError:
+        # Entries still expire after the ttl
+        logger.warning("dashboard cache invalidation failed (%s)", reason, exc_info=True)
+
+
+dashboard_cache = DashboardCache()
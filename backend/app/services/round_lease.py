@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Literal, TypeVar
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.agent import round_fence_seq
+from app.services.http_clients import clients
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+OverlapPolicy = Literal["skip", "queue", "coalesce"]
+
+LEASE_KEY = "round:lease"
+PENDING_KEY = "round:pending"
+# Advisory lock serializing fence writes, so a stale holder cannot commit past a newer one
+_FENCE_LOCK = 0x666E6365
+
+_ACQUIRE = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], 'token', ARGV[1], 'holder', ARGV[2], 'name', ARGV[3],
+           'started_at', ARGV[4], 'round_id', '', 'done', 0, 'total', 0)
+redis.call('PEXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+_RENEW = """
+if redis.call('HGET', KEYS[1], 'token') ~= ARGV[1] then return 0 end
+return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+"""
+_RELEASE = """
+if redis.call('HGET', KEYS[1], 'token') ~= ARGV[1] then return 0 end
+return redis.call('DEL', KEYS[1])
+"""
+_SET = """
+if redis.call('HGET', KEYS[1], 'token') ~= ARGV[1] then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+return 1
+"""
+_ADVANCE = """
+if redis.call('HGET', KEYS[1], 'token') ~= ARGV[1] then return 0 end
+return redis.call('HINCRBY', KEYS[1], 'done', ARGV[2])
+"""
+
+
+class LeaseLost(Exception):
+    """The lease expired or was taken over; the holder must not change the population."""
+
+
+class RoundBusy(Exception):
+    def __init__(self, lease: dict[str, Any]):
+        super().__init__(f"round already running: {lease}")
+        self.lease = lease
+
+
+def _holder(name: str) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{name}"
+
+
+class RoundLease:
+    """Redis lease over "the round currently running", with a fencing token.
+
+    ``token`` increases with every acquisition. It is drawn from a Postgres sequence, so it
+    stays ahead of every stamped fence even if Redis is flushed. Transactions that change
+    the population call :meth:`fence` before committing, so a holder whose lease expired
+    (e.g. after a long GC pause or a network split) cannot overwrite a newer round's results.
+    """
+
+    def __init__(self, token: int, ttl: float, redis: Redis | None = None):
+        self.token = token
+        self.ttl = ttl
+        self._redis = redis or clients.redis()
+        self._heartbeat: asyncio.Task | None = None
+
+    @classmethod
+    async def acquire(cls, name: str, ttl: float | None = None, redis: Redis | None = None) -> "RoundLease | None":
+        redis = redis or clients.redis()
+        ttl = ttl or settings.round_lease_ttl_seconds
+        if await redis.exists(LEASE_KEY):
+            return None
+        async with AsyncSessionLocal() as db:
+            # nextval is not transactional: a token taken while the lease is busy is just skipped
+            token = int(await db.scalar(select(round_fence_seq.next_value())))
+        acquired = await redis.register_script(_ACQUIRE)(
+            keys=[LEASE_KEY],
+            args=[token, _holder(name), name, datetime.utcnow().isoformat(), int(ttl * 1000)],
+        )
+        return cls(token, ttl, redis) if acquired else None
+
+    async def renew(self) -> bool:
+        return bool(await self._redis.register_script(_RENEW)(
+            keys=[LEASE_KEY], args=[self.token, int(self.ttl * 1000)]))
+
+    async def ensure_held(self) -> None:
+        try:
+            held = await self.renew()
+        except RedisError:
+            # Same trade-off as acquisition: an unreachable Redis does not stop the round
+            logger.warning("round lease check failed, assuming held", exc_info=True)
+            return
+        if not held:
+            raise LeaseLost(f"round lease {self.token} is no longer held")
+
+    async def fence(self, db: AsyncSession, round_id: int) -> None:
+        """Stamp the round with this token in ``db``'s transaction, or raise :class:`LeaseLost`.
+
+        Fails once a later holder has stamped any round; the caller then rolls back. The
+        check runs in Postgres under the transaction-scoped fence lock, so it also holds
+        for a writer paused between the check and its commit.
+        """
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _FENCE_LOCK})
+        stamped = await db.execute(
+            text("UPDATE round SET fence = :token WHERE id = :round_id"
+                 " AND NOT EXISTS (SELECT 1 FROM round WHERE fence > :token)"),
+            {"token": self.token, "round_id": round_id},
+        )
+        if stamped.rowcount != 1:
+            raise LeaseLost(f"round lease {self.token} was superseded by a newer round")
+
+    async def release(self) -> None:
+        await self.stop_heartbeat()
+        await self._redis.register_script(_RELEASE)(keys=[LEASE_KEY], args=[self.token])
+
+    # Progress reporting is best effort: a Redis hiccup must not fail the round
+
+    async def update(self, **fields: Any) -> None:
+        args: list[Any] = [self.token]
+        for key, value in fields.items():
+            args += [key, value]
+        try:
+            await self._redis.register_script(_SET)(keys=[LEASE_KEY], args=args)
+        except RedisError:
+            logger.warning("round lease update failed", exc_info=True)
+
+    async def advance(self, done: int) -> None:
+        try:
+            await self._redis.register_script(_ADVANCE)(keys=[LEASE_KEY], args=[self.token, done])
+        except RedisError:
+            logger.warning("round progress update failed", exc_info=True)
+
+    def start_heartbeat(self) -> None:
+        async def beat():
+            while True:
+                await asyncio.sleep(self.ttl / 3)
+                try:
+                    if not await self.renew():
+                        logger.warning("round lease %s lost", self.token)
+                        return
+                except RedisError:
+                    logger.warning("round lease heartbeat failed", exc_info=True)
+
+        self._heartbeat = asyncio.ensure_future(beat())
+
+    async def stop_heartbeat(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+
+
+async def current_lease(redis: Redis | None = None) -> dict[str, Any] | None:
+    redis = redis or clients.redis()
+    raw = await redis.hgetall(LEASE_KEY)
+    if not raw:
+        return None
+    lease: dict[str, Any] = {k.decode(): v.decode() for k, v in raw.items()}
+    for key in ("token", "done", "total"):
+        lease[key] = int(lease.get(key) or 0)
+    lease["round_id"] = int(lease["round_id"]) if lease.get("round_id") else None
+    lease["pending"] = bool(await redis.exists(PENDING_KEY))
+    return lease
+
+
+async def acquire_with_policy(name: str, policy: OverlapPolicy | None = None, ttl: float | None = None) -> RoundLease | None:
+    """Acquire the round lease, applying the overlap policy if another round holds it.
+
+    skip: raise :class:`RoundBusy`. queue: wait up to ``round_queue_timeout_seconds``
+    for the lease, then raise. coalesce: flag one follow-up round for the holder to
+    start and return None.
+    """
+    policy = policy or settings.round_overlap_policy
+    redis = clients.redis()
+    lease = await RoundLease.acquire(name, ttl, redis)
+    deadline = time.monotonic() + settings.round_queue_timeout_seconds
+    while lease is None and policy == "queue" and time.monotonic() < deadline:
+        await asyncio.sleep(settings.round_queue_poll_seconds)
+        lease = await RoundLease.acquire(name, ttl, redis)
+    if lease is None:
+        if policy == "coalesce":
+            await redis.set(PENDING_KEY, name)
+            return None
+        raise RoundBusy(await current_lease(redis) or {})
+    return lease
+
+
+async def run_exclusive(
+    name: str,
+    run: Callable[[RoundLease | None], Awaitable[T]],
+    policy: OverlapPolicy | None = None,
+) -> T | None:
+    """Run ``run`` under the round lease, renewed by a heartbeat; None if coalesced.
+
+    If Redis is unreachable the round runs unguarded rather than not at all.
+    """
+    try:
+        lease = await acquire_with_policy(name, policy)
+    except RedisError:
+        logger.warning("round lease unavailable, running %s unguarded", name, exc_info=True)
+        return await run(None)
+    if lease is None:
+        return None
+
+    lease.start_heartbeat()
+    try:
+        return await run(lease)
+    finally:
+        try:
+            await lease.release()
+        except RedisError:
+            # Expires on its own after the ttl
+            logger.warning("round lease release failed", exc_info=True)
+
+
+async def take_pending() -> bool:
+    """True (once) if a round was coalesced while the last one ran."""
+    try:
+        return bool(await clients.redis().delete(PENDING_KEY))
+    except RedisError:
+        return False
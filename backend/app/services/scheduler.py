@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 
-from celery import Celery
+from celery import Celery, chord, group
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 
 from app.core.config import get_settings
 
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 celery_app = Celery(
     "agents",
@@ -30,20 +33,251 @@ celery_app.conf.beat_schedule = {
         "task": "app.services.scheduler.run_round_task",
         "schedule": _parse_cron(settings.schedule_cron),
         "options": {"expires": 60 * 10},
-    }
+    },
+    "run-partition-maintenance": {
+        "task": "app.services.scheduler.maintain_run_partitions_task",
+        "schedule": crontab(minute=0, hour=3),
+    },
 } if settings.scheduler_enabled else {}
 
 
+# One event loop per worker process: pooled HTTP/Redis/DB connections are bound to the
+# loop that opened them, so tasks must not each spin up a fresh loop.
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(coro):
+    from app.services.resilience import drain_refreshes
+
+    loop = _get_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        # Upstream fetches that outlived a round's deadline refresh the last good data now,
+        # while the loop still runs, rather than resuming whenever the next task starts it
+        loop.run_until_complete(drain_refreshes(settings.upstream_refresh_drain_seconds))
+
+
+@worker_process_init.connect
+def _init_worker_process(**_):
+    _get_loop()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker(**_):
+    global _loop
+    from app.services.evaluation import shutdown_pool
+
+    shutdown_pool()
+    if _loop is None or _loop.is_closed():
+        return
+    from app.db.session import engine
+    from app.services.http_clients import clients
+
+    async def _close():
+        await clients.aclose()
+        await engine.dispose()
+
+    _loop.run_until_complete(_close())
+    _loop.close()
+    _loop = None
+
+
 @celery_app.task
-def run_round_task():
+def evaluate_population_task(payload: dict) -> list[dict]:
+    """Backtest a round's population; routed to ``eval_queue``.
+
+    That queue's worker runs a thread pool rather than prefork, so its main process owns
+    one evaluation process pool for the whole node.
+    """
+    from app.services.evaluation import evaluate_payload
+
+    return evaluate_payload(payload)
+
+
+@celery_app.task(bind=True)
+def run_round_task(self, name: str = "scheduled", job_id: str | None = None):
     # Delayed import to avoid heavy deps in worker init
-    import anyio
     from sqlalchemy.ext.asyncio import AsyncSession
     from app.db.session import AsyncSessionLocal
-    from app.orchestrator.evolution import run_round
+    from app.orchestrator.evolution import run_round_exclusive
+    from app.services.jobs import ensure_job
+    from app.services.round_lease import RoundBusy
+
+    # Every round is a job; beat and follow-up rounds use their task id
+    job_id = job_id or self.request.id
+    if settings.distributed_rounds:
+        dispatch_round(name, job_id)
+        return
 
     async def _run():
+        job = await ensure_job(name, job_id)
         async with AsyncSessionLocal() as session:  # type: AsyncSession
-            await run_round(session, name="scheduled")
+            try:
+                round_obj = await run_round_exclusive(session, name=name, job=job)
+            except RoundBusy as exc:
+                logger.info("%s round skipped: %s", name, exc)
+                await job.set_status("skipped", error=str(exc))
+                return
+            except Exception as exc:
+                await job.set_status("failed", error=f"{type(exc).__name__}: {exc}"[:500])
+                raise
+        await job.set_status("finished" if round_obj is not None else "coalesced")
+
+    run_async(_run())
+
+
+async def enqueue_round(name: str) -> str:
+    """Queue a round for the worker and return its job id (also the Celery task id)."""
+    from app.services.jobs import RoundJob
+
+    job = await RoundJob.create(name)
+    run_round_task.apply_async(kwargs={"name": name, "job_id": job.id}, task_id=job.id)
+    return job.id
+
+
+def dispatch_round(name: str, job_id: str | None = None) -> int | None:
+    """Start a round and fan its agents out as shard tasks joined by a chord.
+
+    The round lease is taken here and handed to the tasks by its fencing token: shards
+    renew it, the chord callback evolves the round and releases it, and if a shard fails
+    for good the errback closes the round without evolving it. Returns None when the
+    overlap policy skips or coalesces the round.
+    """
+    from redis.exceptions import RedisError
+    from app.db.session import AsyncSessionLocal
+    from app.orchestrator.distributed import finish_task_id, plan_round, shard_task_id
+    from app.services.jobs import ensure_job
+    from app.services.round_lease import RoundBusy, acquire_with_policy
+
+    async def _plan():
+        job = await ensure_job(name, job_id) if job_id else None
+        try:
+            # No heartbeat between tasks: the lease lives for a whole round deadline per renewal
+            lease = await acquire_with_policy(name, ttl=settings.round_timeout_seconds)
+            if lease is None:
+                if job is not None:
+                    await job.set_status("coalesced")
+                return None
+            token = lease.token
+        except RedisError:
+            logger.warning("round lease unavailable, dispatching %s unguarded", name, exc_info=True)
+            lease, token = None, None
+        except RoundBusy as exc:
+            logger.info("%s round skipped: %s", name, exc)
+            if job is not None:
+                await job.set_status("skipped", error=str(exc))
+            return None
+        async with AsyncSessionLocal() as session:
+            round_id, shards = await plan_round(session, name, lease)
+        total = sum(len(s) for s in shards)
+        if lease is not None:
+            await lease.update(round_id=round_id, total=total)
+        if job is not None:
+            await job.started(round_id, total)
+        return round_id, shards, token
+
+    planned = run_async(_plan())
+    if planned is None:
+        return None
+    round_id, shards, token = planned
+    header = group(
+        run_round_shard_task.si(round_id, shard_no, agent_ids, token, job_id)
+        .set(task_id=shard_task_id(round_id, shard_no))
+        for shard_no, agent_ids in enumerate(shards)
+    )
+    body = finish_round_task.si(round_id, token, job_id).set(task_id=finish_task_id(round_id))
+    chord(header)(body.on_error(fail_round_task.si(round_id, token, job_id)))
+    return round_id
+
+
+def _lease(token: int | None):
+    from app.services.round_lease import RoundLease
+    return RoundLease(token, settings.round_timeout_seconds) if token else None
+
+
+def _job(job_id: str | None):
+    from app.services.jobs import RoundJob
+    return RoundJob(job_id) if job_id else None
+
+
+@celery_app.task(
+    bind=True, acks_late=True, autoretry_for=(Exception,),
+    retry_backoff=True, max_retries=settings.round_shard_retries,
+)
+def run_round_shard_task(
+    self, round_id: int, shard_no: int, agent_ids: list[int], token: int | None = None, job_id: str | None = None,
+) -> int:
+    from celery.exceptions import Ignore
+    from app.db.session import AsyncSessionLocal
+    from app.orchestrator.distributed import ShardBusy, run_shard
+
+    if self.AsyncResult(self.request.id).successful():
+        # Redelivered after this shard already reported to the chord: reporting again would
+        # count it twice and could evolve the round while other shards are still running
+        logger.info("round %s shard %s already done, ignoring redelivery", round_id, shard_no)
+        raise Ignore()
+
+    async def _run():
+        async with AsyncSessionLocal() as session:
+            return await run_shard(session, round_id, shard_no, agent_ids, _lease(token), _job(job_id))
+
+    try:
+        return run_async(_run())
+    except ShardBusy as exc:
+        # Only the delivery that runs the shard may complete it; wait for that one (which
+        # may yet fail, leaving the shard to this delivery) for up to a round deadline
+        countdown = settings.round_shard_busy_retry_seconds
+        raise self.retry(exc=exc, countdown=countdown, max_retries=settings.round_shard_retries
+                         + int(settings.round_timeout_seconds // max(countdown, 1)))
+
+
+@celery_app.task(acks_late=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def finish_round_task(round_id: int, token: int | None = None, job_id: str | None = None) -> None:
+    from app.db.session import AsyncSessionLocal
+    from app.orchestrator.distributed import finish_distributed_round
+
+    async def _run():
+        async with AsyncSessionLocal() as session:
+            await finish_distributed_round(session, round_id, _lease(token))
+        job = _job(job_id)
+        if job is not None:
+            await job.set_status("finished")
+
+    run_async(_run())
+
+
+@celery_app.task
+def fail_round_task(round_id: int, token: int | None = None, job_id: str | None = None) -> None:
+    from app.db.session import AsyncSessionLocal
+    from app.orchestrator.distributed import fail_round
+
+    async def _run():
+        async with AsyncSessionLocal() as session:
+            await fail_round(session, round_id, _lease(token))
+        job = _job(job_id)
+        if job is not None:
+            await job.set_status("failed", error="shard failed")
+
+    run_async(_run())
+
+
+@celery_app.task
+def maintain_run_partitions_task():
+    from app.db.partitions import maintain_partitions
+    from app.db.session import engine
+
+    async def _run():
+        async with engine.begin() as conn:
+            await maintain_partitions(conn)
 
-    anyio.run(_run)
+    run_async(_run())
@@ -0,0 +1,269 @@
+import asyncio
+import json
+
+import fakeredis
+import numpy as np
+import websockets
+
+from app.services.bybit_stream import BybitKlineStream
+from app.services.indicator_state import IndicatorState, IndicatorStateStore
+from app.services.indicators import IndicatorSpec, compute_indicators
+from app.services.market_data import Candles
+
+
+STEP = 60_000
+SPECS = (IndicatorSpec.sma(3), IndicatorSpec.ema(5), IndicatorSpec.rsi(3), IndicatorSpec.macd(3, 6, 2))
+
+
+def _candles(n: int) -> list[dict]:
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return [dict(timestamp=i * STEP, open=c, high=c, low=c, close=float(c), volume=1.0) for i, c in enumerate(close)]
+
+
+def _frame(candle: dict, confirm: bool = True) -> str:
+    item = {"start": candle["timestamp"], "open": str(candle["open"]), "high": str(candle["high"]),
+            "low": str(candle["low"]), "close": str(candle["close"]), "volume": "1", "confirm": confirm}
+    return json.dumps({"topic": "kline.1.BTCUSDT", "data": [item]})
+
+
+class FakeStore:
+    """In-memory stand-in for CandleStore; ``known`` plays the gap-filled Redis history."""
+
+    def __init__(self, candles: list[dict]):
+        self.known = {c["timestamp"]: c for c in candles}
+        self.reads = 0
+
+    async def get_klines(self, symbol: str, interval: str, limit: int) -> list[dict]:
+        self.reads += 1
+        return [self.known[ts] for ts in sorted(self.known)][-limit:]
+
+    async def save(self, symbol: str, interval: str, candles: list[dict]) -> None:
+        self.known.update((c["timestamp"], c) for c in candles)
+
+
+def _states() -> IndicatorStateStore:
+    return IndicatorStateStore(fakeredis.FakeAsyncRedis(), "BTCUSDT", "1")
+
+
+def _expected(candles: list[dict], specs=SPECS) -> dict:
+    close = np.array([c["close"] for c in candles])
+    return {spec: values[..., -1] for spec, values in compute_indicators(close, specs).items()}
+
+
+def _assert_state(state, candles: list[dict], specs=SPECS) -> None:
+    assert state.last_timestamp == candles[-1]["timestamp"]
+    assert state.states.keys() == set(specs)
+    for spec, value in _expected(candles, specs).items():
+        np.testing.assert_allclose(state.values()[spec], value, rtol=1e-9)
+
+
+async def _serve(frames: list[str], stream_kwargs: dict, closes: int = 1) -> BybitKlineStream:
+    """Run a stream against a local server sending ``frames``, until ``closes`` candles closed."""
+    stop = asyncio.Event()
+    closed = 0
+
+    async def on_close(candle, state):
+        nonlocal closed
+        closed += 1
+        if closed == closes:
+            stop.set()
+
+    async def server(ws):
+        await ws.recv()
+        for frame in frames:
+            await ws.send(frame)
+        await ws.wait_closed()
+
+    async with websockets.serve(server, "127.0.0.1", 0) as srv:
+        port = srv.sockets[0].getsockname()[1]
+        stream = BybitKlineStream(SPECS, symbol="BTCUSDT", interval="1", url=f"ws://127.0.0.1:{port}",
+                                  on_close=on_close, **stream_kwargs)
+        await asyncio.wait_for(stream.run(stop), timeout=10)
+    return stream
+
+
+def test_stream_updates_state_and_reconnects():
+    truth = _candles(130)
+    # The store's newest candle is still open when the stream starts
+    store = FakeStore(truth[:120])
+    closed: list[dict] = []
+    connections = 0
+
+    async def main():
+        stop = asyncio.Event()
+
+        async def on_close(candle, state):
+            closed.append(candle)
+            if len(closed) == 3:
+                stop.set()
+
+        async def server(ws):
+            nonlocal connections
+            connections += 1
+            subscribe = json.loads(await ws.recv())
+            assert subscribe == {"op": "subscribe", "args": ["kline.1.BTCUSDT"]}
+            if connections == 1:
+                await ws.send(_frame(truth[119], confirm=False))
+                await ws.send(_frame(truth[119]))
+                await ws.send(_frame(truth[120]))
+                # Drop the connection: the client has to reconnect
+                return
+            # truth[121] closed while disconnected; the store's gap fill has it
+            store.known[truth[121]["timestamp"]] = truth[121]
+            await ws.send(_frame(truth[122]))
+            await ws.wait_closed()
+
+        async with websockets.serve(server, "127.0.0.1", 0) as srv:
+            port = srv.sockets[0].getsockname()[1]
+            stream = BybitKlineStream(SPECS, symbol="BTCUSDT", interval="1", url=f"ws://127.0.0.1:{port}",
+                                      store=store, states=_states(), on_close=on_close)
+            await asyncio.wait_for(stream.run(stop), timeout=10)
+        return stream
+
+    stream = asyncio.run(main())
+    assert connections == 2
+    assert [c["timestamp"] for c in closed] == [truth[i]["timestamp"] for i in (119, 120, 122)]
+    _assert_state(stream.state, truth[:123])
+    assert truth[122]["timestamp"] in store.known
+
+
+def test_incremental_state_matches_batch_engine():
+    candles = _candles(300)
+    state = IndicatorState(SPECS)
+    for i, c in enumerate(candles):
+        state.update(c["timestamp"], c["close"])
+        if i in (0, 4, 25, 299):
+            for spec, value in _expected(candles[: i + 1]).items():
+                np.testing.assert_allclose(state.values()[spec], value, rtol=1e-9)
+    # Replayed or out-of-order candles are ignored
+    assert not state.update(candles[10]["timestamp"], 1.0)
+
+
+def test_stream_survives_store_errors():
+    from redis.exceptions import RedisError
+
+    truth = _candles(60)
+
+    class FlakyStore(FakeStore):
+        failed = False
+
+        async def save(self, symbol, interval, candles):
+            if not self.failed:
+                self.failed = True
+                raise RedisError("connection reset")
+            await super().save(symbol, interval, candles)
+
+    store = FlakyStore(truth[:50])
+    connections = 0
+
+    async def main():
+        stop = asyncio.Event()
+
+        async def on_close(candle, state):
+            stop.set()
+
+        async def server(ws):
+            nonlocal connections
+            connections += 1
+            await ws.recv()
+            await ws.send(_frame(truth[49]))
+            await ws.wait_closed()
+
+        async with websockets.serve(server, "127.0.0.1", 0) as srv:
+            port = srv.sockets[0].getsockname()[1]
+            stream = BybitKlineStream(SPECS, symbol="BTCUSDT", interval="1", url=f"ws://127.0.0.1:{port}",
+                                      store=store, states=_states(), on_close=on_close)
+            await asyncio.wait_for(stream.run(stop), timeout=10)
+        return stream
+
+    stream = asyncio.run(main())
+    # The failed save dropped the first connection; the stream reconnected after its backoff
+    assert connections == 2
+    _assert_state(stream.state, truth[:50])
+
+
+def test_stream_resumes_persisted_state():
+    truth = _candles(80)
+    store = FakeStore(truth[:70])
+    states = _states()
+
+    first = asyncio.run(_serve([_frame(truth[69])], dict(store=store, states=states)))
+    _assert_state(first.state, truth[:70])
+    reads = store.reads
+
+    # A new process picks the saved state up and only applies the next candle
+    second = asyncio.run(_serve([_frame(truth[70])], dict(store=store, states=states)))
+    _assert_state(second.state, truth[:71])
+    assert store.reads == reads
+    _assert_state(asyncio.run(states.load()), truth[:71])
+
+
+def test_stream_follows_specs_rounds_track():
+    truth = _candles(80)
+    store = FakeStore(truth[:70])
+    states = _states()
+    extra = IndicatorSpec.sma(7)
+
+    asyncio.run(_serve([_frame(truth[69])], dict(store=store, states=states)))
+    asyncio.run(states.track([extra]))
+    stream = asyncio.run(_serve([_frame(truth[70])], dict(store=store, states=states)))
+    _assert_state(stream.state, truth[:71], SPECS + (extra,))
+
+
+def _window(candles: list[dict]) -> Candles:
+    return Candles.from_rows("BTCUSDT", "1", candles)
+
+
+def _assert_bars(bars, candles: list[dict], specs=SPECS) -> None:
+    close, values = bars
+    window = _window(candles)
+    np.testing.assert_allclose(close, window.close[-2:])
+    for spec, expected in compute_indicators(window.close, specs).items():
+        assert values[spec].shape == expected[..., -2:].shape
+        np.testing.assert_allclose(values[spec], expected[..., -2:], rtol=1e-9)
+
+
+def test_state_gives_a_rounds_last_two_bars():
+    candles = _candles(120)
+    state = IndicatorState(SPECS)
+    for c in candles[:-1]:
+        state.update(c["timestamp"], c["close"])
+
+    # The window ends with a still-open candle: it is peeked at, not applied
+    _assert_bars(state.bars(SPECS, _window(candles)), candles)
+    assert state.last_timestamp == candles[-2]["timestamp"]
+    # The window ends with the candle the state applied last
+    _assert_bars(state.bars(SPECS, _window(candles[:-1])), candles[:-1])
+    # Round trips through its saved form
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    _assert_bars(restored.bars(SPECS, _window(candles)), candles)
+
+    # Windows the state does not reach, or specs it lacks, fall back to the batch engine
+    assert state.bars(SPECS, _window(candles[:-2])) is None
+    assert state.bars([IndicatorSpec.sma(7)], _window(candles)) is None
+
+
+def test_technical_agent_reads_streamed_state():
+    from app.agents.technical import DEFAULT_TECH_RULES, TechnicalAgent
+
+    candles = _candles(400)
+    window = _window(candles)
+
+    class Market:
+        async def get_candles(self, symbol, interval, limit):
+            return window
+
+    state = IndicatorState(DEFAULT_TECH_RULES.indicator_specs())
+    for c in candles[:-1]:
+        state.update(c["timestamp"], c["close"])
+
+    batch = asyncio.run(TechnicalAgent("batch", market=Market()).run())
+    live = asyncio.run(TechnicalAgent("live", market=Market(), live=state).run())
+    assert live[0] == batch[0]
+    assert live[1].keys() == batch[1].keys()
+    for key, value in batch[1].items():
+        if isinstance(value, float):
+            np.testing.assert_allclose(live[1][key], value, rtol=1e-9)
+        else:
+            assert live[1][key] == value
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from app.agents.rules import TechnicalRules
+from app.services import evaluation
+from app.services.backtest import BacktestConfig, backtest_close
+from app.services.market_data import Candles
+from app.services.scheduler import evaluate_population_task
+
+
+CONFIG = BacktestConfig(fee_bps=5.5, slippage_bps=2.0, allow_short=True)
+RULES = [
+    TechnicalRules(rsi_length=n, macd=macd, sma_fast=f, sma_slow=s)
+    for n, macd, f, s in [(7, (8, 21, 5), 10, 30), (14, (12, 26, 9), 10, 30), (14, (5, 13, 4), 20, 50),
+                          (21, (8, 21, 5), 20, 50), (9, (12, 26, 9), 5, 40), (14, (12, 26, 9), 10, 30)]
+]
+
+
+def _candles(n: int = 600) -> Candles:
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    rows = [dict(timestamp=i * 60_000, open=c, high=c, low=c, close=c, volume=1.0) for i, c in enumerate(close)]
+    return Candles.from_rows("BTCUSDT", "1", rows)
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(evaluation.settings, "eval_workers", 2)
+    monkeypatch.setattr(evaluation.settings, "eval_min_shard_size", 1)
+    yield
+    evaluation.shutdown_pool()
+
+
+def test_pool_matches_inline_evaluation(small_shards):
+    candles = _candles()
+    expected = backtest_close(candles.close, candles.interval, RULES, CONFIG)
+    assert len({r.pnl for r in expected}) > 2
+    assert evaluation.evaluate_close(candles.close, candles.interval, RULES, CONFIG) == expected
+    assert evaluation._pool is not None
+
+
+class _EagerResult:
+    """Runs the task in-process, through JSON like the broker would."""
+
+    def __init__(self, payload):
+        self.payload = json.loads(json.dumps(payload))
+        self.revoked = False
+
+    def get(self, timeout=None, disable_sync_subtasks=True):
+        assert not disable_sync_subtasks
+        return json.loads(json.dumps(evaluate_population_task.apply(args=[self.payload]).get()))
+
+    def revoke(self):
+        self.revoked = True
+
+
+def test_population_goes_to_the_evaluation_queue(monkeypatch):
+    sent = []
+
+    def apply_async(args, queue):
+        sent.append(queue)
+        return _EagerResult(*args)
+
+    monkeypatch.setattr(evaluation.settings, "eval_queue", "evaluation")
+    monkeypatch.setattr(evaluate_population_task, "apply_async", apply_async)
+    candles = _candles()
+    results = asyncio.run(evaluation.evaluate_population(candles, RULES, CONFIG))
+    assert sent == ["evaluation"]
+    # Duplicate rule sets are sent once and answered for each
+    assert results == backtest_close(candles.close, candles.interval, RULES, CONFIG)
+
+
+def test_unreachable_evaluation_worker_falls_back(monkeypatch):
+    def apply_async(args, queue):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(evaluation.settings, "eval_queue", "evaluation")
+    monkeypatch.setattr(evaluate_population_task, "apply_async", apply_async)
+    candles = _candles()
+    results = asyncio.run(evaluation.evaluate_population(candles, RULES, CONFIG))
+    assert results == backtest_close(candles.close, candles.interval, RULES, CONFIG)
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from app.services.json_stream import JsonFieldParser, first_value, parse_fields
+
+
+ANSWER = '{"sentiment": "bullish", "action": "buy", "confidence": 0.8, "reason": "ETF \\"inflows\\" \\u2191"}'
+
+
+def _feed_in_chunks(parser: JsonFieldParser, text: str, size: int) -> None:
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(ANSWER)])
+def test_values_survive_any_chunk_boundary(size):
+    parser = JsonFieldParser(["sentiment", "action", "confidence", "reason"])
+    _feed_in_chunks(parser, ANSWER, size)
+    assert parser.values == json.loads(ANSWER)
+    assert parser.complete and parser.closed
+
+
+def test_complete_as_soon_as_requested_fields_are_in():
+    parser = JsonFieldParser(["sentiment", "action"])
+    assert not parser.feed('{"sentiment": "bearish", "act')
+    assert parser.feed('ion": "sell", "reason": "unfinis')
+    assert parser.values == {"sentiment": "bearish", "action": "sell"}
+    assert not parser.closed
+
+
+def test_escapes_and_structural_characters_inside_strings():
+    text = r'{"reason": "a \"quoted\" {brace}, [bracket]: and \\ backslash", "action": "hold"}'
+    assert parse_fields(text, ["reason", "action"]) == json.loads(text)
+
+
+def test_nested_values_are_skipped():
+    parser = JsonFieldParser(["action"])
+    parser.feed('{"meta": {"action": "buy", "list": [1, {"action": "sell"}]}, "action": "hold"}')
+    assert parser.values == {"action": "hold"}
+    assert parser.closed
+
+
+def test_prose_and_code_fence_preamble():
+    text = 'Sure! Here is my analysis:\n```json\n{"sentiment": "neutral", "action": "hold"}\n```\nHope it helps.'
+    parser = JsonFieldParser(["sentiment", "action"])
+    _feed_in_chunks(parser, text, 5)
+    assert parser.values == {"sentiment": "neutral", "action": "hold"}
+
+
+def test_literals_numbers_and_booleans():
+    values = parse_fields('{"n": -1.5e2, "ok": true, "none": null, "last": 3}', [])
+    assert values == {"n": -150.0, "ok": True, "none": None, "last": 3}
+
+
+def test_closed_after_top_level_array():
+    parser = JsonFieldParser()
+    assert parser.feed('[{"action": "buy"}, {"action": "sell"}] trailing')
+    assert parser.closed and parser.values == {}
+
+
+def test_malformed_input_never_raises():
+    parser = JsonFieldParser(["action"])
+    assert not parser.feed('{"action": buy, "confidence": 0.')
+    assert not parser.feed('5, "x": }}}')
+    # Not JSON, so not the answer: nothing from it is reported and the scan goes on
+    assert not parser.closed and parser.values == {}
+    assert parser.feed(' {"action": "sell"}')
+    assert parser.values == {"action": "sell"} and parser.value == {"action": "sell"}
+
+
+@pytest.mark.parametrize("size", [1, 4, 1000])
+def test_bracketed_prose_before_the_answer(size):
+    text = ('Based on headlines [1] and [2], the [new] ETF story {see below} matters most: '
+            '{"sentiment": "positive", "action": "buy"}')
+    parser = JsonFieldParser(["sentiment", "action"])
+    _feed_in_chunks(parser, text, size)
+    assert parser.complete
+    assert parser.values == {"sentiment": "positive", "action": "buy"}
+
+
+def test_bracketed_prose_before_an_array_answer():
+    text = 'Headlines [1], [2] and [new] ones give: [{"analyst": 0, "action": "buy"}] Done [3].'
+    parser = JsonFieldParser()
+    _feed_in_chunks(parser, text, 3)
+    assert parser.closed
+    assert parser.value == [{"analyst": 0, "action": "buy"}]
+    assert first_value(text) == parser.value
+    assert first_value("Only [1] and [new] here") is None
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+
+from app.services import llm_router
+from app.services.llm_router import AllBackendsFailed, LLMBackend, LLMRouter
+
+
+@pytest.fixture(autouse=True)
+def router_settings(monkeypatch):
+    for name, value in {
+        "llm_hedging_enabled": True,
+        "llm_hedge_default_seconds": 0.05,
+        "llm_hedge_min_samples": 5,
+        "llm_max_attempts": 2,
+        "llm_failure_threshold": 2,
+        "llm_cooldown_seconds": 30.0,
+        "llm_cooldown_max_seconds": 60.0,
+    }.items():
+        monkeypatch.setattr(llm_router.settings, name, value)
+
+
+def _backend(name: str, max_concurrency: int = 4) -> LLMBackend:
+    return LLMBackend(name, "ollama", f"http://{name}", "model", max_concurrency=max_concurrency, rate_per_second=0)
+
+
+def _behaviour(**per_backend: tuple[float, bool]):
+    """A call that sleeps for the backend's delay, then fails or answers with its name."""
+
+    async def call(backend: LLMBackend) -> str:
+        delay, fails = per_backend[backend.name]
+        await asyncio.sleep(delay)
+        if fails:
+            raise RuntimeError(f"{backend.name} down")
+        return backend.name
+
+    return call
+
+
+def test_concurrent_calls_spread_across_backends(monkeypatch):
+    monkeypatch.setattr(llm_router.settings, "llm_hedging_enabled", False)
+    a, b = _backend("a", 2), _backend("b", 2)
+    router = LLMRouter([a, b])
+    fn = _behaviour(a=(0.02, False), b=(0.02, False))
+
+    async def main():
+        results = await asyncio.gather(*[router.call(fn) for _ in range(8)])
+        await asyncio.sleep(0)
+        return results
+
+    # Calls queued behind a backend's limiter count as its load, so they split evenly
+    assert Counter(asyncio.run(main())) == {"a": 4, "b": 4}
+    assert a.inflight == b.inflight == 0
+
+
+def test_slow_backend_is_hedged():
+    a, b = _backend("a"), _backend("b")
+    router = LLMRouter([a, b])
+
+    async def main():
+        started = time.monotonic()
+        result = await router.call(_behaviour(a=(1.0, False), b=(0.01, False)))
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(0)
+        return result, elapsed
+
+    result, elapsed = asyncio.run(main())
+    # a had not answered by its p95 (the 50ms default), so the hedge to b won and a was cancelled
+    assert result == "b"
+    assert elapsed < 0.5
+    assert a.inflight == 0 and not a.latencies
+    assert len(b.latencies) == 1
+
+
+def test_queued_calls_are_not_hedged():
+    a, b = _backend("a", 1), _backend("b", 1)
+    for backend in (a, b):
+        backend.latencies.extend([0.1] * 5)
+    router = LLMRouter([a, b])
+    calls = 0
+
+    async def fn(backend: LLMBackend) -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return backend.name
+
+    async def main():
+        return await asyncio.gather(*[router.call(fn) for _ in range(20)])
+
+    # Each call finishes well within p95 once admitted; most wait longer than that in the
+    # limiter queue, which must not trigger hedges
+    assert Counter(asyncio.run(main())) == {"a": 10, "b": 10}
+    assert calls == 20
+
+
+def test_hedge_clock_starts_at_admission():
+    a, b = _backend("a", 1), _backend("b")
+    router = LLMRouter([a, b])
+
+    async def hold():
+        async with a.limiter:
+            await asyncio.sleep(0.2)
+
+    async def main():
+        # Another caller holds a's only slot for four times the hedge delay
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        result = await router.call(_behaviour(a=(0.01, False), b=(0.01, False)))
+        await holder
+        return result
+
+    # Ranked first, queued past the hedge delay, then answered within it: no hedge to b
+    assert asyncio.run(main()) == "a"
+    assert not b.latencies
+
+
+def test_failure_fails_over_at_once(monkeypatch):
+    monkeypatch.setattr(llm_router.settings, "llm_hedge_default_seconds", 10.0)
+    a, b = _backend("a"), _backend("b")
+    router = LLMRouter([a, b])
+
+    async def main():
+        started = time.monotonic()
+        result = await router.call(_behaviour(a=(0.0, True), b=(0.0, False)))
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(main())
+    assert result == "b"
+    assert elapsed < 1.0
+    assert a.failures == 1 and a.healthy
+    assert b.failures == 0
+
+
+def test_repeated_failures_cool_a_backend_down(monkeypatch):
+    monkeypatch.setattr(llm_router.settings, "llm_hedging_enabled", False)
+    a, b = _backend("a"), _backend("b")
+    a.latencies.extend([0.01] * 5)
+    b.latencies.extend([1.0] * 5)
+    router = LLMRouter([a, b])
+
+    fn = _behaviour(a=(0.0, True), b=(0.0, False))
+    for _ in range(2):
+        assert asyncio.run(router.call(fn)) == "b"
+    assert not a.healthy
+    assert router.ranked() == [b, a]
+
+    # Still tried as the last resort, and a success clears the record
+    assert asyncio.run(router.call(_behaviour(a=(0.0, False), b=(0.0, True)))) == "a"
+    assert a.healthy and a.failures == 0
+
+
+def test_all_backends_failing_raises():
+    router = LLMRouter([_backend("a"), _backend("b")])
+    with pytest.raises(AllBackendsFailed) as exc_info:
+        asyncio.run(router.call(_behaviour(a=(0.0, True), b=(0.0, True))))
+    assert "a down" in str(exc_info.value) and "b down" in str(exc_info.value)
+
+
+def test_ranking_weighs_latency_by_load():
+    fast, slow = _backend("fast"), _backend("slow")
+    fast.latencies.extend([0.1] * 5)
+    slow.latencies.extend([0.3] * 5)
+    router = LLMRouter([slow, fast])
+    assert router.ranked() == [fast, slow]
+    fast.inflight = 12
+    assert router.ranked() == [slow, fast]
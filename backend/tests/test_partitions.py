@@ -0,0 +1,54 @@
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.db.partitions import _month_start, _next_month, ensure_partitions, list_partitions
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL (a migrated Postgres) not set")
+
+
+def test_rows_in_the_default_partition_move_into_the_new_month():
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async def main():
+        engine = create_async_engine(DATABASE_URL)
+        try:
+            async with engine.connect() as conn:
+                trans = await conn.begin()
+                try:
+                    existing = await list_partitions(conn)
+                    ahead, month = 0, _month_start(datetime.utcnow().date())
+                    while month in existing:
+                        ahead, month = ahead + 1, _next_month(month)
+                    agent_id = (await conn.execute(text(
+                        "INSERT INTO agent (name, agent_type, generation, prompt, is_active, created_at) "
+                        "VALUES ('partition-test', 'technical', 0, '', true, now()) RETURNING id"
+                    ))).scalar()
+                    round_id = (await conn.execute(text(
+                        "INSERT INTO round (name, started_at) VALUES ('partition-test', now()) RETURNING id"
+                    ))).scalar()
+                    # Written before the month had a partition, so it lands in the default one
+                    run_id = (await conn.execute(text(
+                        "INSERT INTO agentrun (agent_id, round_id, pnl, created_at) "
+                        "VALUES (:agent, :round, 1.5, :at) RETURNING id"
+                    ), {"agent": agent_id, "round": round_id, "at": datetime(month.year, month.month, 15)})).scalar()
+
+                    created = await ensure_partitions(conn, months_ahead=ahead + 1)
+
+                    name = f"agentrun_p{month:%Y%m}"
+                    assert name in created
+                    assert f"agentrun_p{_next_month(month):%Y%m}" in created
+                    home = (await conn.execute(text(
+                        "SELECT tableoid::regclass::text, pnl FROM agentrun WHERE id = :id"
+                    ), {"id": run_id})).one()
+                    assert tuple(home) == (name, 1.5)
+                finally:
+                    await trans.rollback()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
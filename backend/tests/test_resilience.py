@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+
+from app.services.resilience import BackgroundRefresh, CircuitBreaker, CircuitOpen
+
+
+async def _ok():
+    return "ok"
+
+
+async def _fail():
+    raise RuntimeError("upstream down")
+
+
+def _call(cb: CircuitBreaker, fn):
+    return asyncio.run(cb.call(fn))
+
+
+def _elapse_reset(cb: CircuitBreaker) -> None:
+    cb.opened_at -= cb.reset_seconds
+
+
+def _open(cb: CircuitBreaker) -> None:
+    for _ in range(cb.failure_threshold):
+        with pytest.raises(RuntimeError):
+            _call(cb, _fail)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    cb = CircuitBreaker("test", failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            _call(cb, _fail)
+    assert cb.state == "closed"
+    with pytest.raises(RuntimeError):
+        _call(cb, _fail)
+    assert cb.state == "open"
+
+    called = False
+
+    async def tracked():
+        nonlocal called
+        called = True
+
+    with pytest.raises(CircuitOpen) as exc_info:
+        _call(cb, tracked)
+    assert not called
+    assert 0 < exc_info.value.retry_in <= 30
+
+
+def test_success_resets_the_failure_count():
+    cb = CircuitBreaker("test", failure_threshold=2, reset_seconds=30)
+    with pytest.raises(RuntimeError):
+        _call(cb, _fail)
+    assert _call(cb, _ok) == "ok"
+    with pytest.raises(RuntimeError):
+        _call(cb, _fail)
+    assert cb.state == "closed"
+
+
+def test_half_open_lets_a_single_probe_through():
+    cb = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    _open(cb)
+    _elapse_reset(cb)
+    assert cb.state == "half_open"
+
+    async def main():
+        release = asyncio.Event()
+
+        async def probe():
+            await release.wait()
+            return "probed"
+
+        first = asyncio.ensure_future(cb.call(probe))
+        await asyncio.sleep(0)
+        # While the probe is out every other call still fails fast
+        with pytest.raises(CircuitOpen):
+            await cb.call(_ok)
+        release.set()
+        return await first
+
+    assert asyncio.run(main()) == "probed"
+    assert cb.state == "closed"
+    assert cb.failures == 0
+    assert _call(cb, _ok) == "ok"
+
+
+def test_failed_probe_reopens_for_another_period():
+    cb = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    _open(cb)
+    _elapse_reset(cb)
+    with pytest.raises(RuntimeError):
+        _call(cb, _fail)
+    assert cb.state == "open"
+    with pytest.raises(CircuitOpen):
+        _call(cb, _ok)
+
+    # The next period ends in another single probe
+    _elapse_reset(cb)
+    assert cb.state == "half_open"
+    assert _call(cb, _ok) == "ok"
+    assert cb.state == "closed"
+
+
+def test_cancelled_probe_frees_the_half_open_slot():
+    cb = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    _open(cb)
+    _elapse_reset(cb)
+
+    async def main():
+        probe = asyncio.ensure_future(cb.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(main())
+    # Cancellation is not a failure: the circuit stays half-open for the next probe
+    assert cb.state == "half_open"
+    assert _call(cb, _ok) == "ok"
+
+
+def test_background_refresh_is_single_flight():
+    refresh = BackgroundRefresh()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return calls
+
+    async def main():
+        return await asyncio.gather(*[refresh.fetch("key", fetch) for _ in range(5)])
+
+    assert asyncio.run(main()) == [1] * 5
+    assert calls == 1
+
+
+def test_background_refresh_outlives_the_deadline():
+    refresh = BackgroundRefresh()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return "fresh"
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await refresh.fetch("key", fetch, deadline=0.01)
+        # The fetch kept going; a later caller joins it instead of starting another
+        result = await refresh.fetch("key", fetch)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "fresh"
+    assert calls == 1
+    assert not refresh._inflight
+
+
+def test_background_refresh_failures_are_not_memoized():
+    refresh = BackgroundRefresh()
+    outcomes = iter([RuntimeError("upstream down"), "fresh"])
+
+    async def fetch():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await refresh.fetch("key", fetch)
+        await asyncio.sleep(0)
+        return await refresh.fetch("key", fetch)
+
+    assert asyncio.run(main()) == "fresh"
+
+
+def test_drain_lets_late_fetches_finish_between_loop_runs():
+    from app.services.resilience import drain_refreshes
+
+    refresh = BackgroundRefresh()
+    landed = []
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        landed.append("fresh")
+        return "fresh"
+
+    async def slow_forever():
+        await asyncio.sleep(10)
+
+    # A Celery worker's loop only runs inside run_until_complete, one task at a time
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            loop.run_until_complete(refresh.fetch("key", fetch, deadline=0.01))
+        assert not landed
+        loop.run_until_complete(drain_refreshes(1.0))
+        assert landed == ["fresh"] and not refresh._inflight
+
+        # Bounded: a fetch that keeps hanging is left for a later run
+        with pytest.raises(asyncio.TimeoutError):
+            loop.run_until_complete(refresh.fetch("stuck", slow_forever, deadline=0.01))
+        loop.run_until_complete(drain_refreshes(0.02))
+        assert "stuck" in refresh._inflight
+        refresh._inflight["stuck"].cancel()
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        loop.close()
@@ -0,0 +1,43 @@
+import asyncio
+import os
+
+import pytest
+
+from app.models.agent import Round
+from app.services import round_lease
+from app.services.round_lease import LeaseLost, RoundLease
+
+fakeredis = pytest.importorskip("fakeredis")
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL (a migrated Postgres) not set")
+
+
+def test_fence_survives_a_redis_reset(monkeypatch):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async def main():
+        engine = create_async_engine(DATABASE_URL)
+        session = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(round_lease, "AsyncSessionLocal", session)
+        redis = fakeredis.FakeAsyncRedis()
+        try:
+            stale = await RoundLease.acquire("stale", 60, redis)
+            assert await RoundLease.acquire("busy", 60, redis) is None
+            await stale.release()
+
+            await redis.flushall()
+            current = await RoundLease.acquire("current", 60, redis)
+            assert current.token > stale.token
+
+            async with session() as db:
+                rnd = Round(name="fence-test")
+                db.add(rnd)
+                await db.flush()
+                await current.fence(db, rnd.id)
+                with pytest.raises(LeaseLost):
+                    await stale.fence(db, rnd.id)
+                await db.rollback()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
@@ -1,6 +1,6 @@
-import { useEffect, useMemo, useState } from 'react'
+import { useEffect, useMemo, useRef, useState } from 'react'
 import { Routes, Route, Link } from 'react-router-dom'
-import { api } from './lib/api'
+import { api, followJob, isTerminal, RoundJob } from './lib/api'
 import { AgentList } from './components/AgentList'
 import { AgentDetails } from './components/AgentDetails'
 import Stats from './pages/Stats'
@@ -8,13 +8,28 @@ import Dashboard from './pages/Dashboard'
 
 export default function App() {
   const [running, setRunning] = useState(false)
+  const [job, setJob] = useState<RoundJob | null>(null)
+  // Bumped when a round ends so the dashboard remounts and refetches
+  const [refreshKey, setRefreshKey] = useState(0)
+  const stopFollowing = useRef<(() => void) | null>(null)
+
+  useEffect(() => () => stopFollowing.current?.(), [])
 
   const runAll = async () => {
     setRunning(true)
+    setJob(null)
     try {
-      await api.runAllAgents()
-    } finally {
+      const links = await api.runAllAgents()
+      stopFollowing.current = followJob(links, (update) => {
+        setJob(update)
+        if (isTerminal(update.status)) {
+          setRunning(false)
+          setRefreshKey((k) => k + 1)
+        }
+      })
+    } catch (e) {
       setRunning(false)
+      throw e
     }
   }
 
@@ -29,7 +44,7 @@ export default function App() {
           <Link to="/" className="font-semibold">AI Agents Orchestrator</Link>
           <div className="flex gap-2">
             <button onClick={runAll} className="px-3 py-1 bg-indigo-600 text-white rounded disabled:opacity-50" disabled={running}>
-              Запустить всех агентов
+              {running && job ? `Раунд: ${job.done}/${job.total || '?'}` : 'Запустить всех агентов'}
             </button>
             <button onClick={evolve} className="px-3 py-1 bg-emerald-600 text-white rounded">
               Сформировать новое поколение
@@ -40,7 +55,7 @@ export default function App() {
 
       <main className="max-w-6xl mx-auto p-4">
         <Routes>
-          <Route path="/" element={<Dashboard />} />
+          <Route path="/" element={<Dashboard key={refreshKey} />} />
           <Route path="/agents/:id" element={<AgentDetails />} />
           <Route path="/stats" element={<Stats />} />
         </Routes>
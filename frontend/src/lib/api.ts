@@ -20,7 +20,30 @@ export type AgentRun = {
   created_at: string
 }
 
-const client = axios.create({ baseURL: import.meta.env.VITE_API_BASE || 'http://localhost:8000' })
+export type JobStatus = 'queued' | 'running' | 'finished' | 'failed' | 'skipped' | 'coalesced'
+
+export type JobLinks = {
+  status: JobStatus
+  job_id: string
+  status_url: string
+  events_url: string
+}
+
+export type RoundJob = {
+  id: string
+  status: JobStatus
+  name: string
+  round_id: number | null
+  done: number
+  total: number
+  error: string
+}
+
+const TERMINAL: JobStatus[] = ['finished', 'failed', 'skipped', 'coalesced']
+export const isTerminal = (status: JobStatus) => TERMINAL.includes(status)
+
+const baseURL = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
+const client = axios.create({ baseURL })
 
 export const api = {
   listAgents: async (): Promise<Agent[]> => {
@@ -38,8 +61,14 @@ export const api = {
   runAgent: async (id: number) => {
     await client.post(`/api/agents/${id}/run`)
   },
-  runAllAgents: async () => {
-    await client.post('/agents/run')
+  // The round is only queued here; follow it with followJob
+  runAllAgents: async (): Promise<JobLinks> => {
+    const { data } = await client.post('/agents/run')
+    return data
+  },
+  getJob: async (url: string): Promise<RoundJob> => {
+    const { data } = await client.get(url)
+    return data
   },
   evolve: async () => {
     await client.post('/agents/evolve')
@@ -59,3 +88,49 @@ export const api = {
 }
 
 
+
+// Streams job updates from events_url until the job ends; falls back to polling
+// status_url if the stream drops. Returns a function that stops following.
+export function followJob(links: JobLinks, onUpdate: (job: RoundJob) => void, pollMs = 2000): () => void {
+  let stopped = false
+  let timer: ReturnType<typeof setTimeout> | undefined
+  let job: RoundJob = {
+    id: links.job_id, status: links.status, name: '', round_id: null, done: 0, total: 0, error: '',
+  }
+  const update = (patch: Partial<RoundJob>) => {
+    job = { ...job, ...patch }
+    onUpdate(job)
+    if (isTerminal(job.status)) stop()
+  }
+
+  const poll = async () => {
+    if (stopped) return
+    try {
+      update(await api.getJob(links.status_url))
+    } catch {
+      // Transient error or the job expired; keep trying until stopped
+    }
+    if (!stopped) timer = setTimeout(poll, pollMs)
+  }
+
+  const source = new EventSource(baseURL + links.events_url)
+  source.addEventListener('status', (e) => {
+    const data = JSON.parse((e as MessageEvent).data)
+    update({ ...data, round_id: data.round_id === '' || data.round_id == null ? job.round_id : Number(data.round_id) })
+  })
+  source.addEventListener('agent', (e) => {
+    update({ done: JSON.parse((e as MessageEvent).data).done })
+  })
+  source.onerror = () => {
+    // The server closes the stream once the job ends; either way the status hash has the final word
+    source.close()
+    if (!stopped && !timer) poll()
+  }
+
+  function stop() {
+    stopped = true
+    source.close()
+    if (timer) clearTimeout(timer)
+  }
+  return stop
+}